@@ -0,0 +1,134 @@
+### Standard Libraries
+import statistics
+import subprocess
+import sys
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+Development script to time how long the SDS takes to start. Each entry is
+timed in a fresh interpreter, as a module is only imported once in a
+process, and the heavy libraries it loaded are listed. Run it from the top
+of the repository:
+
+    python Dev_Import_Benchmark.py
+
+For a breakdown of a slow import, use python -X importtime -c "import ...".
+"""
+
+# Libraries that should only be loaded by the stage that needs them
+HEAVY_LIBRARIES = (
+    "catboost",
+    "sklearn",
+    "scipy",
+    "pandas",
+    "tkinter",
+    "psutil",
+)
+
+# Modules timed, from the command line down to the synthesis
+BENCHMARK_MODULES = (
+    "SDS.src.Synth_CLI",
+    "SDS.src.Synth_It_So",
+    "SDS.src.back_end.Control_Function",
+    "SDS.src.back_end.Synthesizer",
+)
+
+REPEATS = 5
+
+
+def time_import(module_name):
+
+    """ Imports a module in a fresh interpreter.
+
+    Parameters
+    ----------
+    module_name: string
+        The module to be imported.
+
+
+    Returns
+    -------
+    seconds: float
+        How long the import took.
+
+    loaded: list
+        The heavy libraries loaded by the import.
+    """
+
+    code = (
+        "import sys, time\n"
+        + "start = time.perf_counter()\n"
+        + "import "
+        + module_name
+        + "\n"
+        + "print(time.perf_counter() - start)\n"
+        + "print(','.join(x for x in "
+        + repr(HEAVY_LIBRARIES)
+        + " if x in sys.modules))\n"
+    )
+
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()
+
+    return (float(output[0]), [x for x in output[1].split(",") if x != ""])
+
+
+def time_help():
+
+    """ Times "synthesise --help" from start to exit.
+
+    Returns
+    -------
+    seconds: float
+    """
+
+    code = (
+        "import subprocess, sys, time\n"
+        + "start = time.perf_counter()\n"
+        + "subprocess.run([sys.executable, '-m', 'SDS.src.Synth_CLI',"
+        + " '--help'], check=True, capture_output=True)\n"
+        + "print(time.perf_counter() - start)\n"
+    )
+
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    return float(output)
+
+
+if __name__ == "__main__":
+
+    print("Median of " + str(REPEATS) + " runs each")
+    print("-" * 72)
+
+    for module_name in BENCHMARK_MODULES:
+        results = [time_import(module_name) for i in range(REPEATS)]
+
+        seconds = statistics.median(x[0] for x in results)
+
+        print(
+            module_name.ljust(40)
+            + str(round(seconds, 3)).rjust(7)
+            + " s  "
+            + (", ".join(results[-1][1]) or "-")
+        )
+
+    seconds = statistics.median(time_help() for i in range(REPEATS))
+
+    print(
+        "synthesise --help".ljust(40) + str(round(seconds, 3)).rjust(7) + " s"
+    )
@@ -0,0 +1,190 @@
+### Standard Libraries
+import argparse
+import sys
+
+import yaml
+
+### Front End Modules
+import SDS.src.front_interface.Autopopulate_Columns_Functions as ap
+
+from SDS.src.Synth_It_So import (
+    control_arguments,
+    synthesis_activation,
+    validate_control,
+)
+
+### General Information
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the command line entry point of the SDS. Run with no
+arguments it opens the file picker and control file editor as before. Given
+an input file and a filled in control file (YAML, with the same sections
+and keys as the one the editor opens) it runs from start to end with no
+windows or prompts, so it can be run by a scheduler or batch array:
+
+    synthesise --input real_data.csv --config control.yml
+    synthesise --input real_data.csv --config control.yml --validate-only
+    synthesise --input real_data.csv --config control.yml --resume
+"""
+
+
+def load_config(config_path):
+
+    """ Loads a control file written by hand or saved from the editor.
+
+    Parameters
+    ----------
+    config_path: string
+        The YAML control file.
+
+
+    Returns
+    -------
+    control_variables: dict
+        The sections of the control file.
+    """
+
+    with open(config_path, "r") as f:
+        control_variables = yaml.safe_load(f)
+
+    if not isinstance(control_variables, dict):
+        raise ValueError(
+            str(config_path) + " must be a YAML control file with sections"
+            + ' such as "Column Parameters"'
+        )
+
+    return control_variables
+
+
+def build_parser():
+
+    """ Creates the parser of the command line arguments.
+
+    Returns
+    -------
+    parser: argparse.ArgumentParser
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="synthesise",
+        description=(
+            "Synthetic Data Experimental Research System. With --input and"
+            + " --config the run is headless, otherwise a file picker and"
+            + " control file editor are opened."
+        ),
+    )
+
+    parser.add_argument(
+        "--input", help="The real data file (.csv or .parquet)."
+    )
+
+    parser.add_argument(
+        "--config",
+        help="The YAML control file, with the same sections and keys as"
+        + " the one opened in the editor.",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Carry on a stopped run from the Run Directory of the control"
+        + " file.",
+    )
+
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Check the control file against the input file and stop.",
+    )
+
+    return parser
+
+
+def main(argv=None):
+
+    """ Runs the SDS from the command line.
+
+    Parameters
+    ----------
+    argv: list, optional
+        The command line arguments, by default sys.argv[1:].
+
+
+    Returns
+    -------
+    exit_code: integer
+        0 on success, 1 if the input or control file has problems.
+    """
+
+    parser = build_parser()
+
+    args = parser.parse_args(argv)
+
+    if args.input is None and args.config is None:
+        if args.validate_only:
+            parser.error("--validate-only needs --input and --config")
+
+        synthesis_activation(["--resume"] if args.resume else [])
+
+        return 0
+
+    if args.input is None or args.config is None:
+        parser.error("--input and --config must be given together")
+
+    try:
+        control_variables = load_config(args.config)
+
+        input_format = ap.read_optional_control(
+            control_variables,
+            "Synthetic File Parameters",
+            "Input File Format",
+        )
+
+        column_names = ap.read_col_names(args.input, input_format)
+
+        arguments = control_arguments(control_variables, column_names)
+
+        validate_control(arguments, column_names)
+
+        if args.resume and arguments["run_directory"] is None:
+            raise ValueError(
+                "--resume needs a Run Directory in the control file"
+            )
+
+    except (OSError, ValueError, yaml.YAMLError) as error:
+        print("synthesise: " + str(error), file=sys.stderr)
+
+        return 1
+
+    if args.validate_only:
+        print(
+            "The control file is valid for "
+            + str(args.input)
+            + " ("
+            + str(len(column_names))
+            + " columns)"
+        )
+
+        return 0
+
+    # The synthesis libraries are only loaded once there is a run to do
+    from SDS.src.back_end.Control_Function import Synth_Control_Function
+
+    Synth_Control_Function(
+        file_path=args.input,
+        resume=args.resume,
+        interactive=False,
+        **arguments
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
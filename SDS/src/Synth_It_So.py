@@ -1,15 +1,9 @@
 ### Standard Libraries
-import pandas as pd
-import pdb
-import time
+import sys
 
 ### Front End Modules
-from SDS.src.front_interface.Test_Script import testing
-
 import SDS.src.front_interface.Autopopulate_Columns_Functions as ap
 
-from SDS.src.back_end.Control_Function import Synth_Control_Function
-
 ### General Information
 """
 Please cite this system as:
@@ -18,97 +12,500 @@ Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
     [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
 """
 
-def synthesis_activation():
+# Settings with a fixed set of values, as they are checked in the control file
+TRAINING_DEVICES = ("auto", "cpu", "gpu")
 
-    file_path = testing()
+OUTPUT_FORMATS = ("csv", "parquet")
 
-    column_names = ap.read_col_names(file_path)
+# CatBoost can't build deeper trees than this
+MAX_TREE_DEPTH = 16
 
-    control_variables = ap.create_control_file(column_headers=column_names)
+
+def whole_number_or_auto(value):
+
+    """ Reads a setting that is a whole number or "auto". Other values are
+            given back as they are, for validate_control() to report.
+
+    Parameters
+    ----------
+    value:
+        The value in the control file, or None.
+
+
+    Returns
+    -------
+    value: integer, "auto", None or the value given
+    """
+
+    if value is None or str(value).lower() == "auto":
+        return value
+
+    try:
+        number = float(value)
+
+    except (TypeError, ValueError):
+        return value
+
+    if number.is_integer():
+        return int(number)
+
+    return value
+
+
+def control_arguments(control_variables, column_names):
+
+    """ Turns a loaded control file into the arguments of
+            Synth_Control_Function(), so the interactive and headless entry
+            points read it the same way.
+
+    Parameters
+    ----------
+    control_variables: dict
+        The loaded control file (see create_control_file()).
+
+    column_names: list
+        The columns of the input file.
+
+
+    Returns
+    -------
+    arguments: dict
+        The arguments of Synth_Control_Function(), except file_path and
+        resume.
+    """
+
+    input_format = ap.read_optional_control(
+        control_variables, "Synthetic File Parameters", "Input File Format"
+    )
 
     ### Main Column Inputs
-    categorical_variables = column_names
+    categorical_variables = list(column_names)
 
-    demographic_variables = control_variables["Column Parameters"][
-        "Demographic Columns"
-    ]
+    demographic_variables = ap.read_required_control(
+        control_variables, "Column Parameters", "Demographic Columns"
+    )
 
-    ML_vars = control_variables["Column Parameters"][
-        "Machine Learning Columns"
-    ]
+    ML_vars = ap.read_required_control(
+        control_variables, "Column Parameters", "Machine Learning Columns"
+    )
 
-    combination_cols = control_variables["Column Parameters"][
-        "Combination Columns"
-    ]
+    combination_cols = ap.read_required_control(
+        control_variables, "Column Parameters", "Combination Columns"
+    )
 
     ### Output File Controls
-    name_of_output = control_variables["Synthetic File Parameters"][
-        "Output File Name"
-    ]
+    name_of_output = str(
+        ap.read_required_control(
+            control_variables,
+            "Synthetic File Parameters",
+            "Output File Name",
+            single=True,
+        )
+    )
 
-    size_of_synth_rows = control_variables["Synthetic File Parameters"][
-        "Number of Rows"
-    ]
+    size_of_synth_rows = int(
+        ap.read_required_control(
+            control_variables,
+            "Synthetic File Parameters",
+            "Number of Rows",
+            single=True,
+        )
+    )
 
     ### Security Parameters
-    remove_small_vals = control_variables["Security Parameters"][
-        "Remove Small Values Below"
-    ]
+    remove_small_vals = int(
+        ap.read_required_control(
+            control_variables,
+            "Security Parameters",
+            "Remove Small Values Below",
+            single=True,
+        )
+    )
 
-    remove_small_vals = int(remove_small_vals[0])
+    cutting_vars = ap.read_list_control(
+        control_variables,
+        "Security Parameters",
+        "Columns to be Cut Down in Length",
+    )
 
-    cutting_vars = control_variables["Security Parameters"][
-        "Columns to be Cut Down in Length"
-    ]
+    length_cuts = ap.read_list_control(
+        control_variables, "Security Parameters", "Length of Cuts"
+    )
 
-    length_cuts = control_variables["Security Parameters"]["Length of Cuts"]
+    # No columns to cut is the same as not cutting
+    if len(cutting_vars) == 0 and len(length_cuts) == 0:
+        cutting_vars = None
+        length_cuts = None
 
     ### Optional Synthesis Controls
-    numeric_group_vars = control_variables["Optional Parameters"][
-        "Numeric Grouping Columns"
-    ]
+    numeric_group_vars = ap.read_list_control(
+        control_variables, "Optional Parameters", "Numeric Grouping Columns"
+    )
 
-    synth_label_cols = control_variables["Optional Parameters"][
-        "Synthetic Label Columns"
-    ]
+    synth_label_cols = ap.read_list_control(
+        control_variables, "Optional Parameters", "Synthetic Label Columns"
+    )
 
-    synth_label_cols_stucture = control_variables["Optional Parameters"][
-        "Synthetic Label Structure"
-    ]
+    synth_label_cols_stucture = ap.read_list_control(
+        control_variables, "Optional Parameters", "Synthetic Label Structure"
+    )
 
-    date_columns = control_variables["Optional Parameters"]["Date Columns"]
+    date_columns = ap.read_list_control(
+        control_variables, "Optional Parameters", "Date Columns"
+    )
+
+    hierarchical_labels = ap.read_optional_control(
+        control_variables,
+        "Optional Parameters",
+        "Hierarchical Labels",
+        default=False,
+    )
+
+    if str(hierarchical_labels).lower() not in ("true", "false"):
+        raise ValueError("Hierarchical Labels must be True or False")
+
+    hierarchical_labels = str(hierarchical_labels).lower() == "true"
+
+    branch_min_rows = ap.read_optional_control(
+        control_variables, "Optional Parameters", "Sample Branches Below Rows"
+    )
+
+    if branch_min_rows is not None:
+        branch_min_rows = int(branch_min_rows)
 
     ### Computer Control Parameters
 
-    group_size = control_variables["Computer Parameters"]["Group Size"]
+    group_size = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Group Size"
+    )
 
-    GPU_IDs = control_variables["Computer Parameters"][
-        "Graphics Card(s) ID Number(s)"
-    ]
+    if group_size is not None:
+        group_size = int(group_size)
 
-    tree_iterations = control_variables["Computer Parameters"][
-        "Number of Training Cycles for Random Forests"
+    GPU_IDs = ap.read_list_control(
+        control_variables,
+        "Computer Parameters",
+        "Graphics Card(s) ID Number(s)",
+    )
+
+    tree_iterations = ap.read_optional_control(
+        control_variables,
+        "Computer Parameters",
+        "Number of Training Cycles for Random Forests",
+    )
+
+    tree_iterations = whole_number_or_auto(tree_iterations)
+
+    tree_depth = ap.read_optional_control(
+        control_variables,
+        "Computer Parameters",
+        "Depth of Random Forests Allowed",
+    )
+
+    tree_depth = whole_number_or_auto(tree_depth)
+
+    chunk_size = ap.read_optional_control(
+        control_variables, "Computer Parameters", "CSV Chunk Size"
+    )
+
+    if chunk_size is not None:
+        chunk_size = int(chunk_size)
+
+    output_format = ap.read_optional_control(
+        control_variables, "Synthetic File Parameters", "Output File Format"
+    )
+
+    row_group_size = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Parquet Row Group Size"
+    )
+
+    if row_group_size is not None:
+        row_group_size = int(row_group_size)
+
+    cache_directory = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Cache Directory"
+    )
+
+    cache_size_limit = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Cache Size Limit (MB)"
+    )
+
+    if cache_size_limit is not None:
+        cache_size_limit = int(cache_size_limit)
+
+    target_batch_rows = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Target Rows per Batch"
+    )
+
+    if target_batch_rows is not None:
+        target_batch_rows = int(target_batch_rows)
+
+    max_batch_groups = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Max Groups per Batch"
+    )
+
+    if max_batch_groups is not None:
+        max_batch_groups = int(max_batch_groups)
+
+    n_workers = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Number of Workers"
+    )
+
+    if n_workers is not None:
+        n_workers = int(n_workers)
+
+    random_seed = ap.read_optional_control(
+        control_variables, "Optional Parameters", "Random Seed"
+    )
+
+    if random_seed is not None:
+        random_seed = int(random_seed)
+
+    task_type = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Training Device"
+    )
+
+    early_stopping_rounds = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Early Stopping Rounds"
+    )
+
+    if early_stopping_rounds is not None:
+        early_stopping_rounds = int(early_stopping_rounds)
+
+    fit_workers = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Parallel Model Fits"
+    )
+
+    if fit_workers is not None:
+        fit_workers = int(fit_workers)
+
+    empirical_threshold = ap.read_optional_control(
+        control_variables,
+        "Computer Parameters",
+        "Empirical Sampling Below Rows",
+    )
+
+    if empirical_threshold is not None:
+        empirical_threshold = int(empirical_threshold)
+
+    weighted_training = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Weighted Training"
+    )
+
+    # A quoted True or False in the control file arrives as text
+    if str(weighted_training).lower() in ("true", "false"):
+        weighted_training = str(weighted_training).lower() == "true"
+
+    rare_class_threshold = ap.read_optional_control(
+        control_variables,
+        "Computer Parameters",
+        "Pool Target Classes Below Count",
+    )
+
+    if rare_class_threshold is not None:
+        rare_class_threshold = int(rare_class_threshold)
+
+    run_directory = ap.read_optional_control(
+        control_variables, "Computer Parameters", "Run Directory"
+    )
+
+    return {
+        "demographic_variables": demographic_variables,
+        "categorical_variables": categorical_variables,
+        "combination_cols": combination_cols,
+        "cutting_vars": cutting_vars,
+        "numeric_group_vars": numeric_group_vars,
+        "length_cuts": length_cuts,
+        "GPU_IDs": GPU_IDs,
+        "machine_learning_variables": ML_vars,
+        "size_of_synth_rows": size_of_synth_rows,
+        "name_of_output": name_of_output,
+        "group_size": group_size,
+        "synth_label_cols": synth_label_cols,
+        "synth_label_cols_stucture": synth_label_cols_stucture,
+        "remove_small_vals": remove_small_vals,
+        "date_columns": date_columns,
+        "chunk_size": chunk_size,
+        "input_format": input_format,
+        "output_format": output_format,
+        "row_group_size": row_group_size,
+        "cache_directory": cache_directory,
+        "cache_size_limit": cache_size_limit,
+        "target_batch_rows": target_batch_rows,
+        "max_batch_groups": max_batch_groups,
+        "n_workers": n_workers,
+        "random_seed": random_seed,
+        "task_type": task_type,
+        "tree_iterations": tree_iterations,
+        "tree_depth": tree_depth,
+        "early_stopping_rounds": early_stopping_rounds,
+        "fit_workers": fit_workers,
+        "empirical_threshold": empirical_threshold,
+        "weighted_training": weighted_training,
+        "rare_class_threshold": rare_class_threshold,
+        "hierarchical_labels": hierarchical_labels,
+        "branch_min_rows": branch_min_rows,
+        "run_directory": run_directory,
+    }
+
+
+def validate_control(arguments, column_names):
+
+    """ Checks the arguments made by control_arguments() against the columns
+            of the input file before any data is loaded.
+
+    Parameters
+    ----------
+    arguments: dict
+        Made by control_arguments().
+
+    column_names: list
+        The columns of the input file.
+
+
+    Returns
+    -------
+    None. A ValueError lists every problem found.
+    """
+
+    problems = []
+
+    column_settings = [
+        ("Demographic Columns", "demographic_variables"),
+        ("Machine Learning Columns", "machine_learning_variables"),
+        ("Combination Columns", "combination_cols"),
+        ("Columns to be Cut Down in Length", "cutting_vars"),
+        ("Numeric Grouping Columns", "numeric_group_vars"),
+        ("Synthetic Label Columns", "synth_label_cols"),
+        ("Date Columns", "date_columns"),
     ]
 
-    tree_depth = control_variables["Computer Parameters"][
-        "Depth of Random Forests Allowed"
+    for name, argument in column_settings:
+        missing = [
+            str(x)
+            for x in arguments[argument] or []
+            if x not in column_names
+        ]
+
+        if len(missing) > 0:
+            problems.append(
+                name + " not in the input file: " + ", ".join(missing)
+            )
+
+    if len(arguments["cutting_vars"] or []) != len(
+        arguments["length_cuts"] or []
+    ):
+        problems.append(
+            "Length of Cuts needs one value per Column to be Cut Down"
+        )
+
+    if len(arguments["synth_label_cols"]) != len(
+        arguments["synth_label_cols_stucture"]
+    ):
+        problems.append(
+            "Synthetic Label Structure needs one value per Synthetic Label"
+            + " Column"
+        )
+
+    if arguments["size_of_synth_rows"] < 1:
+        problems.append("Number of Rows must be at least 1")
+
+    if arguments["task_type"] is not None and (
+        str(arguments["task_type"]).lower() not in TRAINING_DEVICES
+    ):
+        problems.append(
+            "Training Device must be auto, CPU or GPU, not: "
+            + str(arguments["task_type"])
+        )
+
+    if arguments["output_format"] is not None and (
+        str(arguments["output_format"]).lower().strip(".")
+        not in OUTPUT_FORMATS
+    ):
+        problems.append(
+            "Output File Format must be csv or parquet, not: "
+            + str(arguments["output_format"])
+        )
+
+    weighted_training = arguments["weighted_training"]
+
+    if not (
+        weighted_training is None
+        or isinstance(weighted_training, bool)
+        or str(weighted_training).lower() == "auto"
+    ):
+        problems.append(
+            "Weighted Training must be True, False or auto, not: "
+            + str(weighted_training)
+        )
+
+    tree_settings = [
+        ("Number of Training Cycles for Random Forests", "tree_iterations"),
+        ("Depth of Random Forests Allowed", "tree_depth"),
     ]
 
-    Synth_Control_Function(
-        demographic_variables=demographic_variables,
-        categorical_variables=categorical_variables,
-        combination_cols=combination_cols,
-        cutting_vars=cutting_vars,
-        numeric_group_vars=numeric_group_vars,
-        length_cuts=length_cuts,
-        GPU_IDs=GPU_IDs,
-        machine_learning_variables=ML_vars,
-        size_of_synth_rows=size_of_synth_rows,
-        name_of_output=name_of_output,
-        group_size=group_size,
-        synth_label_cols=synth_label_cols,
-        synth_label_cols_stucture=synth_label_cols_stucture,
-        remove_small_vals=remove_small_vals,
-        date_columns=date_columns,
-        file_path=file_path,
-    )
+    for name, argument in tree_settings:
+        value = arguments[argument]
+
+        if value is None or str(value).lower() == "auto":
+            continue
+
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            problems.append(
+                name
+                + " must be a whole number of 1 or more, or auto, not: "
+                + str(value)
+            )
+
+        elif argument == "tree_depth" and value > MAX_TREE_DEPTH:
+            problems.append(
+                name
+                + " can be at most "
+                + str(MAX_TREE_DEPTH)
+                + ", not: "
+                + str(value)
+            )
+
+    if (
+        arguments["run_directory"] is not None
+        and arguments["random_seed"] is None
+    ):
+        problems.append(
+            "Run Directory needs a Random Seed, as the seed is not saved"
+            + " with the run"
+        )
+
+    if len(problems) > 0:
+        raise ValueError(
+            "The control file has problems:\n  " + "\n  ".join(problems)
+        )
+
+
+def synthesis_activation(argv=None):
+
+    # "synthesise --resume" carries on a stopped run from its Run Directory
+    if argv is None:
+        argv = sys.argv[1:]
+
+    resume = "--resume" in argv
+
+    # Loaded here so parsing a control file doesn't wait on the machine
+    # test, the file picker or the machine learning libraries
+    from SDS.src.front_interface.Test_Script import testing
+
+    from SDS.src.back_end.Control_Function import Synth_Control_Function
+
+    file_path = testing()
+
+    column_names = ap.read_col_names(file_path)
+
+    control_variables = ap.create_control_file(column_headers=column_names)
+
+    arguments = control_arguments(control_variables, column_names)
+
+    validate_control(arguments, column_names)
+
+    if resume and arguments["run_directory"] is None:
+        raise ValueError("--resume needs a Run Directory in the control file")
+
+    Synth_Control_Function(file_path=file_path, resume=resume, **arguments)
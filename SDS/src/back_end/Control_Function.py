@@ -1,36 +1,33 @@
 ### Standard Libraries
-import pandas as pd
-import pdb
 import time
 import sys
 
 ### General Modules
-from SDS.src.back_end.General_Utility.Label_Convertor import (
-    invertor_cat_col_convertor,
+from SDS.src.back_end.General_Utility.File_Output import (
+    Batch_File_Writer,
+    output_file_name,
 )
 
-from SDS.src.back_end.General_Utility.General_Utilities import reverse_NaN
-
 from SDS.src.front_interface.terminalsize import get_terminal_size
 
 ### Control Method Modules
 from SDS.src.back_end.Looping_Control_Methods.Synthesis_Loop_vars import (
-    prep_synth_loop,
+    cached_prep_synth_loop,
+    synthesis_batches,
     synthesis_loop_system,
 )
 
-### Date Reversal Modules
-from SDS.src.simple_date_interface.\
-    Reverse_Date_Processing.Reverse_Date_Transforms import (
-    reverse_split_out_date,
-    nan_test,
-    return_date_nan,
+from SDS.src.back_end.Original_Data_Out.Original_Data_Out import (
+    filtered_data_export,
 )
 
-from SDS.src.back_end.Original_Data_Out.Original_Data_Out import (
-    original_data_process,
+### Tree Based Synthesis Methods
+from SDS.src.back_end.Machine_Learning_Synthesis.Hierarchical_Synthesis import (
+    label_prefix_columns,
 )
 
+from SDS.src.back_end.Tree_Methods.Tree_Functions_debug import training_device
+
 
 ### General Information
 """
@@ -61,6 +58,29 @@ def Synth_Control_Function(
     synth_label_cols=None,
     synth_label_cols_stucture=None,
     date_columns=None,
+    chunk_size=None,
+    input_format=None,
+    output_format=None,
+    row_group_size=None,
+    cache_directory=None,
+    cache_size_limit=None,
+    target_batch_rows=None,
+    max_batch_groups=None,
+    n_workers=None,
+    random_seed=None,
+    task_type=None,
+    tree_iterations=None,
+    tree_depth=None,
+    early_stopping_rounds=None,
+    fit_workers=None,
+    empirical_threshold=None,
+    weighted_training=None,
+    rare_class_threshold=None,
+    hierarchical_labels=False,
+    branch_min_rows=None,
+    run_directory=None,
+    resume=False,
+    interactive=True,
 ):
 
     """Controls all the synthesis activity from user input.
@@ -152,12 +172,116 @@ def Synth_Control_Function(
         A list of columns specified by the user that are to be processed using
         the date handling methods
 
+    chunk_size: integer, optional
+        If set, the input file is read in chunks of this many rows using a
+        compact inferred schema, which lowers the memory needed to load it.
+
+    input_format: string, optional
+        Either "csv" or "parquet". By default this is taken from the
+        extension of file_path.
+
+    output_format: string, optional
+        Either "csv" (default) or "parquet". Controls the format of both the
+        synthetic file and the filtered real data file.
+
+    row_group_size: integer, optional
+        The number of rows in each row group of Parquet output files.
+
+    cache_directory: string, optional
+        If set, the pre-processed data is saved in this folder, keyed by the
+        contents of the input file and the pre-processing settings. Reruns
+        with the same file and settings skip straight to synthesis. Trained
+        tree models are saved here too, keyed by their training data and
+        settings, and reused rather than trained again.
+
+    cache_size_limit: integer, optional
+        The largest size of the cache folder in megabytes (default = 10000).
+
+    target_batch_rows: integer, optional
+        If set, groups are packed into batches of about this many rows
+        rather than batches of group_size groups, so each batch costs about
+        the same to synthesise.
+
+    max_batch_groups: integer, optional
+        The most groups allowed in one batch when target_batch_rows is set.
+
+    n_workers: integer, optional
+        If above 1, this many batches are synthesised at the same time in
+        seperate processes, with the CPU cores shared out between them.
+
+    random_seed: integer, optional
+        If set, the run can be repeated exactly with the same seed, whatever
+        the number of workers. Keep it secret as it repeats the noise too.
+
+    task_type: string, optional
+        "CPU", "GPU" or "auto" (default). With "auto" the tree models are
+        trained on the GPU if a CUDA device is found, otherwise on the CPU.
+
+    tree_iterations: integer or "auto", optional
+        The number of iterations of each tree model (default = 400). With
+        "auto" it grows with the rows of the group and classes of the target.
+
+    tree_depth: integer or "auto", optional
+        The depth of each tree model (default = 11 on GPU and 6 on CPU). With
+        "auto" it grows with the rows of the group.
+
+    early_stopping_rounds: integer, optional
+        Each tree model stops training once its eval data has not improved
+        for this many iterations, keeping the best one (default = 40). 0
+        turns early stopping off.
+
+    fit_workers: integer, optional
+        If above 1, the tree models of up to this many columns of a batch are
+        trained at the same time, as training only needs the real data. The
+        predictions are still made column by column in order.
+
+    empirical_threshold: integer, optional
+        Batches with fewer real rows than this skip the tree models. Each
+        column is sampled from the real rows with the same values of the
+        columns before it, dropping columns from the end if there are none.
+
+    weighted_training: boolean or "auto", optional
+        Train each tree model on the unique rows of its data, weighted by
+        how often they appear. "auto" (default) does this when there are at
+        least twice as many rows as unique rows.
+
+    rare_class_threshold: integer, optional
+        Classes of a machine learning column with fewer real rows than this
+        in a batch are trained on as one class. Rows predicted as that class
+        are given one of the rare classes by sampling the real data.
+
+    hierarchical_labels: boolean, optional
+        If True, a machine learning column with a synthetic label is
+        synthesised within each value of its label (its prefix), by a small
+        model that only has the codes of that prefix (default = False).
+
+    branch_min_rows: integer, optional
+        With hierarchical_labels, a prefix with fewer real rows than this
+        is sampled from the real data rather than given its own model
+        (default = 100).
+
+    run_directory: string, optional
+        If set, each finished batch is saved in this folder with a manifest
+        of the finished batches. random_seed must be set, and given again to
+        resume, as it is not saved with the output.
+
+    resume: boolean, optional
+        If True, the batches already finished in run_directory are loaded
+        rather than synthesised again, so a stopped run carries on where it
+        left off. The output is the same as if it had never stopped
+        (default = False).
+
+    interactive: boolean, optional
+        If False, synthesis starts without asking whether the variables are
+        right, for runs with no one at the terminal (default = True).
+
 
     Returns
     -------
-    final_out: dataframe, .csv file
-        This is the final output that is a large synthetic dataframe stored in
-        both memory and also as a .csv file, name specified by user.
+    final_out: .csv or Parquet file
+        This is the final output, a large synthetic dataset saved as a file
+        with the name specified by user. It is written batch by batch so it
+        is never held in memory all at once.
     """
 
     ### Obtain width of terminal for printing
@@ -224,7 +348,7 @@ def Synth_Control_Function(
         print("\n")
 
     ### Get user input to continue
-    answer = None
+    answer = None if interactive else "Yes"
 
     while answer not in ("Yes", "No"):
 
@@ -266,12 +390,11 @@ def Synth_Control_Function(
     # Saving real file special vars
     reverse_categorical_variables = categorical_variables
 
-    rev_demographic_variables = demographic_variables
-
     """ Data load and process """
     (
         real_data_frame,
         groups_list,
+        group_index,
         information_dictionary,
         threshold_hit,
         m_values_list,
@@ -281,7 +404,10 @@ def Synth_Control_Function(
         m_values_list,
         processed_date_columns_reverse,
         machine_learning_variables,
-    ) = prep_synth_loop(
+        preprocessed_data,
+    ) = cached_prep_synth_loop(
+        cache_directory=cache_directory,
+        cache_size_limit=cache_size_limit,
         categorical_variables=categorical_variables,
         combination_cols=combination_cols,
         demographic_variables=demographic_variables,
@@ -297,17 +423,17 @@ def Synth_Control_Function(
         date_columns=date_columns,
         file_path=file_path,
         machine_learning_variables=machine_learning_variables,
+        chunk_size=chunk_size,
+        file_format=input_format,
     )
 
     """ Reversal for real data out """
 
     if remove_small_vals != 0:
         # Create name of filtered data
-        name_of_output = str(name_of_output).replace("[", "")
-        name_of_output = str(name_of_output).replace("]", "")
-        name_of_output = str(name_of_output).replace("'", "")
-
-        name_of_output_original = "Real_Filt_" + str(name_of_output) + ".csv"
+        name_of_output_original = output_file_name(
+            name_of_output, output_format, prefix="Real_Filt_"
+        )
 
         print("\n")
         message = "Saving original filtered data file as: "
@@ -316,19 +442,18 @@ def Synth_Control_Function(
         print(name_of_output_original)
         print("\n")
 
-        original_data_process(
-            file_path=file_path,
+        filtered_data_export(
+            preprocessed_data=preprocessed_data,
             name_of_output_original=name_of_output_original,
             categorical_variables=reverse_categorical_variables,
-            combination_cols=combination_cols,
-            demographic_variables=rev_demographic_variables,
-            cutting_vars=cutting_vars,
-            numeric_group_vars=numeric_group_vars,
-            length_cuts=length_cuts,
-            remove_small_vals=remove_small_vals,
             date_columns=date_columns,
+            output_format=output_format,
+            row_group_size=row_group_size,
         )
 
+    # The filtered data is no longer needed
+    del preprocessed_data
+
     ### Timing Data pre-processing
     stage_1_end = time.time()
     stage_1_time = str(round(stage_1_end - start, 3))
@@ -348,122 +473,107 @@ def Synth_Control_Function(
     print(" " * int(size_x / 2) + cur_message)
     print("=" * int(size_x))
 
-    """ Main Processing Script """
-    (
-        main_list,
-        removal_columns,
-        original_data_list,
-        processed_date_columns_reverse,
-    ) = synthesis_loop_system(
-        real_data_frame=real_data_frame,
-        groups_list=groups_list,
-        group_size=group_size,
-        GPU_IDs=GPU_IDs,
-        demographic_variables=demographic_variables,
-        size_of_synth_rows=size_of_synth_rows,
-        machine_learning_variables=machine_learning_variables,
-        categorical_variables=categorical_variables,
-        threshold_hit=threshold_hit,
-        information_dictionary=information_dictionary,
-        numeric_group_vars=numeric_group_vars,
-        mapping_dict=mapping_dict,
-        processed_date_columns_reverse=processed_date_columns_reverse,
-    )
+    # Synthesise prefix structured columns in two stages
+    if hierarchical_labels:
+        label_prefixes = label_prefix_columns(
+            synth_label_cols, machine_learning_variables
+        )
 
-    print("=" * int(size_x) + "\n")
+        print("\n")
+        print(
+            "Synthesising within prefixes for: "
+            + ", ".join(label_prefixes.keys())
+        )
 
-    """ Final Output as CSV """
-    print("\n")
-    cur_message = " Synthesis Complete: Post Processing "
-    print("\n" + "=" * int(size_x))
-    print(" " * int(size_x / 2) + cur_message)
-    print("=" * int(size_x) + "\n")
+    else:
+        label_prefixes = None
+
+    # Pick the training device once for every model
+    task_type = training_device(task_type, GPU_IDs)
 
-    """ Synthetic Data - Full Dataframe"""
-    print("\n")
-    message = "Now performing the following actions:"
-    print(message)
-    print("-" * len(message))
     print("\n")
+    print("Tree models will be trained on: " + task_type)
 
     # Information
-    print("Converting synthetic data into one dataframe")
-
-    # Get Column names
-    final_out = pd.DataFrame(columns=list(main_list[0]))
-
-    for i in range(0, len(main_list), 1):
-        final_out = final_out.append(main_list[i])
-
-    """ Original Real Data - Full Dataframe"""
-    # Get Column names
-    original_data_out = pd.DataFrame(columns=list(original_data_list[0]))
-
-    for i in range(0, len(original_data_list), 1):
-        original_data_out = original_data_out.append(original_data_list[i])
-
-    """ Label Conversion """
-    # More information
+    name_of_output_synth = output_file_name(name_of_output, output_format)
 
     print("\n")
-    print("Decoding Label Encoder Variables")
+    message = "Saving synthetic data file as: " + str(name_of_output_synth)
+    print(message)
+    print("-" * len(message))
+    print("Each batch is decoded and saved as soon as it is finished")
     print("\n")
 
-    ### Get rid of synthetic labels
-    categorical_variables = [
-        x for x in categorical_variables if x not in removal_columns
-    ]
-
-    categorical_variables = [
-        x for x in categorical_variables if x not in numeric_group_vars
-    ]
-
-    """ Synthetic Data"""
-    final_out = invertor_cat_col_convertor(
-        final_out, mapping_dict, categorical_variables
-    )
-
-    """ Original Real Data"""
-    original_data_out = invertor_cat_col_convertor(
-        original_data_out, mapping_dict, categorical_variables
-    )
-
-    """ Saving out as CSV files """
-    ### Dealing with m_values_list
-    final_out = reverse_NaN(final_out, m_values_list, removal_columns)
-
-    original_data_out = reverse_NaN(
-        original_data_out, m_values_list, removal_columns
-    )
-
-    """ Date Reversal """
-
-    if date_columns is []:
-
-        final_out = reverse_split_out_date(
-            final_out, processed_date_columns_reverse
+    """ Main Processing Script """
+    with Batch_File_Writer(
+        name_of_output_synth,
+        file_format=output_format,
+        row_group_size=row_group_size,
+    ) as batch_writer:
+
+        (
+            main_list,
+            removal_columns,
+            original_data_list,
+            processed_date_columns_reverse,
+        ) = synthesis_loop_system(
+            real_data_frame=real_data_frame,
+            groups_list=groups_list,
+            group_size=group_size,
+            GPU_IDs=GPU_IDs,
+            demographic_variables=demographic_variables,
+            size_of_synth_rows=size_of_synth_rows,
+            machine_learning_variables=machine_learning_variables,
+            categorical_variables=categorical_variables,
+            threshold_hit=threshold_hit,
+            information_dictionary=information_dictionary,
+            numeric_group_vars=numeric_group_vars,
+            mapping_dict=mapping_dict,
+            processed_date_columns_reverse=processed_date_columns_reverse,
+            batch_writer=batch_writer,
+            m_values_list=m_values_list,
+            date_columns=date_columns,
+            group_index=group_index,
+            target_batch_rows=target_batch_rows,
+            max_batch_groups=max_batch_groups,
+            n_workers=n_workers,
+            random_seed=random_seed,
+            task_type=task_type,
+            tree_iterations=tree_iterations,
+            tree_depth=tree_depth,
+            early_stopping_rounds=early_stopping_rounds,
+            fit_workers=fit_workers,
+            empirical_threshold=empirical_threshold,
+            weighted_training=weighted_training,
+            rare_class_threshold=rare_class_threshold,
+            label_prefixes=label_prefixes,
+            branch_min_rows=branch_min_rows,
+            cache_directory=cache_directory,
+            cache_size_limit=cache_size_limit,
+            run_directory=run_directory,
+            resume=resume,
         )
 
-        final_out = return_date_nan(final_out, date_columns)
-
-    # Information
-    name_of_output = str(name_of_output).replace("[", "")
-
-    name_of_output = str(name_of_output).replace("]", "")
-
-    name_of_output = str(name_of_output).replace("'", "")
+    print("=" * int(size_x) + "\n")
 
-    name_of_output_synth = str(name_of_output) + ".csv"
+    """ Synthesis Complete """
+    print("\n")
+    cur_message = " Synthesis Complete "
+    print("\n" + "=" * int(size_x))
+    print(" " * int(size_x / 2) + cur_message)
+    print("=" * int(size_x) + "\n")
 
     print("\n")
-    message = "Saving synthetic data file as: " + str(name_of_output_synth)
+    message = (
+        "Saved "
+        + str(batch_writer.rows_written)
+        + " synthetic rows to: "
+        + str(name_of_output_synth)
+    )
     print(message)
     print("-" * len(message))
     print("\n")
 
-    # Saving synthetic file
-    final_out.to_csv(name_of_output_synth, index=False)
-
     # Information
     end = time.time()
     time_final = round(((end - start) / 60), 3)
@@ -500,3 +610,199 @@ def Synth_Control_Function(
     )
 
     print("=" * int(size_x) + "\n")
+
+
+def Synth_Stream_Function(
+    demographic_variables,
+    machine_learning_variables,
+    categorical_variables,
+    size_of_synth_rows,
+    combination_cols,
+    GPU_IDs,
+    file_path,
+    # Optional vars in here
+    cutting_vars=None,
+    length_cuts=None,
+    numeric_group_vars=None,
+    group_size=None,
+    remove_small_vals=None,
+    number_gaussian=None,
+    GMM_cutoff=None,
+    synth_label_cols=None,
+    synth_label_cols_stucture=None,
+    date_columns=None,
+    chunk_size=None,
+    input_format=None,
+    cache_directory=None,
+    cache_size_limit=None,
+    target_batch_rows=None,
+    max_batch_groups=None,
+    n_workers=None,
+    random_seed=None,
+    task_type=None,
+    tree_iterations=None,
+    tree_depth=None,
+    early_stopping_rounds=None,
+    fit_workers=None,
+    empirical_threshold=None,
+    weighted_training=None,
+    rare_class_threshold=None,
+    hierarchical_labels=False,
+    branch_min_rows=None,
+    run_directory=None,
+    resume=False,
+    chunk_rows=None,
+):
+
+    """Synthesises data like Synth_Control_Function() but yields it rather
+            than saving it, so it can be piped into other systems.
+
+    Each Combi batch is decoded back into the values of the original file
+    (with missing values restored) and yielded as soon as it is finished.
+    The next batch is only synthesised once the last one has been taken, so
+    memory is bounded by a batch (or the batches of the n_workers window) and
+    a slow consumer slows the synthesis down rather than filling memory.
+    There is no prompt and no filtered real data file.
+
+    Parameters
+    ----------
+    The parameters are those of Synth_Control_Function(), without
+    name_of_output, output_format and row_group_size, plus:
+
+    chunk_rows: integer, optional
+        If set, batches with more rows than this are yielded in chunks of at
+        most this many rows.
+
+
+    Returns
+    -------
+    A generator of pd.DataFrames of synthetic data, in batch order. Stopping
+    early stops the synthesis.
+
+
+    Example
+    -------
+    for synthetic_chunk in Synth_Stream_Function(...):
+        send_somewhere(synthetic_chunk)
+    """
+
+    if numeric_group_vars is None:
+        numeric_group_vars = []
+
+    if group_size is None:
+        group_size = 10
+
+    if remove_small_vals is None:
+        remove_small_vals = 10
+
+    if number_gaussian is None:
+        number_gaussian = 10
+
+    if GMM_cutoff is None:
+        GMM_cutoff = 20
+
+    if chunk_rows is not None and chunk_rows < 1:
+        raise ValueError("chunk_rows must be at least 1")
+
+    """ Data load and process """
+    (
+        real_data_frame,
+        groups_list,
+        group_index,
+        information_dictionary,
+        threshold_hit,
+        m_values_list,
+        demographic_variables,
+        categorical_variables,
+        mapping_dict,
+        m_values_list,
+        processed_date_columns_reverse,
+        machine_learning_variables,
+        preprocessed_data,
+    ) = cached_prep_synth_loop(
+        cache_directory=cache_directory,
+        cache_size_limit=cache_size_limit,
+        categorical_variables=categorical_variables,
+        combination_cols=combination_cols,
+        demographic_variables=demographic_variables,
+        cutting_vars=cutting_vars,
+        length_cuts=length_cuts,
+        GPU_IDs=GPU_IDs,
+        remove_small_vals=remove_small_vals,
+        numeric_group_vars=numeric_group_vars,
+        number_gaussian=number_gaussian,
+        GMM_cutoff=GMM_cutoff,
+        synth_label_cols=synth_label_cols,
+        synth_label_cols_stucture=synth_label_cols_stucture,
+        date_columns=date_columns,
+        file_path=file_path,
+        machine_learning_variables=machine_learning_variables,
+        chunk_size=chunk_size,
+        file_format=input_format,
+    )
+
+    del preprocessed_data
+
+    if hierarchical_labels:
+        label_prefixes = label_prefix_columns(
+            synth_label_cols, machine_learning_variables
+        )
+
+    else:
+        label_prefixes = None
+
+    """ Main Processing Script """
+    batches = synthesis_batches(
+        real_data_frame=real_data_frame,
+        groups_list=groups_list,
+        group_size=group_size,
+        GPU_IDs=GPU_IDs,
+        demographic_variables=demographic_variables,
+        size_of_synth_rows=size_of_synth_rows,
+        machine_learning_variables=machine_learning_variables,
+        categorical_variables=categorical_variables,
+        threshold_hit=threshold_hit,
+        information_dictionary=information_dictionary,
+        numeric_group_vars=numeric_group_vars,
+        mapping_dict=mapping_dict,
+        processed_date_columns_reverse=processed_date_columns_reverse,
+        decode=True,
+        m_values_list=m_values_list,
+        date_columns=date_columns,
+        group_index=group_index,
+        target_batch_rows=target_batch_rows,
+        max_batch_groups=max_batch_groups,
+        n_workers=n_workers,
+        random_seed=random_seed,
+        task_type=training_device(task_type, GPU_IDs),
+        tree_iterations=tree_iterations,
+        tree_depth=tree_depth,
+        early_stopping_rounds=early_stopping_rounds,
+        fit_workers=fit_workers,
+        empirical_threshold=empirical_threshold,
+        weighted_training=weighted_training,
+        rare_class_threshold=rare_class_threshold,
+        label_prefixes=label_prefixes,
+        branch_min_rows=branch_min_rows,
+        cache_directory=cache_directory,
+        cache_size_limit=cache_size_limit,
+        run_directory=run_directory,
+        resume=resume,
+    )
+
+    try:
+        for group_start, group_end, final_data_out, removal_columns in batches:
+
+            if chunk_rows is None or len(final_data_out) <= chunk_rows:
+                yield final_data_out
+
+                continue
+
+            for chunk_start in range(0, len(final_data_out), chunk_rows):
+                yield final_data_out.iloc[
+                    chunk_start : chunk_start + chunk_rows
+                ].reset_index(drop=True)
+
+    finally:
+        # Stops the workers and frees the shared data if stopped early
+        batches.close()
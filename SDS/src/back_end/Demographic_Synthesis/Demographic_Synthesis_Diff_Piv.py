@@ -3,9 +3,8 @@
 # Standard Libraries
 import numpy as np
 import pandas as pd
-import sklearn as sk
+import random
 import secrets
-import scipy
 
 """
 Please cite this system as:
@@ -14,6 +13,54 @@ Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
     [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
 """
 
+# Random source for the noise choices, None means CSPRNG
+_sampling_random = None
+
+
+def set_sampling_seed(seed=None):
+
+    """ Makes the noise choices of this file repeatable. The numpy sampling
+            must be seeded seperately with np.random.seed().
+
+    Parameters
+    ----------
+    seed: integer, optional
+        Seed for the noise choices. If None then a CSPRNG is used, which is
+        the default. Anyone with the seed can repeat the noise, so it must
+        be kept as secret as the real data.
+
+
+    Returns
+    -------
+    None.
+    """
+
+    global _sampling_random
+
+    if seed is None:
+        _sampling_random = None
+
+    else:
+        _sampling_random = random.Random(seed)
+
+
+def sampling_random():
+
+    """ Returns the random source for the noise choices.
+
+    Returns
+    -------
+    num: random.Random
+        A seeded generator if set_sampling_seed() was given a seed, otherwise
+        a CSPRNG.
+    """
+
+    if _sampling_random is None:
+        return secrets.SystemRandom()
+
+    return _sampling_random
+
+
 def coin_flip_noise_value(Lap_scale, Lap_loc, prob_vector):
 
     """ Generates the Laplacian noise to add to probability sample.
@@ -162,8 +209,8 @@ def secure_coin_toss(percent):
 
     high_coin_flip = [[0.75, 0.8], [0.8, 0.87], [0.8, 0.9], [0.85, 0.9]]
 
-    ### CSPRNG - to select a random range
-    num = secrets.SystemRandom()
+    ### CSPRNG (unless seeded) - to select a random range
+    num = sampling_random()
     secure_num = num.randrange(0, 4)
 
     ### Obtain a range
@@ -236,7 +283,7 @@ def diff_priv_alg(percent, initial_probs):
         ]
 
         ### Addition of noise
-        num = secrets.SystemRandom()
+        num = sampling_random()
         secure_num = num.randrange(0, 4)
 
         ### Obtain a range
@@ -259,96 +306,156 @@ def diff_priv_alg(percent, initial_probs):
         return noised_probs
 
 
-def prob_dataframe_gen_with_dp(
-    real_data, original_real_size, final_samp_size, col_tuples, percent
-):
+def probability_tables(real_data, col_tuples):
 
-    """ Creates the synthetic variables for the demographic columns.
+    """ Works out the probabilities the demographic columns are sampled
+            from. This is the only part that needs the real data.
 
     Parameters
     ----------
     real_data: pd.dataframe
          A subset of the original real data file to be worked on.
 
-    original_real_size: integer
-        The FULL size of your original dataset. You can do something like:
-        len(your_data_set_here).
-
-    final_samp_size: integer
-        How big the synthetic data file is. This is used to proprtionally
-        synthesise the synthetic file so if category_A is 10% in the real file
-        size (original_real_size) then it will be 10% of the final synthetic
-        file (final_samp_size).
-
     col_tuples: list, tuple
         Demograohic column pairs created by col_tuple_pair_gen function.
 
+
+    Returns
+    -------
+    tables: dict
+        "initial" holds the values and probabilities of the first column.
+        "conditional" holds a (df_col_1, df_col_2, probabilities) tuple for
+        each pair, where probabilities gives the values and probabilities of
+        df_col_2 for each value of df_col_1.
+    """
+
+    # Get initial Synth DF column name
+    initial_column_name = list(real_data)[0]
+
+    initial_probs = get_probability(real_data[initial_column_name])
+
+    tables = {
+        "initial_column": initial_column_name,
+        "initial": (initial_probs.index.to_numpy(), initial_probs.to_numpy()),
+        "conditional": [],
+    }
+
+    for df_col_1, df_col_2 in col_tuples:
+
+        pair_probs = {}
+
+        for i, group in real_data.groupby(df_col_1)[df_col_2]:
+            probs = get_probability(group)
+
+            pair_probs[i] = (probs.index.to_numpy(), probs.to_numpy())
+
+        tables["conditional"].append((df_col_1, df_col_2, pair_probs))
+
+    return tables
+
+
+def sample_from_tables(tables, sample_size, percent):
+
+    """ Samples synthetic demographic columns from probability_tables(),
+            adding noise to the probabilities each time.
+
+    Parameters
+    ----------
+    tables: dict
+        Made by probability_tables().
+
+    sample_size: integer
+        Number of synthetic rows.
+
     percent: float
-        Derived from main function, detects how far along index loop the
-        function is.
+        The size of the real data the tables came from as a percentage of
+        the whole real data. Controls the noise, see diff_priv_alg().
 
 
     Returns
     -------
     synth_df: pd.DataFrame
-        A dataframe that is proportional to the final synthetic dataset size.
+        The synthetic demographic columns.
     """
 
     # Stop Pandas annoying me about my bad coding.
     pd.options.mode.chained_assignment = None
 
-    """ Initialise main vars"""
-    # Get the proportional size
-    current_sample = len(real_data) / original_real_size
-
     # Initialise synthetic dataframe
     synth_df = pd.DataFrame()
 
-    # Get initial Synth DF column name
-    initial_column_name = list(real_data)[0]
-
-    ### Patching in Issue
-    initial_probs = get_probability(real_data[initial_column_name])
+    choices, initial_probs = tables["initial"]
 
     ### ADD IN HERE CSPRNG
     initial_probs = diff_priv_alg(percent, initial_probs)
 
     # Create initial Synth DF column
-    initial_vals = np.random.choice(
-        a=real_data[initial_column_name].unique(),
-        size=int(final_samp_size * current_sample),
-        p=initial_probs,
+    synth_df[tables["initial_column"]] = np.random.choice(
+        a=choices, size=sample_size, p=initial_probs
     )
 
-    synth_df[initial_column_name] = initial_vals
-
     """Main Loop - iterates over and creates conditional prob"""
-    for df_col_1, df_col_2 in col_tuples:
-
-        real_data_probs = real_data.groupby(df_col_1)[df_col_2].apply(
-            get_probability
-        )
+    for df_col_1, df_col_2, pair_probs in tables["conditional"]:
 
         synth_df[df_col_2] = None
 
         for i, group in synth_df.groupby(df_col_1):
 
-            # Calculate out raw probabilities
-            choices = list(pd.DataFrame(real_data_probs[i]).T)
-
-            probs = pd.DataFrame(real_data_probs[i]).T.values[0]
+            choices, probs = pair_probs[i]
 
             # Adding in effects of noise here
             probs = diff_priv_alg(percent, probs)
 
-            # Modify the
-            synth_series = np.random.choice(
+            synth_df.loc[group.index, df_col_2] = np.random.choice(
                 a=choices, p=probs, size=len(group)
             )
 
-            group[df_col_2] = synth_series
+    return synth_df
+
+
+def prob_dataframe_gen_with_dp(
+    real_data, original_real_size, final_samp_size, col_tuples, percent
+):
+
+    """ Creates the synthetic variables for the demographic columns.
+
+    Parameters
+    ----------
+    real_data: pd.dataframe
+         A subset of the original real data file to be worked on.
+
+    original_real_size: integer
+        The FULL size of your original dataset. You can do something like:
+        len(your_data_set_here).
+
+    final_samp_size: integer
+        How big the synthetic data file is. This is used to proprtionally
+        synthesise the synthetic file so if category_A is 10% in the real file
+        size (original_real_size) then it will be 10% of the final synthetic
+        file (final_samp_size).
+
+    col_tuples: list, tuple
+        Demograohic column pairs created by col_tuple_pair_gen function.
+
+    percent: float
+        Derived from main function, detects how far along index loop the
+        function is.
+
 
-            synth_df.iloc[group.index] = group
+    Returns
+    -------
+    synth_df: pd.DataFrame
+        A dataframe that is proportional to the final synthetic dataset size.
+    """
+
+    # Get the proportional size
+    current_sample = len(real_data) / original_real_size
+
+    tables = probability_tables(real_data, col_tuples)
+
+    synth_df = sample_from_tables(
+        tables, int(final_samp_size * current_sample), percent
+    )
 
     print("\n")
     print("Demographic Synthesis for this group")
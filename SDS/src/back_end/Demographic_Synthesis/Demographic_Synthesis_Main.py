@@ -3,11 +3,11 @@
 # Standard Libraries
 import numpy as np
 import pandas as pd
-import sklearn as sk
-import scipy
 
 from SDS.src.back_end.Demographic_Synthesis.Demographic_Synthesis_Diff_Piv import (
     prob_dataframe_gen_with_dp,
+    probability_tables,
+    sample_from_tables,
 )
 
 """
@@ -118,3 +118,64 @@ def Demographic_Synthesis(
         real_data_sub_df[col_var] = real_data_sub_df[col_var].astype(str)
 
     return probs_df
+
+
+def demographic_tables(real_dataframe, demo_vars):
+
+    """ Works out the probabilities of the demographic columns, so they can
+            be sampled later by demographic_sample() without the real data.
+
+    Parameters
+    ----------
+    real_dataframe: pd.DataFrame
+        Dataframe to be worked on.
+
+    demo_vars: list
+        The demographic variables, in the order they are sampled.
+
+
+    Returns
+    -------
+    tables: dict
+        See probability_tables().
+    """
+
+    return probability_tables(
+        real_dataframe[demo_vars], col_tuple_pair_gen(demo_vars)
+    )
+
+
+def demographic_sample(tables, demo_vars, sample_size, percent):
+
+    """ Samples the demographic columns from demographic_tables().
+
+    Parameters
+    ----------
+    tables: dict
+        Made by demographic_tables().
+
+    demo_vars: list
+        The demographic variables.
+
+    sample_size: integer
+        Number of synthetic rows.
+
+    percent: float
+        The percentage size of the real data the tables came from in relation
+        to the original data.
+
+
+    Returns
+    -------
+    probs_df: pd.DataFrame
+        The synthetic demographic columns.
+    """
+
+    probs_df = sample_from_tables(tables, sample_size, percent)
+
+    print("\n")
+    print("Demographic Synthesis for this group")
+    print("------------------------------------")
+    print("Completed")
+
+    return probs_df[demo_vars]
@@ -4,14 +4,12 @@
 # Standard Libraries
 import numpy as np
 import pandas as pd
-import sklearn as sk
-import scipy
 
 """
 This file is for setting up groups of similar records in the dataset for
-use by later methods. These functions create a 'Combi' column that
-combine important columns to make groups and then remove low count groups
-and/or records iteratively.
+use by later methods. These functions create an integer 'Combi' column
+that combines important columns to make groups and then remove low count
+groups and/or records iteratively.
 """
 
 """
@@ -22,9 +20,104 @@ Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
 """
 
 
+def low_count_fixpoint(code_arrays, threshold):
+
+    """ Finds the rows left once every value with a count less than or equal
+            to threshold has been removed, over and over until nothing
+            changes.
+
+    Only the counts of values in rows that are removed are updated, so a
+    pass costs the number of rows removed rather than the size of the data.
+
+    Parameters
+    ----------
+    code_arrays: list
+        One np.array of integer codes per column. Codes start at 0 and -1 is
+        a missing value, which is never counted or removed.
+
+    threshold: integer
+       Specifices counts of values below or equal to it are removed.
+
+
+    Returns
+    -------
+    keep: np.array
+        Boolean mask of the rows that are left.
+
+    passes: integer
+        How many passes it took to reach the point where nothing changes.
+
+    rows_removed: integer
+        The number of rows removed.
+    """
+
+    number_rows = len(code_arrays[0]) if len(code_arrays) > 0 else 0
+
+    keep = np.ones(number_rows, dtype=bool)
+
+    # Counts and an inverse index (rows of each value) for each column
+    columns = []
+
+    for codes in code_arrays:
+        codes = np.asarray(codes, dtype=np.int64) + 1
+        counts = np.bincount(codes, minlength=1)
+
+        row_order = np.argsort(codes, kind="stable")
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+
+        # Slot 0 is missing values
+        counts[0] = 0
+
+        columns.append((codes, counts, row_order, offsets))
+
+    passes = 0
+
+    while True:
+
+        remove_parts = []
+
+        for codes, counts, row_order, offsets in columns:
+            low_values = np.flatnonzero((counts > 0) & (counts <= threshold))
+
+            if len(low_values) == 0:
+                continue
+
+            # Gather the rows of each low value from the inverse index
+            starts = offsets[low_values]
+            lengths = offsets[low_values + 1] - starts
+            range_starts = np.repeat(
+                starts - np.cumsum(lengths) + lengths, lengths
+            )
+
+            remove_parts.append(
+                row_order[range_starts + np.arange(lengths.sum())]
+            )
+
+        if len(remove_parts) == 0:
+            break
+
+        remove_rows = np.unique(np.concatenate(remove_parts))
+        remove_rows = remove_rows[keep[remove_rows]]
+
+        passes += 1
+
+        keep[remove_rows] = False
+
+        # Take the removed rows off every column's counts
+        for codes, counts, row_order, offsets in columns:
+            counts -= np.bincount(codes[remove_rows], minlength=len(counts))
+            counts[0] = 0
+
+    rows_removed = int(number_rows - keep.sum())
+
+    return (keep, passes, rows_removed)
+
+
 def separate_low_counts(data, threshold, print_statement):
 
-    """ Iterates over dataframe multiple times to remove low count values.
+    """ Removes low count values until every value in every column has a
+            count above threshold.
 
     Parameters
     ----------
@@ -34,6 +127,9 @@ def separate_low_counts(data, threshold, print_statement):
     threshold: integer
        Specifices counts of values below or equal to it are removed.
 
+    print_statement: boolean
+        Prints how many passes it took and how many rows were removed.
+
 
     Returns
     -------
@@ -41,29 +137,28 @@ def separate_low_counts(data, threshold, print_statement):
         Pandas dataframe that has no counts less than the threshold.
     """
 
-    # take a copy of the data
-    output_df = data.copy()
-    cols = data.columns.values
-
-    while True:
+    # Integer codes of every column
+    code_arrays = [
+        pd.factorize(data[col])[0] for col in data.columns.values
+    ]
 
-        iter_shape_list = []
+    keep, passes, rows_removed = low_count_fixpoint(code_arrays, threshold)
 
-        for col in cols:
-            counts = output_df[col].value_counts()
-            countsU = counts[counts <= threshold].index.values
-            output_df.drop(
-                output_df[output_df.loc[:, col].isin(countsU)].index,
-                inplace=True,
-            )
+    if print_statement == True:
+        print(
+            "Removed "
+            + str(rows_removed)
+            + " rows in "
+            + str(passes)
+            + " passes, "
+            + str(int(keep.sum()))
+            + " rows left"
+        )
 
-            iter_shape_list.append(output_df.shape)
-
-            if print_statement == True:
-                print(iter_shape_list)
+    # take a copy of the data
+    output_df = data[keep].copy()
 
-        if iter_shape_list[0] == iter_shape_list[-1]:
-            return output_df
+    return output_df
 
 
 def create_filtered_index(
@@ -94,7 +189,13 @@ def create_filtered_index(
 
 
         process_list: list
-            A list of Combi column values to be ordered later in process.
+            A list of Combi column values left after filtering, largest
+            group first.
+
+        group_index: dict
+            Offsets of each group's rows in output_df, which is sorted by
+            group, and the lookup table of each Combi value. See
+            create_group_index().
     """
 
     # Output information
@@ -105,23 +206,11 @@ def create_filtered_index(
     # Take a copy of the data
     output_df = dataframe.copy()
 
-    # Create the main link col as 1st value in index_cols
-    link_col = index_cols[0]
-
-    # Remove link_col form index_cols
-    index_cols.pop(0)
-
-    # Create a Combi column for filtering
-    output_df["Combi"] = output_df[link_col].str.cat(output_df[index_cols])
-
-    # Double check in STRING format!
-    output_df["Combi"] = output_df["Combi"].astype(str)
-
-    # Get a list of groups of combinations
-    index_values = pd.DataFrame(output_df.Combi.value_counts())
+    # Work on a copy so the caller's list is not changed
+    index_cols = list(index_cols)
 
-    # Reset index to get values
-    index_values = index_values.reset_index()
+    # Create an integer Combi column for filtering
+    output_df["Combi"], combi_lookup = combination_codes(output_df, index_cols)
 
     # Filters out low count values
     print("Separating low count values: ")
@@ -133,7 +222,236 @@ def create_filtered_index(
     print("\n")
     print("Creating index of values")
 
-    process_list = list(index_values["index"])
+    # Sort by group once so each group is a contiguous block of rows
+    output_df, group_index = create_group_index(
+        output_df, lookup=combi_lookup
+    )
+
+    process_list = group_index["groups"]
 
     # Return out values
-    return (output_df, process_list)
+    return (output_df, process_list, group_index)
+
+
+def combination_codes(dataframe, index_cols):
+
+    """ Gives each combination of values in index_cols a dense integer id.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Dataframe to be worked on.
+
+    index_cols: list
+        The columns that make up a combination.
+
+
+    Returns
+    -------
+    combi: np.array
+        The id of each row's combination, numbered 0 to n - 1 in order of
+        first appearance.
+
+    combi_lookup: pd.DataFrame
+        The values of index_cols for each id, indexed by id.
+    """
+
+    combi = np.zeros(len(dataframe), dtype=np.int64)
+
+    for column in index_cols:
+        column_codes, column_uniques = pd.factorize(dataframe[column])
+
+        # Mixed radix step, then made dense again so it can't overflow
+        combi = combi * max(len(column_uniques), 1) + column_codes
+        combi, combi_uniques = pd.factorize(combi)
+
+    # First row of each id, in id order
+    first_rows = np.unique(combi, return_index=True)[1]
+
+    combi_lookup = dataframe[index_cols].iloc[first_rows]
+    combi_lookup.index = pd.RangeIndex(len(first_rows), name="Combi")
+
+    # Smallest integer type that fits
+    combi = pd.to_numeric(combi, downcast="integer")
+
+    return (combi, combi_lookup)
+
+
+def create_group_index(dataframe, groups_list=None, lookup=None):
+
+    """ Sorts the dataframe by 'Combi' and creates an offsets index so that
+            any run of groups is one contiguous block of rows.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Dataframe with a 'Combi' column.
+
+    groups_list: list, optional
+        The order of the groups. By default groups are ordered largest
+        first, as in Combi.value_counts(). Groups with no rows are kept with
+        an empty range.
+
+    lookup: pd.DataFrame, optional
+        The lookup table from combination_codes(), kept in group_index.
+
+
+    Returns
+    -------
+    output_df: pd.DataFrame
+        The dataframe sorted into the order of groups_list. The original
+        index values are kept.
+
+    group_index: dict
+        "groups": the list of groups in order.
+        "offsets": np.array of length len(groups) + 1. The rows of group i
+        are output_df.iloc[offsets[i]:offsets[i + 1]].
+        "lookup": the lookup table, if given.
+    """
+
+    if groups_list is None:
+        groups_list = dataframe["Combi"].value_counts().index.tolist()
+
+    combi = dataframe["Combi"].to_numpy()
+
+    # Position of each row's group in groups_list
+    if np.issubdtype(combi.dtype, np.integer) and len(combi) > 0:
+        group_array = np.asarray(groups_list, dtype=np.int64)
+
+        size = max(int(combi.max()), int(group_array.max(initial=0))) + 1
+
+        position = np.full(size, -1, dtype=np.int64)
+        position[group_array] = np.arange(len(group_array))
+
+        group_codes = position[combi]
+
+    else:
+        group_codes = pd.Categorical(combi, categories=groups_list).codes
+
+    # Stable sort keeps the original row order within a group
+    order = np.argsort(group_codes, kind="stable")
+
+    output_df = dataframe.iloc[order]
+
+    # Rows not in groups_list (code -1) are dropped
+    group_counts = np.bincount(
+        group_codes[group_codes >= 0], minlength=len(groups_list)
+    )
+
+    offsets = np.zeros(len(groups_list) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(group_counts)
+
+    output_df = output_df.iloc[len(output_df) - offsets[-1]:]
+
+    group_index = {
+        "groups": list(groups_list),
+        "offsets": offsets,
+        "lookup": lookup,
+    }
+
+    return (output_df, group_index)
+
+
+def group_slice(dataframe, group_index, group_start, group_end):
+
+    """ Returns the rows of groups group_start to group_end as a slice.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Dataframe sorted by create_group_index().
+
+    group_index: dict
+        Made by create_group_index().
+
+    group_start: integer
+        Position of the first group in group_index["groups"].
+
+    group_end: integer
+        Position after the last group, as in python slicing.
+
+
+    Returns
+    -------
+    working_df: pd.DataFrame
+        The rows of the selected groups.
+    """
+
+    offsets = group_index["offsets"]
+
+    number_groups = len(offsets) - 1
+
+    row_start = offsets[min(group_start, number_groups)]
+    row_end = offsets[min(group_end, number_groups)]
+
+    return dataframe.iloc[row_start:row_end]
+
+
+def schedule_batches(
+    group_counts, group_size=10, target_rows=None, max_groups=None
+):
+
+    """ Splits the groups into batches of runs of groups for the main loop.
+
+    Parameters
+    ----------
+    group_counts: list or np.array
+        The number of rows in each group, in the order of groups_list.
+
+    group_size: integer
+        Number of groups in each batch when target_rows is not set
+        (default = 10).
+
+    target_rows: integer, optional
+        If set, groups are packed into batches of about this many rows. Small
+        groups are joined together until the next one would take the batch
+        over target_rows, and a group bigger than target_rows is a batch on
+        its own.
+
+    max_groups: integer, optional
+        The most groups allowed in one batch when target_rows is set.
+
+
+    Returns
+    -------
+    batches: list
+        A list of (group_start, group_end) tuples, as in python slicing of
+        groups_list.
+    """
+
+    group_counts = np.asarray(group_counts, dtype=np.int64)
+
+    number_groups = len(group_counts)
+
+    # Fixed number of groups per batch
+    if target_rows is None:
+        return [
+            (i, min(i + group_size, number_groups))
+            for i in range(0, number_groups, group_size)
+        ]
+
+    if max_groups is None:
+        max_groups = number_groups
+
+    batches = []
+    batch_start = 0
+    batch_rows = 0
+
+    for position, count in enumerate(group_counts):
+
+        batch_groups = position - batch_start
+
+        # Close the batch if this group won't fit
+        if batch_groups > 0 and (
+            batch_rows + count > target_rows or batch_groups >= max_groups
+        ):
+            batches.append((batch_start, position))
+            batch_start = position
+            batch_rows = 0
+
+        batch_rows += count
+
+    if batch_start < number_groups:
+        batches.append((batch_start, number_groups))
+
+    return batches
@@ -1,6 +1,5 @@
 # coding: utf-8
 import numpy as np
-from sklearn.mixture import GaussianMixture
 
 """
 Please cite this system as: 
@@ -46,6 +45,9 @@ def GMM_Model(dataframe, column, num_modes):
         Same as means above but with variance values instead.
     """
 
+    # Loaded here so startup doesn't wait on sklearn
+    from sklearn.mixture import GaussianMixture
+
     # Subset out column
     modelling_data = np.array(dataframe[column])
 
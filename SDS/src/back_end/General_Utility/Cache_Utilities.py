@@ -0,0 +1,374 @@
+# coding: utf-8
+
+# Standard Libraries
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the functions for the on-disk caches used by the SDS. Cache
+entries are named by a hash of what went into them (content addressed), so a
+rerun with the same input file and settings finds the entry again. When the
+cache directory grows past its size limit, the least recently used entries
+are deleted first.
+"""
+
+# Bump this if the layout of cached objects changes
+CACHE_VERSION = 3
+
+# Files of the pre-processing (.pkl) and model (.cbm, .json) caches, which
+# share one size limit
+CACHE_SUFFIXES = (".pkl", ".cbm", ".json")
+
+
+def hash_file(file_path, block_size=1024 ** 2):
+
+    """ Creates a SHA-256 hash of the contents of a file.
+
+    Parameters
+    ----------
+    file_path: string
+        Path to the file to be hashed.
+
+    block_size: integer
+        Number of bytes read at a time (default = 1MB).
+
+
+    Returns
+    -------
+    file_hash: string
+        The hex digest of the file contents.
+    """
+
+    file_hash = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+def hash_config(config):
+
+    """ Creates a SHA-256 hash of a dictionary of settings.
+
+    Parameters
+    ----------
+    config: dict
+        Settings that change the cached result. Values must be JSON friendly
+        or have a sensible str().
+
+
+    Returns
+    -------
+    config_hash: string
+        The hex digest of the settings.
+    """
+
+    config_string = json.dumps(config, sort_keys=True, default=str)
+
+    return hashlib.sha256(config_string.encode("utf-8")).hexdigest()
+
+
+def cache_key(file_path, config):
+
+    """ Builds the cache key for a file and its settings.
+
+    Parameters
+    ----------
+    file_path: string
+        Path to the input file.
+
+    config: dict
+        Settings that change the cached result.
+
+
+    Returns
+    -------
+    key: string
+        Hex digest combining the file contents and settings.
+    """
+
+    config = dict(config, cache_version=CACHE_VERSION)
+
+    combined = hash_file(file_path) + hash_config(config)
+
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest()
+
+
+def evict_cache(cache_directory, max_bytes, suffixes=None, keep=()):
+
+    """ Deletes least recently used cache files until the directory is
+            under max_bytes.
+
+    Parameters
+    ----------
+    cache_directory: string
+        The cache directory.
+
+    max_bytes: integer
+        The largest size (in bytes) the cache is allowed to be.
+
+    suffixes: tuple, optional
+        Only files ending with these are counted and deleted.
+
+    keep: tuple, optional
+        Files never deleted, such as the entry that was just written. They
+        still count towards max_bytes.
+
+
+    Returns
+    -------
+    removed: list
+        Names of the files that were deleted.
+    """
+
+    if not os.path.isdir(cache_directory):
+        return []
+
+    keep = {os.path.abspath(x) for x in keep}
+
+    entries = []
+
+    for name in os.listdir(cache_directory):
+        path = os.path.join(cache_directory, name)
+
+        if not os.path.isfile(path):
+            continue
+
+        if suffixes is not None and not name.endswith(tuple(suffixes)):
+            continue
+
+        stats = os.stat(path)
+        entries.append((stats.st_mtime, stats.st_size, path))
+
+    total_size = sum(size for mtime, size, path in entries)
+
+    removed = []
+
+    # Oldest use first
+    for mtime, size, path in sorted(entries):
+        if total_size <= max_bytes:
+            break
+
+        if os.path.abspath(path) in keep:
+            continue
+
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+
+        total_size -= size
+        removed.append(os.path.basename(path))
+
+    return removed
+
+
+def touch_cache_file(path):
+
+    """ Marks a cache file as just used, for least recently used eviction.
+
+    Parameters
+    ----------
+    path: string
+        The cache file.
+
+
+    Returns
+    -------
+    None.
+    """
+
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def atomic_write_bytes(path, data):
+
+    """ Writes bytes to a file via a temporary file so a crash or another
+            process never sees a half written cache entry.
+
+    Parameters
+    ----------
+    path: string
+        The final file.
+
+    data: bytes
+        The contents.
+
+
+    Returns
+    -------
+    None.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+
+    file_handle, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+    try:
+        with os.fdopen(file_handle, "wb") as f:
+            f.write(data)
+
+        os.replace(temp_path, path)
+
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def compact_frame(dataframe):
+
+    """ Stores repeated string columns as categories before pickling.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        The frame to be stored.
+
+
+    Returns
+    -------
+    compact_df: pd.DataFrame
+        The frame with object columns as categories.
+
+    object_columns: list
+        The columns that need turning back into objects on load.
+    """
+
+    object_columns = [
+        x for x in list(dataframe) if dataframe[x].dtype == object
+    ]
+
+    compact_df = dataframe.copy()
+
+    for column in object_columns:
+        compact_df[column] = compact_df[column].astype("category")
+
+    return (compact_df, object_columns)
+
+
+def restore_frame(compact_df, object_columns):
+
+    """ Reverses compact_frame().
+
+    Parameters
+    ----------
+    compact_df: pd.DataFrame
+        The frame from the cache.
+
+    object_columns: list
+        The columns to be turned back into objects.
+
+
+    Returns
+    -------
+    dataframe: pd.DataFrame
+        The frame as it was before compact_frame().
+    """
+
+    for column in object_columns:
+        compact_df[column] = compact_df[column].astype(object)
+
+    return compact_df
+
+
+def dumps_compact(value):
+
+    """ Pickles a (nested) tuple/list/dict, storing any DataFrame in it
+            with compact_frame(). The same DataFrame is only stored once.
+
+    Parameters
+    ----------
+    value:
+        The object to be stored.
+
+
+    Returns
+    -------
+    data: bytes
+        The pickled object.
+    """
+
+    frames = {}
+
+    def _pack(item):
+        if isinstance(item, pd.DataFrame):
+            if id(item) not in frames:
+                frames[id(item)] = compact_frame(item)
+            return ("__sds_frame__", id(item))
+
+        if isinstance(item, tuple):
+            return tuple(_pack(x) for x in item)
+
+        if isinstance(item, list):
+            return [_pack(x) for x in item]
+
+        if isinstance(item, dict):
+            return {k: _pack(v) for k, v in item.items()}
+
+        return item
+
+    packed = _pack(value)
+
+    return pickle.dumps((packed, frames), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def loads_compact(data):
+
+    """ Reverses dumps_compact().
+
+    Parameters
+    ----------
+    data: bytes
+        The pickled object.
+
+
+    Returns
+    -------
+    value:
+        The stored object.
+    """
+
+    packed, frames = pickle.loads(data)
+
+    restored = {
+        key: restore_frame(frame, columns)
+        for key, (frame, columns) in frames.items()
+    }
+
+    def _unpack(item):
+        if isinstance(item, tuple):
+            if (
+                len(item) == 2
+                and isinstance(item[0], str)
+                and item[0] == "__sds_frame__"
+            ):
+                return restored[item[1]]
+            return tuple(_unpack(x) for x in item)
+
+        if isinstance(item, list):
+            return [_unpack(x) for x in item]
+
+        if isinstance(item, dict):
+            return {k: _unpack(v) for k, v in item.items()}
+
+        return item
+
+    return _unpack(packed)
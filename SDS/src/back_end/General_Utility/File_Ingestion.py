@@ -0,0 +1,316 @@
+# coding: utf-8
+
+# Standard Libraries
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the file readers used by open_file(). Rather than letting
+pandas load every column as object/float64 in one go, a sample of a .csv file
+is used to infer a compact schema (categories and small integers) and the
+file is then assembled chunk by chunk using that schema. Parquet files are
+read through pyarrow, which only reads the columns asked for.
+"""
+
+# File extensions that are read as Parquet
+PARQUET_EXTENSIONS = (".parquet", ".pq", ".parq")
+
+
+def file_format_from_path(file_path, file_format=None):
+
+    """ Works out whether a file is .csv or Parquet.
+
+    Parameters
+    ----------
+    file_path: string
+        Path to the file.
+
+    file_format: string, optional
+        Either "csv" or "parquet". If given this wins over the extension.
+
+
+    Returns
+    -------
+    file_format: string
+        Either "csv" or "parquet".
+    """
+
+    if file_format is not None:
+        file_format = str(file_format).lower().strip(".")
+
+        if file_format not in ("csv", "parquet"):
+            raise ValueError(
+                "File format must be 'csv' or 'parquet', not: " + file_format
+            )
+
+        return file_format
+
+    if str(file_path).lower().endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+
+    return "csv"
+
+
+def import_pyarrow():
+
+    """ Imports pyarrow and its Parquet module with a helpful error.
+
+    Returns
+    -------
+    pa: module
+        pyarrow.
+
+    pq: module
+        pyarrow.parquet.
+    """
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+    except ImportError:
+        raise ImportError(
+            "Parquet files need pyarrow, install it with: pip install pyarrow"
+        )
+
+    return (pa, pq)
+
+
+def read_parquet_file(file_path, columns=None):
+
+    """ Reads a Parquet file, reading only the columns needed.
+
+    Parameters
+    ----------
+    file_path: string
+        Path to the Parquet file (or directory of Parquet files).
+
+    columns: list, optional
+        Only these columns are read from the file.
+
+
+    Returns
+    -------
+    main_file: pd.DataFrame
+        The loaded file. Dictionary encoded columns come back as 'category'.
+    """
+
+    pa, pq = import_pyarrow()
+
+    table = pq.read_table(file_path, columns=columns)
+
+    return table.to_pandas()
+
+
+def read_column_names(file_path, file_format=None):
+
+    """ Reads only the column names of a .csv or Parquet file.
+
+    Parameters
+    ----------
+    file_path: string
+        Path to the file.
+
+    file_format: string, optional
+        Either "csv" or "parquet", otherwise taken from the extension.
+
+
+    Returns
+    -------
+    headers: list
+        A list of all column headers in file.
+    """
+
+    if file_format_from_path(file_path, file_format) == "parquet":
+        pa, pq = import_pyarrow()
+
+        return list(pq.ParquetDataset(file_path).schema.names)
+
+    return list(pd.read_csv(file_path, nrows=0))
+
+
+def infer_compact_schema(sample_df, category_ratio=0.5):
+
+    """ Infers a memory compact dtype for each column of a sample.
+
+    Parameters
+    ----------
+    sample_df: pd.DataFrame
+        The first rows of the file, loaded with the default pandas dtypes.
+
+    category_ratio: float
+        If the number of unique values in an object column divided by the
+        number of rows in the sample is below this value then the column is
+        loaded as a pandas 'category' (default = 0.5).
+
+
+    Returns
+    -------
+    read_dtypes: dict
+        Dtypes to be handed to pd.read_csv for each chunk. Only categorical
+        columns are listed here so numeric columns are still parsed safely.
+
+    downcast_cols: dict
+        Numeric columns and whether they can be downcast to a smaller
+        'integer' or are left as 'float'.
+    """
+
+    # Output dictionaries
+    read_dtypes = {}
+    downcast_cols = {}
+
+    # Number of rows in sample
+    sample_size = max(len(sample_df), 1)
+
+    for column in list(sample_df):
+
+        col_values = sample_df[column]
+
+        # Low cardinality text columns become categories
+        if col_values.dtype == object or pd.api.types.is_string_dtype(
+            col_values.dtype
+        ):
+            if col_values.nunique(dropna=True) / sample_size < category_ratio:
+                read_dtypes[column] = "category"
+
+        # Integer columns can be made smaller
+        elif pd.api.types.is_integer_dtype(col_values.dtype):
+            downcast_cols[column] = "integer"
+
+        # Floats are left at full precision
+        elif pd.api.types.is_float_dtype(col_values.dtype):
+            downcast_cols[column] = "float"
+
+    return (read_dtypes, downcast_cols)
+
+
+def chunked_read_csv(
+    file_path,
+    chunk_size=500000,
+    sample_rows=100000,
+    category_ratio=0.5,
+    usecols=None,
+):
+
+    """ Reads a .csv file chunk by chunk using a compact inferred schema.
+
+    Parameters
+    ----------
+    file_path: string
+        Path to the .csv file to be loaded.
+
+    chunk_size: integer
+        Number of rows read from the file at a time (default = 500000).
+
+    sample_rows: integer
+        Number of rows read first to infer the schema (default = 100000).
+
+    category_ratio: float
+        Passed to infer_compact_schema (default = 0.5).
+
+    usecols: list, optional
+        Only these columns are read from the file.
+
+
+    Returns
+    -------
+    main_file: pd.DataFrame
+        The full file with categorical columns stored as 'category' and
+        integer columns downcast to the smallest type that fits.
+
+    peak_memory: integer
+        The peak number of bytes held by the assembled chunks while reading.
+    """
+
+    # Infer schema from first rows
+    sample_df = pd.read_csv(file_path, nrows=sample_rows, usecols=usecols)
+
+    read_dtypes, downcast_cols = infer_compact_schema(
+        sample_df, category_ratio=category_ratio
+    )
+
+    # Keep file column order
+    column_order = list(sample_df)
+
+    del sample_df
+
+    # Assembly of the chunks
+    chunk_list = []
+    held_memory = 0
+    peak_memory = 0
+
+    reader = pd.read_csv(
+        file_path, dtype=read_dtypes, chunksize=chunk_size, usecols=usecols
+    )
+
+    for chunk in reader:
+
+        # Shrink numeric columns chunk by chunk
+        for column, kind in downcast_cols.items():
+            if kind == "integer" and pd.api.types.is_integer_dtype(
+                chunk[column].dtype
+            ):
+                chunk[column] = pd.to_numeric(chunk[column], downcast="integer")
+
+        chunk_list.append(chunk)
+
+        # Track memory of what is held
+        held_memory += int(chunk.memory_usage(deep=True).sum())
+        peak_memory = max(peak_memory, held_memory)
+
+    if len(chunk_list) == 0:
+        return (pd.read_csv(file_path, usecols=usecols), peak_memory)
+
+    # Build each column seperately so categories are unioned, not upcast
+    main_file = pd.DataFrame(index=pd.RangeIndex(0, sum(map(len, chunk_list))))
+
+    for column in column_order:
+        pieces = [chunk[column] for chunk in chunk_list]
+
+        piece_memory = sum(
+            int(piece.memory_usage(deep=True, index=False)) for piece in pieces
+        )
+
+        if read_dtypes.get(column) == "category":
+            try:
+                values = union_categoricals(pieces, ignore_order=True)
+
+            except TypeError:
+                # An all-empty chunk can carry a different category dtype
+                values = pd.Categorical(
+                    pd.concat(
+                        [piece.astype(object) for piece in pieces],
+                        ignore_index=True,
+                    )
+                )
+
+            main_file[column] = pd.Categorical(values)
+
+        else:
+            values = pd.concat(pieces, ignore_index=True)
+
+            # Chunks may have downcast differently so settle on one type
+            if downcast_cols.get(column) == "integer":
+                values = pd.to_numeric(values, downcast="integer")
+
+            main_file[column] = values.values
+
+        # Release the pieces as they are assembled
+        del pieces
+        for chunk in chunk_list:
+            del chunk[column]
+
+        held_memory += int(
+            main_file[column].memory_usage(deep=True, index=False)
+        )
+        peak_memory = max(peak_memory, held_memory)
+        held_memory -= piece_memory
+
+    return (main_file, peak_memory)
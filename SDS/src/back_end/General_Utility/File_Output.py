@@ -0,0 +1,576 @@
+# coding: utf-8
+
+# Standard Libraries
+import os
+import pandas as pd
+
+from SDS.src.back_end.General_Utility.File_Ingestion import (
+    file_format_from_path,
+    import_pyarrow,
+)
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the functions that save the synthetic and filtered real
+data files. Files can be written as .csv or as Parquet, where Parquet files
+are split into row groups so they can be read back part by part.
+
+The decoded data holds every value as text, as in a .csv file. Before it is
+saved as Parquet, each column is typed: columns of whole numbers are stored
+as integers, other numbers as floats, dates as timestamps and the rest as
+strings, with the SDS missing value markers stored as nulls in the typed
+columns.
+"""
+
+# Values the SDS writes for a missing value
+MISSING_VALUES = (" ", "", "NaN", "nan")
+
+# Date layouts written by the date handling methods, tried in this order
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S")
+
+
+def output_file_name(name_of_output, file_format="csv", prefix=""):
+
+    """ Cleans the user's output name and adds the right extension.
+
+    Parameters
+    ----------
+    name_of_output: string or list
+        The name given in the control file, which can arrive as a list.
+
+    file_format: string
+        Either "csv" or "parquet" (default = "csv").
+
+    prefix: string
+        Added to the start of the name, e.g. "Real_Filt_".
+
+
+    Returns
+    -------
+    file_name: string
+        The file name with extension.
+    """
+
+    name_of_output = str(name_of_output).replace("[", "")
+    name_of_output = str(name_of_output).replace("]", "")
+    name_of_output = str(name_of_output).replace("'", "")
+
+    file_format = file_format_from_path(name_of_output, file_format)
+
+    # Do not double up on extensions
+    for extension in (".csv", ".parquet"):
+        if name_of_output.lower().endswith(extension):
+            name_of_output = name_of_output[: -len(extension)]
+
+    return prefix + name_of_output + "." + file_format
+
+
+def infer_output_types(dataframe):
+
+    """ Works out how each column of the decoded data is stored in Parquet.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Decoded data, with values as text and missing values as one of
+        MISSING_VALUES.
+
+
+    Returns
+    -------
+    output_types: dict
+        For each column, a (kind, date_format) tuple where kind is "keep"
+        (already typed), "integer", "float", "date" or "string".
+    """
+
+    output_types = {}
+
+    for column in list(dataframe):
+        values = dataframe[column]
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+
+        # Columns that were never turned into text keep their type
+        if values.dtype != object and not pd.api.types.is_string_dtype(
+            values.dtype
+        ):
+            output_types[column] = ("keep", None)
+            continue
+
+        text = values[values.notna()].astype(str)
+        text = text[~text.isin(MISSING_VALUES)]
+
+        output_types[column] = ("string", None)
+
+        if len(text) == 0:
+            continue
+
+        # Codes with leading zeros (e.g. "007") stay as text
+        if not text.str.match(r"^[+-]?0\d").any():
+            numbers = pd.to_numeric(text, errors="coerce")
+
+            if numbers.notna().all():
+                if pd.api.types.is_integer_dtype(numbers.dtype):
+                    output_types[column] = ("integer", None)
+                else:
+                    output_types[column] = ("float", None)
+                continue
+
+        for date_format in DATE_FORMATS:
+            dates = pd.to_datetime(text, format=date_format, errors="coerce")
+
+            if dates.notna().all():
+                output_types[column] = ("date", date_format)
+                break
+
+    return output_types
+
+
+def convert_output_column(values, kind, date_format=None):
+
+    """ Types one column of decoded data, see apply_output_types().
+
+    Parameters
+    ----------
+    values: pd.Series
+        A decoded column, with values as text.
+
+    kind: string
+        "integer", "float" or "date", see infer_output_types().
+
+    date_format: string, optional
+        The layout of the dates when kind is "date".
+
+
+    Returns
+    -------
+    converted: pd.Series or None
+        The typed column, or None if a value does not fit the type.
+    """
+
+    missing = values.isna() | values.astype(str).isin(MISSING_VALUES)
+
+    present = values.where(~missing)
+
+    if kind == "date":
+        converted = pd.to_datetime(
+            present, format=date_format, errors="coerce"
+        )
+
+    else:
+        converted = pd.to_numeric(present, errors="coerce")
+
+        if kind == "integer" and not (converted.dropna() % 1 == 0).all():
+            return None
+
+    if (converted.isna() & ~missing).any():
+        return None
+
+    if kind == "integer":
+        converted = converted.astype("Int64")
+
+    return converted
+
+
+def widen_output_types(dataframe, output_types):
+
+    """ Widens the types of any columns a batch doesn't fit, integers to
+            floats and then strings, and dates to strings.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Decoded data, with values as text.
+
+    output_types: dict
+        Made by infer_output_types(), possibly from another batch.
+
+
+    Returns
+    -------
+    output_types: dict
+        A copy of output_types that every value of the batch fits.
+    """
+
+    wider_kinds = {"integer": "float", "float": "string", "date": "string"}
+
+    output_types = dict(output_types)
+
+    for column in list(dataframe):
+        values = dataframe[column]
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+
+        kind, date_format = output_types[column]
+
+        while kind in wider_kinds and (
+            convert_output_column(values, kind, date_format) is None
+        ):
+            kind, date_format = (wider_kinds[kind], None)
+
+        output_types[column] = (kind, date_format)
+
+    return output_types
+
+
+def apply_output_types(dataframe, output_types):
+
+    """ Types the columns of decoded data as set by infer_output_types().
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        Decoded data, with values as text.
+
+    output_types: dict
+        Made by infer_output_types() or widen_output_types() for this data.
+
+
+    Returns
+    -------
+    typed_df: pd.DataFrame
+        The data with typed columns. A ValueError is raised if a value does
+        not fit the type of its column.
+    """
+
+    typed_df = pd.DataFrame(index=dataframe.index)
+
+    for column in list(dataframe):
+        kind, date_format = output_types[column]
+
+        values = dataframe[column]
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+
+        if kind == "keep":
+            typed_df[column] = values
+            continue
+
+        if kind == "string":
+            typed_df[column] = values.where(
+                values.isna(), values.astype(str)
+            )
+            continue
+
+        converted = convert_output_column(values, kind, date_format)
+
+        if converted is None:
+            raise ValueError(
+                "Column "
+                + str(column)
+                + " has values that are not "
+                + kind
+                + ", see widen_output_types()."
+            )
+
+        typed_df[column] = converted
+
+    return typed_df
+
+
+def widen_written_column(values, output_type, kind):
+
+    """ Turns a column read back from Parquet into a wider kind, see
+            widen_output_types().
+
+    Parameters
+    ----------
+    values: pd.Series
+        The column as written with output_type.
+
+    output_type: tuple
+        The (kind, date_format) it was written with.
+
+    kind: string
+        Either "float" or "string".
+
+
+    Returns
+    -------
+    widened: pd.Series
+        The column as kind, with nulls kept as nulls.
+    """
+
+    if kind == "float":
+        return values.astype("float64")
+
+    if output_type[0] == "date":
+        values = values.dt.strftime(output_type[1])
+
+    return values.astype(object).where(values.notna(), None).map(
+        str, na_action="ignore"
+    )
+
+
+def write_output_file(
+    dataframe, file_name, file_format=None, row_group_size=None
+):
+
+    """ Saves a dataframe as a .csv or row group partitioned Parquet file.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        The data to be saved.
+
+    file_name: string
+        The name of the file to be created.
+
+    file_format: string, optional
+        Either "csv" or "parquet", otherwise taken from the extension.
+
+    row_group_size: integer, optional
+        The maximum number of rows in each Parquet row group (default is the
+        pyarrow default).
+
+
+    Returns
+    -------
+    None.
+    """
+
+    file_format = file_format_from_path(file_name, file_format)
+
+    if file_format == "csv":
+        dataframe.to_csv(file_name, index=False)
+        return
+
+    pa, pq = import_pyarrow()
+
+    dataframe = apply_output_types(dataframe, infer_output_types(dataframe))
+
+    table = pa.Table.from_pandas(dataframe, preserve_index=False)
+
+    pq.write_table(table, file_name, row_group_size=row_group_size)
+
+
+class Batch_File_Writer:
+
+    """ Writes batches of a dataframe to one .csv or Parquet file as they
+            are made, so the whole dataset is never held in memory.
+
+    Parameters
+    ----------
+    file_name: string
+        The name of the file to be created.
+
+    file_format: string, optional
+        Either "csv" or "parquet", otherwise taken from the extension.
+
+    row_group_size: integer, optional
+        The maximum number of rows in each Parquet row group. Each batch is
+        written as at least one row group.
+
+
+    Note
+    ----
+    Parquet columns are typed from the first batch by infer_output_types().
+    If a later batch has a value that doesn't fit, such as a fraction in an
+    integer column, the column is widened by widen_output_types() and the
+    rows already written are rewritten one row group at a time.
+    """
+
+    def __init__(self, file_name, file_format=None, row_group_size=None):
+
+        self.file_name = file_name
+        self.file_format = file_format_from_path(file_name, file_format)
+        self.row_group_size = row_group_size
+
+        self.columns = None
+        self.rows_written = 0
+        self.output_types = None
+        self._parquet_writer = None
+
+    def write(self, dataframe):
+
+        """ Appends a batch to the file.
+
+        Parameters
+        ----------
+        dataframe: pd.DataFrame
+            The batch to be written. Columns are put in the order of the
+            first batch.
+
+
+        Returns
+        -------
+        None.
+        """
+
+        if self.columns is None:
+            self.columns = list(dataframe)
+
+        dataframe = dataframe[self.columns]
+
+        if self.file_format == "csv":
+            dataframe.to_csv(
+                self.file_name,
+                mode="w" if self.rows_written == 0 else "a",
+                header=self.rows_written == 0,
+                index=False,
+            )
+
+        else:
+            pa, pq = import_pyarrow()
+
+            if self.output_types is None:
+                self.output_types = infer_output_types(dataframe)
+
+            else:
+                output_types = widen_output_types(dataframe, self.output_types)
+
+                if output_types != self.output_types:
+                    self._widen_file(output_types)
+
+            typed_df = apply_output_types(dataframe, self.output_types)
+
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(typed_df, preserve_index=False)
+
+                # A column with no values yet would be fixed as all null
+                schema = table.schema
+
+                for number, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(
+                            number, field.with_type(pa.string())
+                        )
+
+                table = table.cast(schema)
+
+                self._parquet_writer = pq.ParquetWriter(
+                    self.file_name, schema
+                )
+
+            else:
+                table = pa.Table.from_pandas(
+                    typed_df,
+                    schema=self._parquet_writer.schema,
+                    preserve_index=False,
+                )
+
+            self._parquet_writer.write_table(
+                table, row_group_size=self.row_group_size
+            )
+
+        self.rows_written += len(dataframe)
+
+    def _widen_file(self, output_types):
+
+        """ Rewrites the rows already written with the wider output_types.
+
+        Parameters
+        ----------
+        output_types: dict
+            Made by widen_output_types().
+
+
+        Returns
+        -------
+        None.
+        """
+
+        pa, pq = import_pyarrow()
+
+        widened = [
+            x for x in output_types if output_types[x] != self.output_types[x]
+        ]
+
+        print("\n")
+        print(
+            "Widening the Parquet types of: "
+            + ", ".join(str(x) for x in widened)
+        )
+
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+            narrow_name = self.file_name + ".narrow"
+
+            os.replace(self.file_name, narrow_name)
+
+            narrow_file = pq.ParquetFile(narrow_name)
+
+            schema = narrow_file.schema_arrow
+
+            for column in widened:
+                number = schema.get_field_index(str(column))
+
+                schema = schema.set(
+                    number,
+                    schema.field(number).with_type(
+                        pa.float64()
+                        if output_types[column][0] == "float"
+                        else pa.string()
+                    ),
+                )
+
+            def widen_frame(narrow_df):
+                for column in widened:
+                    narrow_df[column] = widen_written_column(
+                        narrow_df[column],
+                        self.output_types[column],
+                        output_types[column][0],
+                    )
+
+                return narrow_df
+
+            # The pandas types saved with the schema must follow too
+            empty_df = narrow_file.schema_arrow.empty_table().to_pandas()
+
+            schema = schema.with_metadata(
+                pa.Schema.from_pandas(
+                    widen_frame(empty_df), preserve_index=False
+                ).metadata
+            )
+
+            self._parquet_writer = pq.ParquetWriter(self.file_name, schema)
+
+            for number in range(narrow_file.num_row_groups):
+                narrow_df = narrow_file.read_row_group(number).to_pandas()
+
+                self._parquet_writer.write_table(
+                    pa.Table.from_pandas(
+                        widen_frame(narrow_df),
+                        schema=schema,
+                        preserve_index=False,
+                    )
+                )
+
+            narrow_file.close()
+
+            os.remove(narrow_name)
+
+        self.output_types = output_types
+
+    def close(self):
+
+        """ Finishes the file. An empty file with no columns is created if
+                nothing was written.
+
+        Returns
+        -------
+        None.
+        """
+
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+        elif self.rows_written == 0 and self.file_format == "csv":
+            open(self.file_name, "w").close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -4,10 +4,12 @@
 # Standard Libraries
 import numpy as np
 import pandas as pd
-import sklearn as sk
-import scipy
-from tkinter import Tk
-from tkinter.filedialog import askopenfilename
+
+from SDS.src.back_end.General_Utility.File_Ingestion import (
+    chunked_read_csv,
+    file_format_from_path,
+    read_parquet_file,
+)
 
 # Remove non-needed warnings
 import warnings
@@ -28,13 +30,28 @@ such as removing missing values or loading files.
 """
 
 
-def open_file(open_file_name=None):
+def open_file(
+    open_file_name=None, chunk_size=None, columns=None, file_format=None
+):
 
     """ One-click opening and loading of file.
 
     Parameters
     ----------
-    None.
+    open_file_name: string, optional
+        Path to the file. If None then a tkinter dialogue is opened.
+
+    chunk_size: integer, optional
+        If set, a .csv file is read chunk_size rows at a time with a compact
+        inferred schema (see File_Ingestion.chunked_read_csv) and the peak
+        memory used is printed.
+
+    columns: list, optional
+        Only these columns are read from the file.
+
+    file_format: string, optional
+        Either "csv" or "parquet". By default this is taken from the file
+        extension.
 
 
     Returns
@@ -44,38 +61,49 @@ def open_file(open_file_name=None):
     """
 
     if open_file_name is None:
+        # Only needed for the file picker, so not loaded on headless runs
+        from tkinter import Tk
+        from tkinter.filedialog import askopenfilename
+
         # Load a Tk Inter instance
         root = Tk()
         root.withdraw()
 
         # Select the file
-        file_path = askopenfilename()
+        open_file_name = askopenfilename()
 
         # Destroy the root/open window
         root.destroy()
 
-        try:
-            # Transform into PD DataFrame
-            main_file = pd.read_csv(file_path)
+    file_format = file_format_from_path(open_file_name, file_format)
 
-            # Transform into PD DataFrame
-            main_file = pd.read_csv(file_path)
+    if file_format == "parquet":
+        # Columnar load with column projection
+        return read_parquet_file(open_file_name, columns=columns)
 
-            # Return the output
-            return main_file
+    try:
+        if chunk_size is None:
+            # Transform into PD DataFrame
+            main_file = pd.read_csv(open_file_name, usecols=columns)
 
-        except:
-            raise TypeError("ERROR: Select a .CSV file please")
+        else:
+            # Chunked and typed load
+            main_file, peak_memory = chunked_read_csv(
+                open_file_name, chunk_size=chunk_size, usecols=columns
+            )
 
-    try:
-        # Transform into PD DataFrame
-        main_file = pd.read_csv(open_file_name)
+            print("\n")
+            print(
+                "Peak memory while loading file: "
+                + str(round(peak_memory / 1024 ** 2, 2))
+                + " MB"
+            )
 
         # Return the output
         return main_file
 
     except:
-        raise TypeError("ERROR: Select a .CSV file please")
+        raise TypeError("ERROR: Select a .CSV or Parquet file please")
 
 
 def string_cut(dataframe=None, length_string=None, col_list=None):
@@ -220,6 +248,14 @@ def NaN_Handle_Cat(dataframe):
     for column in list(dataframe):
         missing_name = str(column + "_Missing")
         miss_value_list.append(missing_name)
+
+        # Categories from the chunked reader need the new value added first
+        if isinstance(dataframe[column].dtype, pd.CategoricalDtype):
+            if missing_name not in dataframe[column].cat.categories:
+                dataframe[column] = dataframe[column].cat.add_categories(
+                    [missing_name]
+                )
+
         dataframe[column] = dataframe[column].fillna(missing_name)
 
     # Return list of missing values for later
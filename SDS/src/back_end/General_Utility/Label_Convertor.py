@@ -1,4 +1,3 @@
-from sklearn import preprocessing
 import numpy as np
 
 """
@@ -41,6 +40,9 @@ def cat_col_convertor(dataframe, categorical_variables):
 
     """
 
+    ### Loaded here so startup doesn't wait on sklearn
+    from sklearn import preprocessing
+
     ### Make a copy
     main_file = dataframe.copy()
 
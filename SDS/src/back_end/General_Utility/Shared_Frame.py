@@ -0,0 +1,179 @@
+# coding: utf-8
+
+# Standard Libraries
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the functions that share the pre-processed real data with
+worker processes without copying it to each one. Every column is stored once
+as int32 codes in a memory mapped file, column after column, along with a
+small table of the values behind the codes. Workers map the file, which the
+operating system shares between processes, and only decode the rows of the
+batch they are working on.
+"""
+
+
+def export_shared_frame(dataframe, directory=None):
+
+    """ Writes a dataframe to a memory mapped file of integer codes.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        The data to be shared, sorted so each batch is a run of rows.
+
+    directory: string, optional
+        Where the file is made, by default a new temporary folder.
+
+
+    Returns
+    -------
+    frame_spec: dict
+        What a worker needs to map and decode the file. Pass it to
+        attach_shared_frame() and release_shared_frame().
+    """
+
+    temp_directory = tempfile.mkdtemp(prefix="sds_shared_", dir=directory)
+
+    number_rows, number_columns = dataframe.shape
+
+    file_path = os.path.join(temp_directory, "codes.int32")
+
+    # One column after another so each column is contiguous
+    codes = np.memmap(
+        file_path,
+        dtype=np.int32,
+        mode="w+",
+        shape=(max(number_columns, 1), max(number_rows, 1)),
+    )
+
+    uniques_list = []
+
+    for position, column in enumerate(list(dataframe)):
+        column_codes, column_uniques = pd.factorize(dataframe[column])
+
+        column_uniques = np.asarray(column_uniques)
+
+        # Code -1 is a missing value, it is put on the end as NaN
+        if (column_codes < 0).any():
+            column_uniques = np.append(
+                column_uniques.astype(object), np.array([np.nan], dtype=object)
+            )
+
+        codes[position, :number_rows] = column_codes
+        uniques_list.append(column_uniques)
+
+    codes.flush()
+    del codes
+
+    frame_spec = {
+        "directory": temp_directory,
+        "file_path": file_path,
+        "columns": list(dataframe),
+        "uniques": uniques_list,
+        "number_rows": number_rows,
+    }
+
+    return frame_spec
+
+
+def attach_shared_frame(frame_spec):
+
+    """ Maps the codes written by export_shared_frame(). Nothing is copied.
+
+    Parameters
+    ----------
+    frame_spec: dict
+        Made by export_shared_frame().
+
+
+    Returns
+    -------
+    codes: np.memmap
+        Read only int32 array with one row of codes per column.
+    """
+
+    number_columns = max(len(frame_spec["columns"]), 1)
+    number_rows = max(frame_spec["number_rows"], 1)
+
+    return np.memmap(
+        frame_spec["file_path"],
+        dtype=np.int32,
+        mode="r",
+        shape=(number_columns, number_rows),
+    )
+
+
+def shared_frame_view(codes, frame_spec, row_start, row_end, columns=None):
+
+    """ Decodes a run of rows of the shared data back into a dataframe.
+
+    Parameters
+    ----------
+    codes: np.memmap
+        Made by attach_shared_frame().
+
+    frame_spec: dict
+        Made by export_shared_frame().
+
+    row_start: integer
+        First row, as in python slicing.
+
+    row_end: integer
+        Row after the last row, as in python slicing.
+
+    columns: list, optional
+        Only decode these columns.
+
+
+    Returns
+    -------
+    working_df: pd.DataFrame
+        The rows asked for, with a fresh index from row_start.
+    """
+
+    if columns is None:
+        columns = frame_spec["columns"]
+
+    row_end = min(row_end, frame_spec["number_rows"])
+
+    working_df = pd.DataFrame(index=pd.RangeIndex(row_start, row_end))
+
+    for column in columns:
+        position = frame_spec["columns"].index(column)
+
+        working_df[column] = frame_spec["uniques"][position].take(
+            codes[position, row_start:row_end]
+        )
+
+    return working_df
+
+
+def release_shared_frame(frame_spec):
+
+    """ Deletes the file made by export_shared_frame().
+
+    Parameters
+    ----------
+    frame_spec: dict
+        Made by export_shared_frame().
+
+
+    Returns
+    -------
+    None.
+    """
+
+    shutil.rmtree(frame_spec["directory"], ignore_errors=True)
@@ -0,0 +1,156 @@
+# coding: utf-8
+
+### Standard Libraries
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the functions for running the synthesis of the Combi
+batches in parallel. Each batch only touches its own groups, so batches are
+handed to a pool of worker processes. Only a few batches are handed out
+ahead of the one being saved, and results always come back in batch order,
+so the output file is the same whichever worker finishes first.
+"""
+
+
+def batch_thread_count(n_workers, cpu_total=None):
+
+    """ Works out how many threads each worker's models can use so that
+            the workers together don't use more threads than there are cores.
+
+    Parameters
+    ----------
+    n_workers: integer
+        Number of worker processes.
+
+    cpu_total: integer, optional
+        Number of cores, by default os.cpu_count().
+
+
+    Returns
+    -------
+    thread_count: integer
+        Threads for each worker, at least 1.
+    """
+
+    if cpu_total is None:
+        cpu_total = os.cpu_count() or 1
+
+    return max(1, int(cpu_total) // max(1, int(n_workers)))
+
+
+def batch_seed(random_seed, batch_number):
+
+    """ Creates the seed of one batch from the seed of the whole run, so a
+            batch gets the same seed whichever worker runs it.
+
+    Parameters
+    ----------
+    random_seed: integer or None
+        The seed of the whole run. If None then None is returned and the
+        batch is not seeded.
+
+    batch_number: integer
+        The position of the batch in the main loop.
+
+
+    Returns
+    -------
+    seed: integer or None
+        A seed between 0 and 2**32 - 1.
+    """
+
+    if random_seed is None:
+        return None
+
+    sequence = np.random.SeedSequence([int(random_seed), int(batch_number)])
+
+    return int(sequence.generate_state(1)[0])
+
+
+def ordered_parallel_map(
+    function, jobs, n_workers, window=None, initializer=None, initargs=()
+):
+
+    """ Runs function(*job) for each job in a pool of processes and yields
+            the results in the order of jobs.
+
+    Parameters
+    ----------
+    function: callable
+        A top level function, so that it can be sent to the workers.
+
+    jobs: iterable
+        Tuples of arguments for function. Jobs are only taken from this as
+        there is room in the window, so it can be a generator.
+
+    n_workers: integer
+        Number of worker processes.
+
+    window: integer, optional
+        The most jobs handed out but not yet yielded (default = 2 *
+        n_workers). This bounds the memory held by finished results waiting
+        on a slower, earlier job.
+
+    initializer: callable, optional
+        Run once in each worker when it starts.
+
+    initargs: tuple
+        Arguments for initializer.
+
+
+    Returns
+    -------
+    A generator of the results of function, in the order of jobs. Closing
+    it early cancels the jobs that haven't started, and waits only on those
+    already running.
+    """
+
+    if window is None:
+        window = 2 * n_workers
+
+    window = max(1, int(window))
+
+    jobs = iter(jobs)
+
+    executor = ProcessPoolExecutor(
+        max_workers=n_workers, initializer=initializer, initargs=initargs
+    )
+
+    pending = deque()
+
+    try:
+        for job in jobs:
+            pending.append(executor.submit(function, *job))
+
+            if len(pending) >= window:
+                break
+
+        while len(pending) > 0:
+
+            # Wait on the earliest job so results stay in order
+            result = pending.popleft().result()
+
+            for job in jobs:
+                pending.append(executor.submit(function, *job))
+                break
+
+            yield result
+
+    finally:
+        # If the generator is closed early or a job fails, jobs that haven't
+        # started are dropped rather than run for results nobody will take
+        for future in pending:
+            future.cancel()
+
+        executor.shutdown(wait=True)
@@ -0,0 +1,280 @@
+# coding: utf-8
+
+### Standard Libraries
+import glob
+import json
+import os
+
+from SDS.src.back_end.General_Utility.Cache_Utilities import (
+    CACHE_VERSION,
+    atomic_write_bytes,
+    dumps_compact,
+    hash_config,
+    loads_compact,
+)
+
+from SDS.src.back_end.Tree_Methods.Model_Cache import hash_frame
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the functions for checkpointing a synthesis run so it can
+be resumed after a crash. Each finished batch is saved to a run directory,
+and a manifest records which batches (and group ranges) are finished and a
+hash of the data, settings and seed of the run. A resumed run loads the
+finished batches rather than synthesising them again. As the seed of each
+batch only depends on the run seed and the batch number, the rest of the
+batches come out the same as in one run. The seed itself is never saved, so
+it must be given by the user.
+"""
+
+MANIFEST_NAME = "manifest.json"
+
+# Bump this if the layout of the run directory changes
+CHECKPOINT_VERSION = 1
+
+# Batch settings that do not change the synthetic data
+UNKEYED_SETTINGS = (
+    "GPU_IDs",
+    "thread_count",
+    "fit_workers",
+    "cache_directory",
+    "cache_size_limit",
+)
+
+
+def run_key(real_data_frame, batch_settings, main_control_loop, random_seed):
+
+    """ Builds the key of a run, so a run directory is only resumed by the
+            same run.
+
+    Parameters
+    ----------
+    real_data_frame: pd.DataFrame
+        The processed real data.
+
+    batch_settings: dict
+        The settings shared by every batch, see synthesis_batches().
+
+    main_control_loop: list
+        The (group_start, group_end) of each batch.
+
+    random_seed: integer or None
+        The seed given by the user.
+
+
+    Returns
+    -------
+    key: string
+        Hex digest of the data, settings, batches and seed.
+    """
+
+    settings = {
+        key: value
+        for key, value in batch_settings.items()
+        if key not in UNKEYED_SETTINGS
+    }
+
+    config = {
+        "settings": settings,
+        "batches": [[int(x), int(y)] for x, y in main_control_loop],
+        "random_seed": random_seed,
+        "cache_version": CACHE_VERSION,
+        "checkpoint_version": CHECKPOINT_VERSION,
+    }
+
+    return hash_config(
+        {"data": hash_frame(real_data_frame), "config": hash_config(config)}
+    )
+
+
+def batch_file(run_directory, batch_number):
+
+    """ The file of one finished batch.
+
+    Parameters
+    ----------
+    run_directory: string
+        The run directory.
+
+    batch_number: integer
+        The position of the batch in the main loop.
+
+
+    Returns
+    -------
+    path: string
+    """
+
+    return os.path.join(
+        run_directory, "batch_" + str(batch_number).zfill(6) + ".pkl"
+    )
+
+
+def write_manifest(run_directory, manifest):
+
+    """ Saves the manifest of a run, replacing the old one in one step.
+
+    Parameters
+    ----------
+    run_directory: string
+        The run directory.
+
+    manifest: dict
+        Made by open_run().
+
+
+    Returns
+    -------
+    None.
+    """
+
+    atomic_write_bytes(
+        os.path.join(run_directory, MANIFEST_NAME),
+        json.dumps(manifest, indent=1).encode("utf-8"),
+    )
+
+
+def open_run(run_directory, key, random_seed=None, resume=False):
+
+    """ Starts or resumes the run in a run directory.
+
+    Parameters
+    ----------
+    run_directory: string
+        The run directory, made if needed.
+
+    key: string
+        Made by run_key().
+
+    random_seed: integer
+        The seed given by the user. A resumed run needs it to repeat the rest
+        of the batches, but anyone with it can repeat the noise of the
+        finished ones, so it is not saved in the run directory next to the
+        synthetic data. It must be given again to resume, and the key checks
+        it is the same one.
+
+    resume: boolean, optional
+        If True, the finished batches of the run in run_directory are kept.
+        Otherwise any old run in it is removed (default = False).
+
+
+    Returns
+    -------
+    manifest: dict
+        The run key and the group range of each finished batch, by batch
+        number.
+    """
+
+    if random_seed is None:
+        raise ValueError(
+            "A run saved to a Run Directory needs a Random Seed, so that it"
+            + " can be resumed without the seed being saved with the output"
+        )
+
+    os.makedirs(run_directory, exist_ok=True)
+
+    manifest_path = os.path.join(run_directory, MANIFEST_NAME)
+
+    if resume and os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+        if manifest.get("run_key") != key:
+            raise ValueError(
+                "The run in "
+                + str(run_directory)
+                + " was made with different data or settings, so it can't"
+                + " be resumed"
+            )
+
+        # Only batches whose file was saved count as finished
+        manifest["finished"] = {
+            number: group_range
+            for number, group_range in manifest["finished"].items()
+            if os.path.exists(batch_file(run_directory, number))
+        }
+
+        return manifest
+
+    if resume:
+        print("\n")
+        print("No run to resume in " + str(run_directory) + ", starting one")
+
+    for path in glob.glob(os.path.join(run_directory, "batch_*.pkl")):
+        os.remove(path)
+
+    manifest = {
+        "run_key": key,
+        "finished": {},
+    }
+
+    write_manifest(run_directory, manifest)
+
+    return manifest
+
+
+def save_batch(
+    run_directory, manifest, batch_number, group_range, batch_output
+):
+
+    """ Saves a finished batch and then marks it finished in the manifest.
+
+    Parameters
+    ----------
+    run_directory: string
+        The run directory.
+
+    manifest: dict
+        Made by open_run(), updated in place.
+
+    batch_number: integer
+        The position of the batch in the main loop.
+
+    group_range: tuple
+        The (group_start, group_end) of the batch.
+
+    batch_output: tuple
+        The synthetic data and removed columns of the batch.
+
+
+    Returns
+    -------
+    None.
+    """
+
+    atomic_write_bytes(
+        batch_file(run_directory, batch_number), dumps_compact(batch_output)
+    )
+
+    manifest["finished"][str(batch_number)] = [int(x) for x in group_range]
+
+    write_manifest(run_directory, manifest)
+
+
+def load_batch(run_directory, batch_number):
+
+    """ Loads a batch saved by save_batch().
+
+    Parameters
+    ----------
+    run_directory: string
+        The run directory.
+
+    batch_number: integer
+        The position of the batch in the main loop.
+
+
+    Returns
+    -------
+    batch_output: tuple
+        The synthetic data and removed columns of the batch.
+    """
+
+    with open(batch_file(run_directory, batch_number), "rb") as f:
+        return loads_compact(f.read())
@@ -1,12 +1,21 @@
 ### Standard Libraries
 import numpy as np
 import pandas as pd
-import sklearn as sk
-import scipy
+import os
 import time
 import secrets
 
 ### General Modules
+from SDS.src.back_end.General_Utility.Cache_Utilities import (
+    CACHE_SUFFIXES,
+    atomic_write_bytes,
+    cache_key,
+    dumps_compact,
+    evict_cache,
+    loads_compact,
+    touch_cache_file,
+)
+
 from SDS.src.back_end.General_Utility.General_Utilities import (
     open_file,
     synth_label_create,
@@ -14,23 +23,52 @@ from SDS.src.back_end.General_Utility.General_Utilities import (
     NaN_Handle_Cat,
 )
 
+from SDS.src.back_end.General_Utility.Shared_Frame import (
+    attach_shared_frame,
+    export_shared_frame,
+    release_shared_frame,
+    shared_frame_view,
+)
+
 from SDS.src.back_end.General_Utility.Label_Convertor import (
     cat_col_convertor,
     invertor_cat_col_convertor,
 )
 
+from SDS.src.back_end.Looping_Control_Methods.Parallel_Batches import (
+    batch_seed,
+    batch_thread_count,
+    ordered_parallel_map,
+)
+
+from SDS.src.back_end.Looping_Control_Methods.Run_Checkpoints import (
+    load_batch,
+    open_run,
+    run_key,
+    save_batch,
+)
+
 ### Demographic Synthesis Modules
 from SDS.src.back_end.Demographic_Synthesis.Demographic_Synthesis_Utilities import (
     create_filtered_index,
+    create_group_index,
+    group_slice,
+    schedule_batches,
 )
 
 from SDS.src.back_end.Demographic_Synthesis.Demographic_Synthesis_Main import (
-    Demographic_Synthesis,
+    demographic_sample,
+    demographic_tables,
+)
+
+from SDS.src.back_end.Demographic_Synthesis.Demographic_Synthesis_Diff_Piv import (
+    set_sampling_seed,
 )
 
 ### Machine Learning Synthesis
 from SDS.src.back_end.Machine_Learning_Synthesis.ML_Synthesis_Main_debug import (
-    Machine_Learning_Synthesis,
+    fit_target_plans,
+    predict_target_plans,
 )
 
 from SDS.src.back_end.Machine_Learning_Synthesis.ML_Synthesis_Utilities import (
@@ -46,6 +84,11 @@ from SDS.src.back_end.GMM_Methods.GMM_Transform import (
     grouping_reversal,
 )
 
+### Post Processing Methods
+from SDS.src.back_end.Post_Processing.Post_Processing import (
+    post_process_batch,
+)
+
 ### Date Transform Methods
 from SDS.src.simple_date_interface.Date_Pre_Processing.Date_Transform_Functions import (
     date_only,
@@ -82,6 +125,8 @@ def prep_synth_loop(
     date_columns,
     file_path,
     machine_learning_variables,
+    chunk_size=None,
+    file_format=None,
 ):
 
     """Function to prep the data for demographic/ML synthesis.
@@ -150,6 +195,13 @@ def prep_synth_loop(
         A list of columns specified by the user that are to be processed using
         the date handling methods
 
+    chunk_size: integer, optional
+        If set, the file is loaded in chunks of this many rows with a compact
+        schema by open_file().
+
+    file_format: string, optional
+        Either "csv" or "parquet", otherwise taken from the file extension.
+
 
     Returns
     -------
@@ -162,6 +214,10 @@ def prep_synth_loop(
         An index list of the Combi columns used to organise and loop through
         the data.
 
+    group_index: dict
+        real_data_frame is sorted by group and group_index["offsets"] gives
+        the rows of each group in groups_list, see create_group_index().
+
     information_dictionary:
         A dictionary of GMM distributions related to the data points with the
         related means/variances as the dictionary values.
@@ -181,10 +237,31 @@ def prep_synth_loop(
         The processed demographic variables (inlcuding synthetic labels now)
         for further processing.
 
+    preprocessed_data: dict
+        The label encoded and filtered real data before GMM grouping, along
+        with the mapping_dict, m_values_list, groups_list and date column
+        information. Used by filtered_data_export() to save the filtered real
+        data without reloading the file.
+
     """
 
+    # Only the columns used in synthesis are read from the file
+    needed_columns = list(
+        dict.fromkeys(
+            categorical_variables
+            + (numeric_group_vars or [])
+            + (date_columns or [])
+            + (synth_label_cols or [])
+        )
+    )
+
     # Get the main file - tkinter interface
-    main_file = open_file(file_path)
+    main_file = open_file(
+        file_path,
+        chunk_size=chunk_size,
+        columns=needed_columns,
+        file_format=file_format,
+    )
 
     ### Putting in print set up
 
@@ -217,7 +294,13 @@ def prep_synth_loop(
         print("\n")
         print("Cutting variables to size needed")
 
-        main_file = string_cut(main_file, length_cuts, cutting_vars)
+        if isinstance(length_cuts, list):
+            # One length per column, as in the control file
+            for column, length_cut in zip(cutting_vars, length_cuts):
+                main_file = string_cut(main_file, int(length_cut), [column])
+
+        else:
+            main_file = string_cut(main_file, length_cuts, cutting_vars)
 
     else:
         main_file = main_file
@@ -258,10 +341,6 @@ def prep_synth_loop(
         categorical_variables = categorical_variables + working_date_columns
 
     if date_columns is None:
-        demographic_variables = demographic_variables
-        categorical_variables = categorical_variables
-
-    else:
         main_file = main_file
         demographic_variables = demographic_variables
         categorical_variables = categorical_variables
@@ -300,13 +379,23 @@ def prep_synth_loop(
         + str(remove_small_vals)
     )
 
-    real_data_frame, groups_list = create_filtered_index(
+    real_data_frame, groups_list, group_index = create_filtered_index(
         real_data_frame,
         combination_cols,
         remove_small_vals,
         print_statement=True,
     )
 
+    # Keep the filtered data for the filtered real data file, so that file
+    # does not need the input file loaded and processed a second time
+    preprocessed_data = {
+        "real_data_frame": real_data_frame,
+        "mapping_dict": mapping_dict,
+        "m_values_list": m_values_list,
+        "groups_list": groups_list,
+        "processed_date_columns_reverse": processed_date_columns_reverse,
+    }
+
     # Automatic binning of variables
     if len(numeric_group_vars) != 0:
         real_data_frame, information_dictionary, threshold_hit = GMM_Transform(
@@ -316,6 +405,11 @@ def prep_synth_loop(
             cutoff=GMM_cutoff,
         )
 
+        # Grouping can drop or move rows so the offsets are rebuilt
+        real_data_frame, group_index = create_group_index(
+            real_data_frame, groups_list, lookup=group_index["lookup"]
+        )
+
     if len(numeric_group_vars) == 0:
         real_data_frame = real_data_frame
         information_dictionary = []
@@ -324,6 +418,7 @@ def prep_synth_loop(
     return (
         real_data_frame,
         groups_list,
+        group_index,
         information_dictionary,
         threshold_hit,
         m_values_list,
@@ -333,6 +428,752 @@ def prep_synth_loop(
         m_values_list,
         processed_date_columns_reverse,
         machine_learning_variables,
+        preprocessed_data,
+    )
+
+
+def cached_prep_synth_loop(
+    cache_directory=None, cache_size_limit=None, **prep_arguments
+):
+
+    """Runs prep_synth_loop, reusing a saved result if the same file has
+            already been processed with the same settings.
+
+    Parameters
+    ----------
+    cache_directory: string, optional
+        Folder the processed data is saved in. If None then no caching is
+        done and prep_synth_loop is simply called.
+
+    cache_size_limit: integer, optional
+        Largest size of the cache folder in megabytes. Least recently used
+        entries are removed beyond this, and outputs larger than it are not
+        cached (default = 10000).
+
+    **prep_arguments:
+        All arguments of prep_synth_loop.
+
+
+    Returns
+    -------
+    The same outputs as prep_synth_loop.
+
+    """
+
+    if cache_directory is None:
+        return prep_synth_loop(**prep_arguments)
+
+    if cache_size_limit is None:
+        cache_size_limit = 10000
+
+    os.makedirs(cache_directory, exist_ok=True)
+
+    # Settings that change the output, the file is hashed seperately
+    key_config = {
+        key: value
+        for key, value in prep_arguments.items()
+        if key not in ("file_path", "GPU_IDs", "chunk_size", "file_format")
+    }
+
+    key = cache_key(prep_arguments["file_path"], key_config)
+
+    cache_path = os.path.join(cache_directory, "prep_" + key + ".pkl")
+
+    if os.path.exists(cache_path):
+        print("\n")
+        print("Loading pre-processed data from cache: " + cache_path)
+
+        with open(cache_path, "rb") as f:
+            prep_outputs = loads_compact(f.read())
+
+        touch_cache_file(cache_path)
+
+        return prep_outputs
+
+    prep_outputs = prep_synth_loop(**prep_arguments)
+
+    cache_data = dumps_compact(prep_outputs)
+
+    max_bytes = int(cache_size_limit * 1024 ** 2)
+
+    # An entry bigger than the whole cache would only be evicted again
+    if len(cache_data) > max_bytes:
+        print("\n")
+        print(
+            "Pre-processed data is larger than the cache size limit, so it"
+            + " is not cached"
+        )
+
+        return prep_outputs
+
+    print("\n")
+    print("Saving pre-processed data to cache: " + cache_path)
+
+    atomic_write_bytes(cache_path, cache_data)
+
+    evict_cache(
+        cache_directory, max_bytes, suffixes=CACHE_SUFFIXES, keep=(cache_path,)
+    )
+
+    return prep_outputs
+
+
+def init_batch_worker():
+
+    """ Runs once in each worker process. Forked workers start with a copy
+            of the main process' numpy random state, so it is reseeded from
+            the operating system to stop workers repeating each other.
+
+    Returns
+    -------
+    None.
+    """
+
+    np.random.seed()
+
+
+# The shared real data and settings of a worker process
+_worker_state = {}
+
+
+def init_shared_batch_worker(frame_spec, batch_settings):
+
+    """ Runs once in each worker process to map the shared real data, so
+            batches only need to send their row numbers.
+
+    Parameters
+    ----------
+    frame_spec: dict
+        Made by export_shared_frame().
+
+    batch_settings: dict
+        The settings shared by every batch, made by synthesis_loop_system().
+
+
+    Returns
+    -------
+    None.
+    """
+
+    init_batch_worker()
+
+    _worker_state["codes"] = attach_shared_frame(frame_spec)
+    _worker_state["frame_spec"] = frame_spec
+    _worker_state["batch_settings"] = batch_settings
+
+
+def synthesise_shared_batch(row_start, row_end, seed=None):
+
+    """ Runs synthesise_batch() on rows of the shared real data in a worker
+            set up by init_shared_batch_worker().
+
+    Parameters
+    ----------
+    row_start: integer
+        First row of the batch in the sorted real data.
+
+    row_end: integer
+        Row after the last row of the batch.
+
+    seed: integer, optional
+        See synthesise_batch().
+
+
+    Returns
+    -------
+    The same outputs as synthesise_batch().
+    """
+
+    working_real_data = shared_frame_view(
+        _worker_state["codes"], _worker_state["frame_spec"], row_start, row_end
+    )
+
+    return synthesise_batch(
+        working_real_data, _worker_state["batch_settings"], seed
+    )
+
+
+def training_seed(seed=None):
+
+    """ The seed of the train/test splits of a batch.
+
+    Parameters
+    ----------
+    seed: integer, optional
+        The seed of the batch. If None a CSPRNG value is used.
+
+
+    Returns
+    -------
+    secure_seed_num: integer
+        Between 0 and 999.
+    """
+
+    if seed is not None:
+        return seed % 1000
+
+    ### Generate CSPRNG value for seed
+    seed_num = secrets.SystemRandom()
+
+    return seed_num.randrange(0, 1000)
+
+
+def fit_batch(working_real_data, batch_settings, seed=None):
+
+    """ Works out everything needed to synthesise one batch of groups: the
+            probabilities of the demographic variables and the models of the
+            ML variables. Only this step uses the real data.
+
+    Parameters
+    ----------
+    working_real_data: pd.DataFrame
+        The real data of the groups in this batch.
+
+    batch_settings: dict
+        The settings shared by every batch, made by synthesis_loop_system().
+
+    seed: integer, optional
+        If set, the train/test splits of this batch are seeded with it.
+        Otherwise the splits are random and cached models are reused
+        whatever split they were trained on.
+
+
+    Returns
+    -------
+    batch_model: dict
+        The real rows in the batch, the demographic probabilities, the ML
+        target plans and the model_report (the target and training device of
+        each tree model). Pass it to sample_batch().
+    """
+
+    demographic_variables = batch_settings["demographic_variables"]
+
+    """ Probabilities of the demographic variables """
+    tables = demographic_tables(working_real_data, demographic_variables)
+
+    """ Models of the ML variables """
+    model_report = []
+
+    target_plans = fit_target_plans(
+        feed_real_data_sub_df=working_real_data,
+        demographic_vars=demographic_variables,
+        GPU_IDs=batch_settings["GPU_IDs"],
+        ml_variables=batch_settings["machine_learning_variables"],
+        categorical_variables=batch_settings["categorical_variables"],
+        seed_training=training_seed(seed),
+        mapping_dict=batch_settings["mapping_dict"],
+        thread_count=batch_settings["thread_count"],
+        task_type=batch_settings["task_type"],
+        model_report=model_report,
+        tree_iterations=batch_settings["tree_iterations"],
+        tree_depth=batch_settings["tree_depth"],
+        early_stopping_rounds=batch_settings["early_stopping_rounds"],
+        fit_workers=batch_settings["fit_workers"],
+        empirical_threshold=batch_settings["empirical_threshold"],
+        weighted_training=batch_settings["weighted_training"],
+        rare_class_threshold=batch_settings["rare_class_threshold"],
+        label_prefixes=batch_settings["label_prefixes"],
+        branch_min_rows=batch_settings["branch_min_rows"],
+        cache_directory=batch_settings["cache_directory"],
+        cache_size_limit=batch_settings["cache_size_limit"],
+        seeded_training=seed is not None,
+    )
+
+    batch_model = {
+        "real_rows": len(working_real_data),
+        "demographic_tables": tables,
+        "target_plans": target_plans,
+        "model_report": model_report,
+    }
+
+    return batch_model
+
+
+def sample_batch(batch_model, batch_settings, seed=None):
+
+    """ Synthesises one batch of groups from fit_batch(), without the real
+            data.
+
+    Parameters
+    ----------
+    batch_model: dict
+        Made by fit_batch().
+
+    batch_settings: dict
+        The settings shared by every batch, made by synthesis_loop_system().
+        The batch gets its share of batch_settings["size_of_synth_rows"].
+
+    seed: integer, optional
+        If set, the sampling and noise of this batch are seeded with it.
+        Otherwise they are drawn fresh from the OS and a CSPRNG.
+
+
+    Returns
+    -------
+    final_data_out: pd.DataFrame
+        The synthetic data of the batch. If batch_settings["post_process"] is
+        set, it has been turned back into the values of the original file.
+
+    removal_columns: list
+        A list of synthetic columns that were removed.
+    """
+
+    categorical_variables = batch_settings["categorical_variables"]
+    mapping_dict = batch_settings["mapping_dict"]
+    numeric_group_vars = batch_settings["numeric_group_vars"]
+
+    # Always reset both sources, so an unseeded batch after a seeded one (in
+    # the same process or worker) doesn't carry on the seeded noise
+    if seed is not None:
+        np.random.seed(seed)
+    else:
+        np.random.seed()
+
+    set_sampling_seed(seed)
+
+    # Share of the real data in this batch
+    current_sample = (
+        batch_model["real_rows"] / batch_settings["real_data_size"]
+    )
+
+    """ Synthesise demographic variables"""
+    synthetic_demo = demographic_sample(
+        batch_model["demographic_tables"],
+        batch_settings["demographic_variables"],
+        int(batch_settings["size_of_synth_rows"] * current_sample),
+        current_sample * 100,
+    )
+
+    """ Synthesise ML variables"""
+    machine_synthesis_df = predict_target_plans(
+        batch_model["target_plans"], synthetic_demo
+    )
+
+    """Do inversion of GMM model here"""
+    final_synth_df = grouping_reversal(
+        dataframe=machine_synthesis_df,
+        thres_hit_check=batch_settings["threshold_hit"],
+        information_dictionary=batch_settings["information_dictionary"],
+        grouped_cols=numeric_group_vars,
+    )
+
+    """ Removing Synthetic Labels """
+    final_data_out, removal_columns = remove_synth_labels(final_synth_df)
+
+    post_process = batch_settings["post_process"]
+
+    if post_process is not None:
+        """ Decode this batch so it can be saved straight away """
+        final_data_out = post_process_batch(
+            final_data_out,
+            mapping_dict=mapping_dict,
+            categorical_variables=categorical_variables,
+            numeric_group_vars=numeric_group_vars,
+            m_values_list=post_process["m_values_list"],
+            removal_columns=removal_columns,
+            processed_date_columns_reverse=(
+                post_process["processed_date_columns_reverse"]
+            ),
+            date_columns=post_process["date_columns"],
+        )
+
+    return (final_data_out, removal_columns)
+
+
+def synthesise_batch(working_real_data, batch_settings, seed=None):
+
+    """ Synthesises one batch of groups. This is a top level function so it
+            can be run by worker processes.
+
+    Parameters
+    ----------
+    working_real_data: pd.DataFrame
+        The real data of the groups in this batch.
+
+    batch_settings: dict
+        The settings shared by every batch, made by synthesis_loop_system().
+
+    seed: integer, optional
+        If set, the sampling, noise and train/test split of this batch are
+        seeded with it.
+
+
+    Returns
+    -------
+    final_data_out: pd.DataFrame
+        The synthetic data of the batch. If batch_settings["post_process"] is
+        set, it has been turned back into the values of the original file.
+
+    removal_columns: list
+        A list of synthetic columns that were removed.
+
+    model_report: list
+        The target and training device of each tree model.
+    """
+
+    batch_model = fit_batch(working_real_data, batch_settings, seed)
+
+    final_data_out, removal_columns = sample_batch(
+        batch_model, batch_settings, seed
+    )
+
+    return (final_data_out, removal_columns, batch_model["model_report"])
+
+
+def batch_real_data(
+    real_data_frame, groups_list, group_index, group_start, group_end
+):
+
+    """ Takes the real data of one batch of groups.
+
+    Parameters
+    ----------
+    real_data_frame: pd.DataFrame
+        The real data.
+
+    groups_list: list
+        The Combi groups in order.
+
+    group_index: dict or None
+        Made by create_group_index(). If given, the batch is a contiguous
+        slice of rows rather than a search of the Combi column.
+
+    group_start: integer
+        First group of the batch.
+
+    group_end: integer
+        Group after the last group of the batch.
+
+
+    Returns
+    -------
+    working_real_data: pd.DataFrame
+        The real data of the groups in the batch.
+    """
+
+    if group_index is not None:
+        return group_slice(
+            real_data_frame, group_index, group_start, group_end
+        )
+
+    # Current working list
+    current_working_list = groups_list[group_start:group_end]
+
+    return real_data_frame[real_data_frame["Combi"].isin(current_working_list)]
+
+
+def synthesis_batches(
+    real_data_frame,
+    groups_list,
+    group_size,
+    demographic_variables,
+    size_of_synth_rows,
+    machine_learning_variables,
+    categorical_variables,
+    threshold_hit,
+    GPU_IDs,
+    information_dictionary,
+    numeric_group_vars,
+    mapping_dict,
+    processed_date_columns_reverse,
+    decode=False,
+    m_values_list=None,
+    date_columns=None,
+    group_index=None,
+    target_batch_rows=None,
+    max_batch_groups=None,
+    n_workers=None,
+    random_seed=None,
+    task_type=None,
+    tree_iterations=None,
+    tree_depth=None,
+    early_stopping_rounds=None,
+    fit_workers=None,
+    empirical_threshold=None,
+    weighted_training=None,
+    rare_class_threshold=None,
+    label_prefixes=None,
+    branch_min_rows=None,
+    cache_directory=None,
+    cache_size_limit=None,
+    run_directory=None,
+    resume=False,
+):
+
+    """ Synthesises the Combi batches one after another and yields each as
+            soon as it is finished, in batch order.
+
+    A batch is only synthesised when the one before it has been taken, so a
+    slow consumer holds up the synthesis rather than finished batches piling
+    up in memory. With n_workers at most 2 * n_workers batches are worked on
+    ahead of the consumer.
+
+    Parameters
+    ----------
+    decode: boolean, optional
+        If True, each batch is turned back into the values of the original
+        file with post_process_batch() before it is yielded, which needs
+        m_values_list and date_columns (default = False).
+
+    All other parameters are those of synthesis_loop_system().
+
+
+    Returns
+    -------
+    A generator of (group_start, group_end, final_data_out, removal_columns)
+    tuples, one per batch, where final_data_out is the synthetic data of the
+    groups from group_start up to group_end and removal_columns are the
+    synthetic label columns that were removed from it.
+    """
+
+    # Get size of real data
+    real_data_size = len(real_data_frame)
+
+    # Rows in each group, used to size the batches
+    if group_index is not None:
+        group_counts = np.diff(group_index["offsets"])
+
+    else:
+        group_counts = (
+            real_data_frame.Combi.value_counts()
+            .reindex(groups_list, fill_value=0)
+            .values
+        )
+
+    # Create a variable to pipe into main_control_loop
+    final_size = len(group_counts)
+
+    # Main loop for setting length of groups
+    main_control_loop = schedule_batches(
+        group_counts,
+        group_size=group_size,
+        target_rows=target_batch_rows,
+        max_groups=max_batch_groups,
+    )
+
+    print("\n")
+    print(
+        "Synthesising "
+        + str(final_size)
+        + " groups in "
+        + str(len(main_control_loop))
+        + " batches"
+    )
+
+    # Settings that are the same for every batch
+    batch_settings = {
+        "demographic_variables": demographic_variables,
+        "categorical_variables": categorical_variables,
+        "machine_learning_variables": machine_learning_variables,
+        "GPU_IDs": GPU_IDs,
+        "mapping_dict": mapping_dict,
+        "numeric_group_vars": numeric_group_vars,
+        "threshold_hit": threshold_hit,
+        "information_dictionary": information_dictionary,
+        "real_data_size": real_data_size,
+        "size_of_synth_rows": size_of_synth_rows,
+        "thread_count": None,
+        "task_type": task_type,
+        "tree_iterations": tree_iterations,
+        "tree_depth": tree_depth,
+        "early_stopping_rounds": early_stopping_rounds,
+        "fit_workers": fit_workers,
+        "empirical_threshold": empirical_threshold,
+        "weighted_training": weighted_training,
+        "rare_class_threshold": rare_class_threshold,
+        "label_prefixes": label_prefixes,
+        "branch_min_rows": branch_min_rows,
+        "cache_directory": cache_directory,
+        "cache_size_limit": cache_size_limit,
+        "post_process": None,
+    }
+
+    if decode:
+        batch_settings["post_process"] = {
+            "m_values_list": m_values_list,
+            "processed_date_columns_reverse": processed_date_columns_reverse,
+            "date_columns": date_columns,
+        }
+
+    # Batches finished by an earlier run are loaded rather than synthesised
+    finished = {}
+
+    if run_directory is not None:
+        manifest = open_run(
+            run_directory,
+            run_key(
+                real_data_frame, batch_settings, main_control_loop, random_seed
+            ),
+            random_seed=random_seed,
+            resume=resume,
+        )
+
+        finished = manifest["finished"]
+
+        print("\n")
+        print(
+            "Saving finished batches to: "
+            + str(run_directory)
+            + " ("
+            + str(len(finished))
+            + " of "
+            + str(len(main_control_loop))
+            + " already finished)"
+        )
+
+    # Parallel batches read the real data from a shared file of codes
+    shared_data = (
+        n_workers is not None and n_workers > 1 and group_index is not None
+    )
+
+    def batch_jobs():
+
+        for batch_number, (group_start, group_end) in enumerate(
+            main_control_loop
+        ):
+
+            if str(batch_number) in finished:
+                continue
+
+            # Update statement
+            print("\n")
+            print("**********************************************************")
+            print(
+                "Starting on groups: "
+                + str(group_start)
+                + " to "
+                + str(group_end)
+                + " of "
+                + str(final_size)
+                + " ("
+                + str(int(group_counts[group_start:group_end].sum()))
+                + " rows)"
+            )
+            print("**********************************************************")
+
+            if shared_data:
+                # Only the rows to read are sent to the worker
+                offsets = group_index["offsets"]
+                number_groups = len(offsets) - 1
+
+                yield (
+                    int(offsets[min(group_start, number_groups)]),
+                    int(offsets[min(group_end, number_groups)]),
+                    batch_seed(random_seed, batch_number),
+                )
+
+            else:
+                yield (
+                    batch_real_data(
+                        real_data_frame,
+                        groups_list,
+                        group_index,
+                        group_start,
+                        group_end,
+                    ),
+                    batch_settings,
+                    batch_seed(random_seed, batch_number),
+                )
+
+    frame_spec = None
+
+    if n_workers is None or n_workers <= 1:
+        batch_results = (synthesise_batch(*job) for job in batch_jobs())
+
+    else:
+        # Share the cores between the workers
+        batch_settings["thread_count"] = batch_thread_count(n_workers)
+
+        print("\n")
+        print(
+            "Running batches on "
+            + str(n_workers)
+            + " workers with "
+            + str(batch_settings["thread_count"])
+            + " threads each"
+        )
+
+        if shared_data:
+            # Written once, the workers map it rather than each getting a copy
+            frame_spec = export_shared_frame(real_data_frame)
+
+            batch_results = ordered_parallel_map(
+                synthesise_shared_batch,
+                batch_jobs(),
+                n_workers,
+                initializer=init_shared_batch_worker,
+                initargs=(frame_spec, batch_settings),
+            )
+
+        else:
+            batch_results = ordered_parallel_map(
+                synthesise_batch,
+                batch_jobs(),
+                n_workers,
+                initializer=init_batch_worker,
+            )
+
+    # Number of models trained on each device or loaded from the cache
+    device_counts = {}
+
+    try:
+        for batch_number, (group_start, group_end) in enumerate(
+            main_control_loop
+        ):
+
+            if str(batch_number) in finished:
+                print("\n")
+                print(
+                    "Loading finished groups: "
+                    + str(group_start)
+                    + " to "
+                    + str(group_end)
+                )
+
+                final_data_out, removal_columns = load_batch(
+                    run_directory, batch_number
+                )
+
+                yield (group_start, group_end, final_data_out, removal_columns)
+
+                continue
+
+            # Results come back in batch order
+            final_data_out, removal_columns, model_report = next(batch_results)
+
+            for model in model_report:
+                if model.get("cached"):
+                    source = "from cache"
+                else:
+                    source = "on " + model["device"]
+
+                device_counts[source] = device_counts.get(source, 0) + 1
+
+            if run_directory is not None:
+                save_batch(
+                    run_directory,
+                    manifest,
+                    batch_number,
+                    (group_start, group_end),
+                    (final_data_out, removal_columns),
+                )
+
+            yield (group_start, group_end, final_data_out, removal_columns)
+
+    finally:
+        # Also runs if the consumer stops early
+        batch_results.close()
+
+        if frame_spec is not None:
+            release_shared_frame(frame_spec)
+
+    print("\n")
+    print(
+        "Models used: "
+        + ", ".join(
+            str(count) + " " + source
+            for source, count in sorted(device_counts.items())
+        )
     )
 
 
@@ -350,6 +1191,28 @@ def synthesis_loop_system(
     numeric_group_vars,
     mapping_dict,
     processed_date_columns_reverse,
+    batch_writer=None,
+    m_values_list=None,
+    date_columns=None,
+    group_index=None,
+    target_batch_rows=None,
+    max_batch_groups=None,
+    n_workers=None,
+    random_seed=None,
+    task_type=None,
+    tree_iterations=None,
+    tree_depth=None,
+    early_stopping_rounds=None,
+    fit_workers=None,
+    empirical_threshold=None,
+    weighted_training=None,
+    rare_class_threshold=None,
+    label_prefixes=None,
+    branch_min_rows=None,
+    cache_directory=None,
+    cache_size_limit=None,
+    run_directory=None,
+    resume=False,
 ):
 
     """ Ingests all information from the Synth_Control_Function() function.
@@ -410,21 +1273,102 @@ def synthesis_loop_system(
         A list of columns to be handled by the reversing methods for date 
         columns. 
 
+    batch_writer: Batch_File_Writer, optional
+        If given, each batch is decoded with post_process_batch() and written
+        to file as soon as it is finished, instead of being kept in
+        main_list. Memory use is then bounded by one batch.
+
+    m_values_list: list, optional
+        A list of '_Missing' markers, needed with batch_writer.
+
+    date_columns: list, optional
+        The user's date columns, needed with batch_writer.
+
+    group_index: dict, optional
+        Made by create_group_index(). If given, real_data_frame must be
+        sorted by group and each batch is taken as a contiguous slice of
+        rows rather than by searching the Combi column.
+
+    target_batch_rows: integer, optional
+        If set, groups are packed into batches of about this many rows
+        instead of batches of group_size groups. See schedule_batches().
+
+    max_batch_groups: integer, optional
+        The most groups allowed in one batch when target_batch_rows is set.
+
+    n_workers: integer, optional
+        If above 1, batches are synthesised at the same time in this many
+        worker processes. The cores are shared out between the workers'
+        models. Batches are still saved in order. With group_index the real
+        data is shared with the workers through a memory mapped file rather
+        than copied to them batch by batch.
+
+    random_seed: integer, optional
+        If set, each batch is seeded from this and its batch number so a run
+        can be repeated, whatever the number of workers.
+
+    task_type: string, optional
+        "CPU", "GPU" or "auto" (default), the device the tree models are
+        trained on. See training_device().
+
+    tree_iterations: integer or "auto", optional
+        The number of iterations of each tree model, see tree_settings().
+
+    tree_depth: integer or "auto", optional
+        The depth of each tree model, see tree_settings().
+
+    early_stopping_rounds: integer, optional
+        Early stopping of each tree model, see tree_synth().
+
+    fit_workers: integer, optional
+        The models of this many targets are trained at the same time, see
+        Machine_Learning_Synthesis().
+
+    empirical_threshold: integer, optional
+        Batches with fewer real rows than this are sampled from the real data
+        rather than modelled, see Machine_Learning_Synthesis().
+
+    weighted_training: boolean or "auto", optional
+        Training on the unique rows with weights, see tree_fit().
+
+    rare_class_threshold: integer, optional
+        Pooling of rare target classes, see Machine_Learning_Synthesis().
+
+    label_prefixes: dict, optional
+        The prefix column of each machine learning column synthesised in two
+        stages, see label_prefix_columns().
+
+    branch_min_rows: integer, optional
+        Smallest prefix given its own model, see fit_branches().
+
+    cache_directory: string, optional
+        Folder of the model cache, see tree_fit().
+
+    cache_size_limit: integer, optional
+        Largest size of the cache folder in megabytes.
+
+    run_directory: string, optional
+        If set, each finished batch is saved in this folder with a manifest
+        of the finished batches, see open_run(). random_seed must be set.
+
+    resume: boolean, optional
+        If True, the batches already finished in run_directory are loaded
+        rather than synthesised again. The output is the same as a run that
+        was never stopped (default = False).
+
     Returns
     -------
     main_list: list, pd.DataFrames
-        The synthetic data where each index value in main_list is a seperate
-        group in the group index.
+        The synthetic data, made batch by batch by synthesis_batches(), where
+        each index value in main_list is a seperate group in the group
+        index. Empty if batch_writer is used.
 
     removal_columns: list
         A list of synthetic columns to be removed.
-    """
-
-    # Get size of real data
-    real_data_size = len(real_data_frame)
 
-    # Create a variable to pipe into main_control_loop
-    final_size = len(real_data_frame.Combi.value_counts())
+    original_data_list: list, pd.DataFrames
+        The real data of each group. Empty if batch_writer is used.
+    """
 
     # This will be the main synthetic dataframe collection point
     main_list = list()
@@ -432,82 +1376,65 @@ def synthesis_loop_system(
     # This is the real data list
     original_data_list = list()
 
-    # Main loop for setting length of groups
-    main_control_loop = [
-        ((i), (i + group_size)) for i in range(0, final_size, group_size)
-    ]
-
-    for group_start, group_end in main_control_loop:
-
-        # Update statement
-        print("\n")
-        print("**********************************************************")
-        print(
-            "Starting on groups: "
-            + str(group_start)
-            + " to "
-            + str(group_end)
-            + " of "
-            + str(final_size)
-        )
-        print("**********************************************************")
-
-        # Current working list
-        current_working_list = groups_list[group_start:group_end]
-
-        # Create a dataframe of current group data to be worked on
-        working_real_data = real_data_frame[
-            real_data_frame["Combi"].isin(current_working_list)
-        ]
+    # Synthetic label columns, found by remove_synth_labels
+    removal_columns = []
+
+    batches = synthesis_batches(
+        real_data_frame=real_data_frame,
+        groups_list=groups_list,
+        group_size=group_size,
+        demographic_variables=demographic_variables,
+        size_of_synth_rows=size_of_synth_rows,
+        machine_learning_variables=machine_learning_variables,
+        categorical_variables=categorical_variables,
+        threshold_hit=threshold_hit,
+        GPU_IDs=GPU_IDs,
+        information_dictionary=information_dictionary,
+        numeric_group_vars=numeric_group_vars,
+        mapping_dict=mapping_dict,
+        processed_date_columns_reverse=processed_date_columns_reverse,
+        decode=batch_writer is not None,
+        m_values_list=m_values_list,
+        date_columns=date_columns,
+        group_index=group_index,
+        target_batch_rows=target_batch_rows,
+        max_batch_groups=max_batch_groups,
+        n_workers=n_workers,
+        random_seed=random_seed,
+        task_type=task_type,
+        tree_iterations=tree_iterations,
+        tree_depth=tree_depth,
+        early_stopping_rounds=early_stopping_rounds,
+        fit_workers=fit_workers,
+        empirical_threshold=empirical_threshold,
+        weighted_training=weighted_training,
+        rare_class_threshold=rare_class_threshold,
+        label_prefixes=label_prefixes,
+        branch_min_rows=branch_min_rows,
+        cache_directory=cache_directory,
+        cache_size_limit=cache_size_limit,
+        run_directory=run_directory,
+        resume=resume,
+    )
 
-        # Create current percentage
-        cur_percent = (len(working_real_data) / real_data_size) * 100
+    for group_start, group_end, final_data_out, removal_columns in batches:
 
-        """ Synthesise demographic variables"""
-        # Create synthetic demo vars
-        cat_demo_variables = list(
-            set(demographic_variables).intersection(categorical_variables)
-        )
+        if batch_writer is not None:
+            """ Save this batch straight away """
+            batch_writer.write(final_data_out)
 
-        synthetic_demo = Demographic_Synthesis(
-            real_dataframe=working_real_data,
-            demo_vars=demographic_variables,
-            cat_demo_vars=cat_demo_variables,
-            original_df_size=real_data_size,
-            synth_df_size=size_of_synth_rows,
-            percent=cur_percent,
-        )
-
-        """ Synthesise ML variables"""
-        ### Generate CSPRNG value for seed
-        seed_num = secrets.SystemRandom()
-        secure_seed_num = seed_num.randrange(0, 1000)
-
-        machine_synthesis_df = Machine_Learning_Synthesis(
-            feed_real_data_sub_df=working_real_data,
-            prob_synth_df=synthetic_demo,
-            demographic_vars=demographic_variables,
-            GPU_IDs=GPU_IDs,
-            ml_variables=machine_learning_variables,
-            categorical_variables=categorical_variables,
-            seed_training=secure_seed_num,
-            mapping_dict=mapping_dict,
-            numeric_group_vars=numeric_group_vars,
-        )
+            continue
 
-        """Do inversion of GMM model here"""
-        final_synth_df = grouping_reversal(
-            dataframe=machine_synthesis_df,
-            thres_hit_check=threshold_hit,
-            information_dictionary=information_dictionary,
-            grouped_cols=numeric_group_vars,
+        working_real_data, out = remove_synth_labels(
+            batch_real_data(
+                real_data_frame,
+                groups_list,
+                group_index,
+                group_start,
+                group_end,
+            )
         )
 
-        """ Removing Synthetic Labels """
-        final_data_out, removal_columns = remove_synth_labels(final_synth_df)
-
-        working_real_data, out = remove_synth_labels(working_real_data)
-
         del out
 
         """Append to mainlist of dataframes"""
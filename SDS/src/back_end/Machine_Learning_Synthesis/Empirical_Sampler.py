@@ -0,0 +1,178 @@
+# coding: utf-8
+
+# Standard Libraries
+import numpy as np
+import pandas as pd
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains a fast alternative to the tree models for small groups.
+Rather than training a model, the target is sampled from the real rows that
+share the synthetic row's values of the columns before it (its context). If
+no real row has that context, the last column is dropped from the context
+and so on (backoff), down to the target's overall distribution. Everything
+is done with numpy lookups over the whole synthetic frame at once.
+"""
+
+
+def context_levels(real_parents, synth_parents):
+
+    """ Gives each row a context id for every backoff level.
+
+    Parameters
+    ----------
+    real_parents: pd.DataFrame
+        The columns before the target in the real data.
+
+    synth_parents: pd.DataFrame
+        The same columns in the synthetic data.
+
+
+    Returns
+    -------
+    levels: list
+        A (real_context, synth_context) tuple of np.arrays per level, where
+        level k uses the first k columns. A context id means the same values
+        in the real and synthetic data.
+    """
+
+    number_real = len(real_parents)
+
+    real_context = np.zeros(number_real, dtype=np.int64)
+    synth_context = np.zeros(len(synth_parents), dtype=np.int64)
+
+    levels = [(real_context, synth_context)]
+
+    combined = np.concatenate([real_context, synth_context])
+
+    for column in list(real_parents):
+
+        # Codes shared by the real and synthetic values of the column
+        column_codes, column_uniques = pd.factorize(
+            np.concatenate(
+                [
+                    real_parents[column].to_numpy(dtype=object),
+                    synth_parents[column].to_numpy(dtype=object),
+                ]
+            )
+        )
+
+        # Add the column to the context and make the ids dense again
+        combined = combined * (len(column_uniques) + 1) + (column_codes + 1)
+        combined, combined_uniques = pd.factorize(combined)
+
+        levels.append((combined[:number_real], combined[number_real:]))
+
+    return levels
+
+
+def constant_features(real_data, feature_names):
+
+    """ Checks whether a tree model would have nothing to split on, as in a
+            batch of a single group, where the Combi columns (often all of
+            the demographic variables) only have one value.
+
+    Parameters
+    ----------
+    real_data: pd.DataFrame
+        The real data the model would be trained on.
+
+    feature_names: list
+        The columns the model would be trained on.
+
+
+    Returns
+    -------
+    constant: boolean
+        True if every feature has at most one value, in which case the
+        target is sampled rather than modelled.
+    """
+
+    return all(real_data[x].nunique(dropna=False) <= 1 for x in feature_names)
+
+
+def empirical_sample(
+    real_parents, real_target, synth_parents, random_state=None
+):
+
+    """ Samples a target column from its empirical distribution given the
+            columns before it, backing off to fewer columns when a context
+            is not in the real data.
+
+    Parameters
+    ----------
+    real_parents: pd.DataFrame
+        The columns before the target in the real data.
+
+    real_target: pd.Series
+        The target column of the real data.
+
+    synth_parents: pd.DataFrame
+        The same columns as real_parents in the synthetic data.
+
+    random_state: np.random.RandomState, optional
+        Source of randomness, by default the global numpy one.
+
+
+    Returns
+    -------
+    synth_target: np.array
+        A sampled target value for each synthetic row.
+    """
+
+    if random_state is None:
+        random_state = np.random
+
+    real_values = np.asarray(real_target, dtype=object)
+
+    number_synth = len(synth_parents)
+
+    synth_target = np.empty(number_synth, dtype=object)
+
+    if len(real_values) == 0 or number_synth == 0:
+        return synth_target
+
+    assigned = np.zeros(number_synth, dtype=bool)
+
+    # Deepest context first
+    for real_context, synth_context in reversed(
+        context_levels(real_parents, synth_parents)
+    ):
+        rows = np.flatnonzero(~assigned)
+
+        if len(rows) == 0:
+            break
+
+        number_contexts = 1 + max(
+            int(real_context.max(initial=-1)),
+            int(synth_context.max(initial=-1)),
+        )
+
+        # Real rows of each context are one block once sorted
+        order = np.argsort(real_context, kind="stable")
+        sorted_values = real_values[order]
+
+        counts = np.bincount(real_context, minlength=number_contexts)
+        starts = np.cumsum(counts) - counts
+
+        row_contexts = synth_context[rows]
+        seen = counts[row_contexts] > 0
+
+        rows = rows[seen]
+        row_contexts = row_contexts[seen]
+
+        # A random real row of the same context
+        picks = starts[row_contexts] + (
+            random_state.random_sample(len(rows)) * counts[row_contexts]
+        ).astype(np.int64)
+
+        synth_target[rows] = sorted_values[picks]
+        assigned[rows] = True
+
+    return synth_target
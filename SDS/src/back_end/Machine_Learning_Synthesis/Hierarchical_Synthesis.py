@@ -0,0 +1,194 @@
+# coding: utf-8
+
+# Standard Libraries
+import numpy as np
+
+from SDS.src.back_end.Machine_Learning_Synthesis.Empirical_Sampler import (
+    constant_features,
+    empirical_sample,
+)
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the functions for synthesising codes with a prefix
+structure (such as ICD diagnosis codes) in two stages. The synthetic label
+made by synth_label_create() is the prefix of its column, and it is
+synthesised first with the demographic variables. The full code is then
+synthesised separately within each prefix (branch), by a small tree model or
+by sampling the real rows of the branch. Each model only has the classes of
+its branch, so the cost grows with the width of the branches rather than the
+number of codes.
+"""
+
+# Branches with fewer real rows than this are sampled rather than modelled
+BRANCH_MODEL_MIN_ROWS = 100
+
+
+def label_prefix_columns(synth_label_cols, machine_learning_variables):
+
+    """ Finds the synthetic label (prefix column) of each machine learning
+            column that has one.
+
+    Parameters
+    ----------
+    synth_label_cols: list
+        The columns the synthetic labels were made from, in order, so the
+        label of synth_label_cols[i] is "Synth_Label_i".
+
+    machine_learning_variables: list
+        The machine learning variables.
+
+
+    Returns
+    -------
+    label_prefixes: dict
+        The prefix column of each machine learning column that has one.
+    """
+
+    label_prefixes = {}
+
+    for number, column in enumerate(synth_label_cols or []):
+        if column in machine_learning_variables:
+            label_prefixes[column] = "Synth_Label_" + str(number)
+
+    return label_prefixes
+
+
+def fit_branches(work_df, target_var, prefix_var, fit_model, min_rows=None):
+
+    """ Works out how the target is synthesised within each prefix.
+
+    Parameters
+    ----------
+    work_df: pd.DataFrame
+        The real data, with the target as the last column.
+
+    target_var: string
+        The column being synthesised.
+
+    prefix_var: string
+        Its prefix column.
+
+    fit_model: callable
+        Trains a model on the real rows of one branch and returns it.
+
+    min_rows: integer, optional
+        Branches with fewer real rows than this are sampled rather than
+        modelled (default = BRANCH_MODEL_MIN_ROWS). Branches whose other
+        columns only have one value are always sampled.
+
+
+    Returns
+    -------
+    branches: dict
+        For each prefix, a tuple of ("constant", value), ("empirical", the
+        real rows of the branch) or ("model", the trained model).
+    """
+
+    if min_rows is None:
+        min_rows = BRANCH_MODEL_MIN_ROWS
+
+    branches = {}
+
+    feature_names = [x for x in list(work_df) if x != target_var]
+
+    for prefix, branch_df in work_df.groupby(prefix_var, sort=False):
+        classes = branch_df[target_var].unique()
+
+        if len(classes) == 1:
+            branches[prefix] = ("constant", classes[0])
+
+        elif len(branch_df) < min_rows or constant_features(
+            branch_df, feature_names
+        ):
+            branches[prefix] = ("empirical", branch_df)
+
+        else:
+            branches[prefix] = ("model", fit_model(branch_df))
+
+    return branches
+
+
+def predict_branches(
+    branches, work_df, target_var, prefix_var, synth_df, random_state=None
+):
+
+    """ Synthesises the target of each synthetic row within its prefix.
+
+    Parameters
+    ----------
+    branches: dict
+        Made by fit_branches().
+
+    work_df: pd.DataFrame
+        The real data, with the target as the last column.
+
+    target_var: string
+        The column being synthesised.
+
+    prefix_var: string
+        Its prefix column, already synthesised.
+
+    synth_df: pd.DataFrame
+        The synthetic data with the same columns as work_df, except the
+        target.
+
+    random_state: np.random.RandomState, optional
+        Source of randomness, by default the global numpy one.
+
+
+    Returns
+    -------
+    predictions: np.array
+        A value of the target for each synthetic row.
+    """
+
+    feature_cols = [x for x in list(work_df) if x != target_var]
+
+    synth_prefixes = synth_df[prefix_var].to_numpy()
+
+    predictions = np.empty(len(synth_df), dtype=object)
+    assigned = np.zeros(len(synth_df), dtype=bool)
+
+    for prefix, (kind, value) in branches.items():
+        rows = np.flatnonzero(synth_prefixes == prefix)
+
+        if len(rows) == 0:
+            continue
+
+        if kind == "constant":
+            predictions[rows] = value
+
+        elif kind == "empirical":
+            predictions[rows] = empirical_sample(
+                value[feature_cols],
+                value[target_var],
+                synth_df.iloc[rows][feature_cols],
+                random_state=random_state,
+            )
+
+        else:
+            predictions[rows] = np.asarray(
+                value.predict(synth_df.iloc[rows][feature_cols])
+            ).ravel()
+
+        assigned[rows] = True
+
+    # A prefix not in the real data can only be sampled from all of it
+    rows = np.flatnonzero(~assigned)
+
+    if len(rows) > 0:
+        predictions[rows] = empirical_sample(
+            work_df[feature_cols],
+            work_df[target_var],
+            synth_df.iloc[rows][feature_cols],
+            random_state=random_state,
+        )
+
+    return predictions
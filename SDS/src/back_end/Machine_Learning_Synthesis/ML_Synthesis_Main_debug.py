@@ -1,20 +1,36 @@
 # coding: utf-8
 
 # Standard Libraries
-import pdb
+from concurrent.futures import ThreadPoolExecutor
 
 # External Libraries
 import numpy as np
 import pandas as pd
-import sklearn as sk
-import scipy
 
 from SDS.src.back_end.Machine_Learning_Synthesis.ML_Synthesis_Utilities import (
     looping_var_list,
     categorical_var_list_creation,
+    share_fit_threads,
 )
 
-from SDS.src.back_end.Tree_Methods.Tree_Functions_debug import tree_synth
+from SDS.src.back_end.Machine_Learning_Synthesis.Empirical_Sampler import (
+    constant_features,
+    empirical_sample,
+)
+
+from SDS.src.back_end.Machine_Learning_Synthesis.Hierarchical_Synthesis import (
+    fit_branches,
+    predict_branches,
+)
+
+from SDS.src.back_end.Machine_Learning_Synthesis.Rare_Class_Pooling import (
+    RARE_CLASS_LABEL,
+    rare_classes,
+    pool_rare_classes,
+    resample_rare_classes,
+)
+
+from SDS.src.back_end.Tree_Methods.Tree_Functions_debug import tree_fit
 
 """
 Please cite this system as:
@@ -33,29 +49,40 @@ IMPORTANT: Just now there is only the method for categorical data. There is a
 """
 
 
-def Machine_Learning_Synthesis(
+def fit_target_plans(
     feed_real_data_sub_df,
-    prob_synth_df,
     demographic_vars,
     ml_variables,
     categorical_variables,
     GPU_IDs,
     seed_training,
     mapping_dict,
-    numeric_group_vars,
+    thread_count=None,
+    task_type=None,
+    model_report=None,
+    tree_iterations=None,
+    tree_depth=None,
+    early_stopping_rounds=None,
+    fit_workers=None,
+    empirical_threshold=None,
+    weighted_training=None,
+    rare_class_threshold=None,
+    label_prefixes=None,
+    branch_min_rows=None,
+    cache_directory=None,
+    cache_size_limit=None,
+    seeded_training=True,
 ):
 
-    """Iterates over real data and conditionally created demographic data to
-            begin synthesising out the non-demographic parts of the real data.
+    """ Trains what is needed to synthesise each non-demographic column of
+            the real data. Only the real data is used, so the result can be
+            used by predict_target_plans() for any number of synthetic rows.
 
     Parameters
     ----------
     feed_real_data_sub_df: pd.DataFrame
         The real data in dataframe format.
 
-    prob_synth_df: pd.DataFrame
-        Demographic variables that were synthesised by Demographic_Synthesis.
-
     demographic_vars: list
         A list of demographic variables.
 
@@ -78,16 +105,68 @@ def Machine_Learning_Synthesis(
         A dictionary of labels and their original values for EACH column.
         Used for checking the data types for error correction.
 
+    thread_count: integer, optional
+        The most CPU threads each tree model can use, see tree_synth().
 
-    numeric_group_vars: list, optional
-        Used to check type of synthesis.
+    task_type: string, optional
+        "CPU", "GPU" or "auto" (default), see tree_synth().
+
+    model_report: list, optional
+        Collects the device each tree model was trained on.
+
+    tree_iterations: integer or "auto", optional
+        The number of iterations of each tree model, see tree_synth().
+
+    tree_depth: integer or "auto", optional
+        The depth of each tree model, see tree_synth().
+
+    early_stopping_rounds: integer, optional
+        Early stopping of each tree model, see tree_synth().
+
+    fit_workers: integer, optional
+        If above 1, the models of up to this many targets are trained at the
+        same time in threads, sharing thread_count between them. Only the
+        predictions need the columns synthesised before, so they are still
+        made one target at a time, in order.
+
+    empirical_threshold: integer, optional
+        If the real data has fewer rows than this, no tree models are
+        trained. Each target is instead sampled from the real rows with the
+        same values of the columns before it, see empirical_sample().
+
+    weighted_training: boolean or "auto", optional
+        Training on the unique rows with weights, see tree_fit().
 
+    rare_class_threshold: integer, optional
+        Classes of a target with fewer real rows than this are trained on
+        as one class. Synthetic rows given that class are then sampled from
+        the real rows of the rare classes, see resample_rare_classes().
+
+    label_prefixes: dict, optional
+        The prefix column of targets synthesised in two stages. Within each
+        value of its prefix column the target has its own small tree model,
+        or is sampled if the prefix has few real rows, see fit_branches().
+
+    branch_min_rows: integer, optional
+        Prefixes with fewer real rows than this are sampled rather than
+        given their own model, see fit_branches().
+
+    cache_directory: string, optional
+        Trained models are saved here and reused when the same data and
+        settings come up again, see tree_fit().
+
+    cache_size_limit: integer, optional
+        Largest size of the cache folder in megabytes, see tree_fit().
+
+    seeded_training: boolean, optional
+        False if seed_training was drawn at random, see tree_fit()
+        (default = True).
 
     Returns
     -------
-    prob_synth_df: pd.DataFrame
-        Pandas dataframe of fully synthesised values for a given subset of the
-        overall real data.
+    target_plans: list
+        A dict for each column, in order, with its trained model or what is
+        needed to sample it.
 
     """
 
@@ -105,11 +184,17 @@ def Machine_Learning_Synthesis(
     # Get number of categorical variables
     number_cat_vars = len(demographic_vars)
 
+    if label_prefixes is None:
+        label_prefixes = {}
+
     # Iterating list for dataframe
     iterating_list = looping_var_list(demographic_vars, ml_variables)
 
     # Need to get synth_df in same order as real_df
 
+    # Work out the data of each target and whether it needs a model
+    target_plans = []
+
     for list_number in range(0, len(iterating_list)):
 
         # Subset out real data needed at this point
@@ -123,9 +208,6 @@ def Machine_Learning_Synthesis(
             work_df, categorical_variables, number_cat_vars
         )
 
-        # Enforcing synthetic data compliance
-        prob_synth_df = prob_synth_df[working_df_names]
-
         try:
             missing_map = mapping_dict[target_var][
                 str(target_var + "_Missing")
@@ -134,37 +216,420 @@ def Machine_Learning_Synthesis(
             testing_value = all((work_df[target_var] == missing_map))
 
         except KeyError:
+            missing_map = None
             testing_value = False
 
+        prefix_var = label_prefixes.get(target_var)
+
+        # Rare classes are trained on as one class, prefixes are already
+        # narrowed down to a few classes
+        if prefix_var is None:
+            rare_values = rare_classes(
+                work_df[target_var], rare_class_threshold
+            )
+
+        else:
+            rare_values = rare_classes(work_df[target_var], None)
+
+        if len(rare_values) > 0:
+            train_df = work_df.copy()
+            train_df[target_var] = pool_rare_classes(
+                work_df[target_var], rare_values
+            )
+
+        else:
+            train_df = work_df
+
+        target_plans.append(
+            {
+                "work_df": work_df,
+                "target_var": target_var,
+                "cat_out": cat_out,
+                "working_df_names": working_df_names,
+                "missing_map": missing_map,
+                "testing_value": testing_value,
+                "number_values": len(work_df[target_var].value_counts()),
+                "first_value": str(work_df[target_var].iloc[0]),
+                "train_df": train_df,
+                "train_classes": train_df[target_var].nunique(),
+                "rare_values": rare_values,
+                "prefix_var": prefix_var,
+                "constant_features": constant_features(
+                    work_df, working_df_names
+                ),
+                "model": None,
+            }
+        )
+
+    """ Train the models, these only need the real data """
+    fit_options = {
+        "thread_count": thread_count,
+        "task_type": task_type,
+        "tree_iterations": tree_iterations,
+        "tree_depth": tree_depth,
+        "early_stopping_rounds": early_stopping_rounds,
+        "weighted_training": weighted_training,
+        "cache_directory": cache_directory,
+        "cache_size_limit": cache_size_limit,
+        "seeded": seeded_training,
+    }
+
+    # Small data is sampled from directly rather than modelled
+    use_empirical = (
+        empirical_threshold is not None
+        and len(feed_real_data_sub_df) < empirical_threshold
+    )
+
+    if use_empirical:
+        tree_plans = []
+
+    else:
+        # A model can't be trained on features with one value, such as the
+        # demographic variables of a batch holding a single group
+        tree_plans = [
+            plan
+            for plan in target_plans
+            if plan["number_values"] > 1
+            and plan["train_classes"] > 1
+            and not plan["constant_features"]
+        ]
+
+    def fit_plan(plan):
+
+        print("\n")
         print("\n")
+        message = "Training model for Target Variable: " + plan["target_var"]
+        print(message)
+        print("-" * len(message))
+
+        if len(plan["rare_values"]) > 0:
+            print(
+                "Pooling "
+                + str(len(plan["rare_values"]))
+                + " rare classes of "
+                + str(plan["number_values"])
+                + " into one"
+            )
+
+        plan_report = []
+
+        def fit_model(train_df):
+            return tree_fit(
+                train_df,
+                plan["working_df_names"],
+                plan["target_var"],
+                seed_training,
+                plan["cat_out"],
+                GPU_IDs,
+                model_report=plan_report,
+                **fit_options
+            )
+
+        if plan["prefix_var"] is not None:
+            # One small model for each prefix
+            model = fit_branches(
+                plan["train_df"],
+                plan["target_var"],
+                plan["prefix_var"],
+                fit_model,
+                min_rows=branch_min_rows,
+            )
+
+        else:
+            model = fit_model(plan["train_df"])
+
+        return (model, plan_report)
+
+    fit_workers, fit_threads = share_fit_threads(
+        thread_count, fit_workers, len(tree_plans)
+    )
+
+    if fit_workers == 1:
+        fitted_models = [fit_plan(plan) for plan in tree_plans]
+
+    else:
+        # Share the threads between the models being trained
+        fit_options["thread_count"] = fit_threads
+
+        with ThreadPoolExecutor(max_workers=fit_workers) as executor:
+            fitted_models = list(executor.map(fit_plan, tree_plans))
+
+    for plan, (model, plan_report) in zip(tree_plans, fitted_models):
+        plan["model"] = model
+
+        if model_report is not None:
+            model_report.extend(plan_report)
+
+    """ Keep only what the predictions need """
+    for plan in target_plans:
+
+        target_var = plan["target_var"]
+        work_df = plan["work_df"]
+
+        del plan["train_df"]
+
+        plan["empirical"] = (
+            use_empirical or plan["constant_features"]
+        ) and plan["number_values"] > 1
+
+        if plan["empirical"] and model_report is not None:
+            model_report.append(
+                {
+                    "target": target_var,
+                    "device": "Empirical",
+                    "pooled": False,
+                    "iterations": 0,
+                    "depth": 0,
+                    "best_iteration": None,
+                }
+            )
+
+        if plan["empirical"] or plan["prefix_var"] is not None:
+            plan["work_df"] = work_df
+
+        elif len(plan["rare_values"]) > 0:
+            plan["work_df"] = work_df[
+                work_df[target_var].isin(plan["rare_values"])
+            ]
+
+        else:
+            plan["work_df"] = None
+
+    return target_plans
+
+
+def predict_target_plans(target_plans, prob_synth_df):
+
+    """ Synthesises the non-demographic columns one after another, each from
+            the columns synthesised before it.
+
+    Parameters
+    ----------
+    target_plans: list
+        Made by fit_target_plans().
+
+    prob_synth_df: pd.DataFrame
+        Demographic variables that were synthesised by Demographic_Synthesis.
+
+
+    Returns
+    -------
+    prob_synth_df: pd.DataFrame
+        Pandas dataframe of fully synthesised values.
+    """
+
+    """ Predict in order, each target uses the columns synthesised before """
+    for plan in target_plans:
+
+        target_var = plan["target_var"]
+
+        # Enforcing synthetic data compliance
+        prob_synth_df = prob_synth_df[plan["working_df_names"]]
+
         print("\n")
         message = str("The current Target Variable is: " + target_var)
         print(message)
         print("-" * len(message))
 
-        if (
-            len(work_df[target_var].value_counts()) <= 1
-            and testing_value == True
-        ):
-            prob_synth_df[target_var] = str(missing_map)
+        if plan["number_values"] <= 1 and plan["testing_value"] == True:
+            prob_synth_df[target_var] = str(plan["missing_map"])
 
-        if (
-            len(work_df[target_var].value_counts()) <= 1
-            and testing_value == False
-        ):
+        if plan["number_values"] <= 1 and plan["testing_value"] == False:
 
             """Take first column value"""
-            prob_synth_df[target_var] = str(work_df[target_var].iloc[0])
+            prob_synth_df[target_var] = plan["first_value"]
 
-        if len(work_df[target_var].value_counts()) > 1:
-            prob_synth_df[target_var] = tree_synth(
+        if plan["empirical"]:
+            print("Sampling from the real data (no model)")
+
+            prob_synth_df[target_var] = empirical_sample(
+                plan["work_df"][plan["working_df_names"]],
+                plan["work_df"][target_var],
                 prob_synth_df,
-                work_df,
-                working_df_names,
-                target_var,
-                seed_training,
-                cat_out,
-                GPU_IDs,
             )
 
+        elif plan["number_values"] > 1:
+
+            if plan["prefix_var"] is not None:
+                print("Synthesising within each " + plan["prefix_var"])
+
+                predictions = predict_branches(
+                    plan["model"],
+                    plan["work_df"],
+                    target_var,
+                    plan["prefix_var"],
+                    prob_synth_df,
+                )
+
+            elif plan["model"] is not None:
+                predictions = plan["model"].predict(prob_synth_df)
+
+            else:
+                # Every class is rare so there is nothing to model
+                predictions = np.full(
+                    len(prob_synth_df), RARE_CLASS_LABEL, dtype=object
+                )
+
+            if len(plan["rare_values"]) > 0:
+                predictions = resample_rare_classes(
+                    predictions,
+                    plan["work_df"][plan["working_df_names"]],
+                    plan["work_df"][target_var],
+                    prob_synth_df,
+                    plan["rare_values"],
+                )
+
+            prob_synth_df[target_var] = predictions
+
     return prob_synth_df
+
+
+def Machine_Learning_Synthesis(
+    feed_real_data_sub_df,
+    prob_synth_df,
+    demographic_vars,
+    ml_variables,
+    categorical_variables,
+    GPU_IDs,
+    seed_training,
+    mapping_dict,
+    numeric_group_vars,
+    thread_count=None,
+    task_type=None,
+    model_report=None,
+    tree_iterations=None,
+    tree_depth=None,
+    early_stopping_rounds=None,
+    fit_workers=None,
+    empirical_threshold=None,
+    weighted_training=None,
+    rare_class_threshold=None,
+    label_prefixes=None,
+    branch_min_rows=None,
+    cache_directory=None,
+    cache_size_limit=None,
+):
+
+    """Iterates over real data and conditionally created demographic data to
+            begin synthesising out the non-demographic parts of the real data.
+
+    Parameters
+    ----------
+    feed_real_data_sub_df: pd.DataFrame
+        The real data in dataframe format.
+
+    prob_synth_df: pd.DataFrame
+        Demographic variables that were synthesised by Demographic_Synthesis.
+
+    demographic_vars: list
+        A list of demographic variables.
+
+    ml_variables: list
+        A list of non-demographic variables that need to be synthesised by
+        this method.
+
+    categorical_variables: list
+        A list of columns from the real data that are categorical. Numeric
+        columns are assumed to be those that are not in this list.
+
+    GPU_IDs: integer, list
+        If training with more than 1 GPU put numbers in a list. Else, just
+        assumes GPU ID is 0.
+
+    seed_training: integer
+        Integer value for train/test split of the data by tree_synth.
+
+    mapping_dict: dict
+        A dictionary of labels and their original values for EACH column.
+        Used for checking the data types for error correction.
+
+
+    numeric_group_vars: list, optional
+        Used to check type of synthesis.
+
+    thread_count: integer, optional
+        The most CPU threads each tree model can use, see tree_synth().
+
+    task_type: string, optional
+        "CPU", "GPU" or "auto" (default), see tree_synth().
+
+    model_report: list, optional
+        Collects the device each tree model was trained on.
+
+    tree_iterations: integer or "auto", optional
+        The number of iterations of each tree model, see tree_synth().
+
+    tree_depth: integer or "auto", optional
+        The depth of each tree model, see tree_synth().
+
+    early_stopping_rounds: integer, optional
+        Early stopping of each tree model, see tree_synth().
+
+    fit_workers: integer, optional
+        If above 1, the models of up to this many targets are trained at the
+        same time in threads, sharing thread_count between them. Only the
+        predictions need the columns synthesised before, so they are still
+        made one target at a time, in order.
+
+    empirical_threshold: integer, optional
+        If the real data has fewer rows than this, no tree models are
+        trained. Each target is instead sampled from the real rows with the
+        same values of the columns before it, see empirical_sample().
+
+    weighted_training: boolean or "auto", optional
+        Training on the unique rows with weights, see tree_fit().
+
+    rare_class_threshold: integer, optional
+        Classes of a target with fewer real rows than this are trained on
+        as one class. Synthetic rows given that class are then sampled from
+        the real rows of the rare classes, see resample_rare_classes().
+
+    label_prefixes: dict, optional
+        The prefix column of targets synthesised in two stages. Within each
+        value of its prefix column the target has its own small tree model,
+        or is sampled if the prefix has few real rows, see fit_branches().
+
+    branch_min_rows: integer, optional
+        Prefixes with fewer real rows than this are sampled rather than
+        given their own model, see fit_branches().
+
+    cache_directory: string, optional
+        Trained models are saved here and reused when the same data and
+        settings come up again, see tree_fit().
+
+    cache_size_limit: integer, optional
+        Largest size of the cache folder in megabytes, see tree_fit().
+
+    Returns
+    -------
+    prob_synth_df: pd.DataFrame
+        Pandas dataframe of fully synthesised values for a given subset of the
+        overall real data.
+
+    """
+
+    target_plans = fit_target_plans(
+        feed_real_data_sub_df=feed_real_data_sub_df,
+        demographic_vars=demographic_vars,
+        ml_variables=ml_variables,
+        categorical_variables=categorical_variables,
+        GPU_IDs=GPU_IDs,
+        seed_training=seed_training,
+        mapping_dict=mapping_dict,
+        thread_count=thread_count,
+        task_type=task_type,
+        model_report=model_report,
+        tree_iterations=tree_iterations,
+        tree_depth=tree_depth,
+        early_stopping_rounds=early_stopping_rounds,
+        fit_workers=fit_workers,
+        empirical_threshold=empirical_threshold,
+        weighted_training=weighted_training,
+        rare_class_threshold=rare_class_threshold,
+        label_prefixes=label_prefixes,
+        branch_min_rows=branch_min_rows,
+        cache_directory=cache_directory,
+        cache_size_limit=cache_size_limit,
+    )
+
+    return predict_target_plans(target_plans, prob_synth_df)
@@ -1,10 +1,9 @@
 # coding: utf-8
 
 # Standard Libraries
+import os
 import numpy as np
 import pandas as pd
-import sklearn as sk
-import scipy
 
 """
 Please cite this system as: 
@@ -167,3 +166,38 @@ def remove_synth_labels(dataframe):
     dataframe_out = dataframe.drop(removal_columns, axis=1)
 
     return (dataframe_out, removal_columns)
+
+
+def share_fit_threads(thread_count, fit_workers, number_models):
+
+    """ Works out how many models to train at once and how many threads
+            each of them gets, see fit_target_plans().
+
+    Parameters
+    ----------
+    thread_count: integer or None
+        The threads to share, every core if None or below 1.
+
+    fit_workers: integer or None
+        The models asked to be trained at once.
+
+    number_models: integer
+        The models there are to train.
+
+
+    Returns
+    -------
+    fit_workers: integer
+        At least 1, and no more than the models or the threads.
+
+    fit_threads: integer
+        The threads of each model, at least 1.
+    """
+
+    if thread_count is None or thread_count < 1:
+        thread_count = os.cpu_count() or 1
+
+    # More models at once than threads would only queue them for the cores
+    fit_workers = max(1, min(fit_workers or 1, number_models, thread_count))
+
+    return (fit_workers, max(1, thread_count // fit_workers))
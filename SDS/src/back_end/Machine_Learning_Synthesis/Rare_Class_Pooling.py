@@ -0,0 +1,142 @@
+# coding: utf-8
+
+# Standard Libraries
+import numpy as np
+
+from SDS.src.back_end.Machine_Learning_Synthesis.Empirical_Sampler import (
+    empirical_sample,
+)
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the functions that pool the rare classes of a target
+before its tree model is trained. Targets such as diagnosis codes can have
+thousands of classes, most seen once or twice, and every class is another
+output of the model. The rare classes are trained on as a single class, and
+synthetic rows predicted as that class are then given one of the rare
+classes by sampling the real rows that have them, see empirical_sample().
+"""
+
+# Label of the pooled class, it must not be a value of any column
+RARE_CLASS_LABEL = "SDS_Rare_Classes"
+
+
+def rare_classes(target, threshold):
+
+    """ Finds the classes of a target that are seen fewer than threshold
+            times.
+
+    Parameters
+    ----------
+    target: pd.Series
+        The target column of the real data.
+
+    threshold: integer or None
+        Classes with fewer rows than this are rare. None pools nothing.
+
+
+    Returns
+    -------
+    rare_values: np.array
+        The rare classes. Empty if there are fewer than two of them, as
+        pooling a single class doesn't make the model any smaller.
+    """
+
+    if threshold is None:
+        return np.array([], dtype=object)
+
+    counts = target.value_counts()
+
+    rare_values = counts.index[counts < threshold].to_numpy()
+
+    if len(rare_values) < 2:
+        return np.array([], dtype=object)
+
+    return rare_values
+
+
+def pool_rare_classes(target, rare_values):
+
+    """ Replaces the rare classes of a target with RARE_CLASS_LABEL.
+
+    Parameters
+    ----------
+    target: pd.Series
+        The target column of the real data.
+
+    rare_values: np.array
+        Made by rare_classes().
+
+
+    Returns
+    -------
+    pooled_target: pd.Series
+        The target with one class in place of all the rare ones.
+    """
+
+    return target.where(~target.isin(rare_values), RARE_CLASS_LABEL)
+
+
+def resample_rare_classes(
+    predictions,
+    real_parents,
+    real_target,
+    synth_parents,
+    rare_values,
+    random_state=None,
+):
+
+    """ Gives each synthetic row predicted as RARE_CLASS_LABEL one of the
+            rare classes, sampled from the real rows with a rare class and
+            the same values of the columns before the target.
+
+    Parameters
+    ----------
+    predictions: np.array
+        The predicted classes of the synthetic rows.
+
+    real_parents: pd.DataFrame
+        The columns before the target in the real data.
+
+    real_target: pd.Series
+        The target column of the real data, not pooled.
+
+    synth_parents: pd.DataFrame
+        The same columns as real_parents in the synthetic data.
+
+    rare_values: np.array
+        Made by rare_classes().
+
+    random_state: np.random.RandomState, optional
+        Source of randomness, by default the global numpy one.
+
+
+    Returns
+    -------
+    predictions: np.array
+        The predictions with every pooled class replaced.
+    """
+
+    predictions = np.asarray(predictions, dtype=object).ravel().copy()
+
+    pooled_rows = np.flatnonzero(predictions == RARE_CLASS_LABEL)
+
+    if len(pooled_rows) == 0:
+        return predictions
+
+    rare_rows = np.asarray(real_target.isin(rare_values))
+
+    predictions[pooled_rows] = empirical_sample(
+        real_parents[rare_rows],
+        real_target[rare_rows],
+        synth_parents.iloc[pooled_rows],
+        random_state=random_state,
+    )
+
+    return predictions
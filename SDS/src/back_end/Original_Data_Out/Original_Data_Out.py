@@ -1,41 +1,23 @@
 ### Standard Libraries
 import numpy as np
 import pandas as pd
-import sys
-import os
 
-import sklearn as sk
-import scipy
 import time
 
 ### General Modules
-from SDS.src.back_end.General_Utility.General_Utilities import (
-    open_file,
-    synth_label_create,
-    string_cut,
-    NaN_Handle_Cat,
-    reverse_NaN,
-)
+from SDS.src.back_end.General_Utility.General_Utilities import reverse_NaN
 
 from SDS.src.back_end.General_Utility.Label_Convertor import (
-    cat_col_convertor,
     invertor_cat_col_convertor,
 )
 
-### Demographic Synthesis Modules
-from SDS.src.back_end.Demographic_Synthesis.Demographic_Synthesis_Utilities \
-    import (
-    create_filtered_index,
-)
+from SDS.src.back_end.General_Utility.File_Output import write_output_file
 
-### Date Transform Methods
-from SDS.src.simple_date_interface.\
-    Date_Pre_Processing.Date_Transform_Functions \
-    import (
-    date_only,
-    date_strip,
+from SDS.src.back_end.Machine_Learning_Synthesis.ML_Synthesis_Utilities import (
+    remove_synth_labels,
 )
 
+### Date Transform Methods
 from SDS.src.simple_date_interface.\
     Reverse_Date_Processing.Reverse_Date_Transforms \
     import (
@@ -61,135 +43,108 @@ will be 3 files created by the SDS:
     - The original untouched data file
     - A filtered and altered version of the original data (this file creates)
     - A synthetic dataset
+
+filtered_data_export() builds the filtered file from the data already
+processed by prep_synth_loop, so the input file is only processed once.
 """
 
-def original_data_process(
-    file_path,
+def filtered_data_export(
+    preprocessed_data,
     name_of_output_original,
     categorical_variables,
-    combination_cols,
-    demographic_variables,
-    cutting_vars,
-    numeric_group_vars,
-    length_cuts,
-    remove_small_vals,
     date_columns,
+    output_format=None,
+    row_group_size=None,
 ):
 
-    """Function to prep the data for demographic/ML synthesis.
+    """Saves the filtered real data using the output of prep_synth_loop,
+            rather than loading and processing the input file again.
 
     Parameters
     ----------
-    file_path: string
-        A string that points the system to the selected file. Obtained using
-        tkinter file dialogue methods earlier in system.
+    preprocessed_data: dict
+        Returned by prep_synth_loop. Holds the label encoded and filtered
+        real data, the mapping_dict, the m_values_list and the date column
+        information.
 
     name_of_output_original: string
-        A string that represents the name of the file the user selected or the
-        name of the file that the user has specified it to be called.
+        The name of the filtered real data file to be saved.
 
     categorical_variables: list
-        A list of all categorical columns in data.
-
-    combination_cols: list
-        The columns listed help form an index and remove small count variables.
-        They will be merged together to create a special temporary 'Combi'
-        column. The columns in the list should be chosen based on how
-        important they are to the user's overall dataset. A balance needs to
-        be struck as too few and it won't remove small records but too many
-        and it will reduce the dataset to almost nothing.
-
-    demographic_variables: list
-        A list of demographic variables.
+        All of the columns selected by the user, in the order they should be
+        saved.
 
-    cutting_vars: :list, string
-        The columns listed will be shortened down to the lengths specified by
-        length_cuts.
+    date_columns: list
+        A list of columns specified by the user that are to be processed using
+        the date handling methods.
 
-    length_cuts: :list, integer
-        The integers in this list are directly related to the columns listed
-        in cutting_vars. This means that the user can have different length
-        columns.
+    output_format: string, optional
+        Format of the saved file, otherwise taken from the extension of
+        name_of_output_original.
 
-    remove_small_vals: integer
-        The threshold number to remove records (including Combi) of count
-        below it.
+    row_group_size: integer, optional
+        Rows per row group when saving as Parquet.
 
     Returns
     -------
     original_data_out: pd.DataFrame
-        The processed dataframe of real data, saved to .csv file.
+        The processed dataframe of real data, saved to .csv or Parquet file.
 
     """
 
-    # Disable
-    def blockPrint():
-        sys.stdout = open(os.devnull, "w")
-
-    # Restore
-    def enablePrint():
-        sys.stdout = sys.__stdout__
-
-    blockPrint()
-
-    ### Get main file
+    mapping_dict = preprocessed_data["mapping_dict"]
+    processed_date_columns_reverse = preprocessed_data[
+        "processed_date_columns_reverse"
+    ]
 
-    main_file = open_file(file_path)
-
-    # Cut down variable length if needed
-    if cutting_vars is not None:
-
-        main_file = string_cut(main_file, length_cuts, cutting_vars)
-    else:
-        main_file = main_file
-
-    """ Splice in Dates here"""
-    if date_columns is not []:
-
-        main_file = date_only(main_file, date_columns)
-
-    else:
-        main_file = main_file
-
-    # Deal with missing values
-    m_values_list, real_data_frame = NaN_Handle_Cat(main_file)
-
-    # Auto convert all columns in categorical to categorical
-    for column in categorical_variables:
-        real_data_frame[column] = real_data_frame[column].astype(str)
-
-    # Ensure correct columns
-    real_data_frame, mapping_dict = cat_col_convertor(
-        real_data_frame, categorical_variables
+    ### Section 1 - Remove synthetic labels and the grouping column
+    real_data_frame, removal_columns = remove_synth_labels(
+        preprocessed_data["real_data_frame"]
     )
 
-    # Auto convert all columns in categorical to categorical
-    for column in categorical_variables:
-        real_data_frame[column] = real_data_frame[column].astype(str)
+    real_data_frame = real_data_frame.drop(columns=["Combi"], errors="ignore")
 
-    # Create the index for main loop and remove counts
-    real_data_frame, groups_list = create_filtered_index(
-        real_data_frame,
-        combination_cols,
-        remove_small_vals,
-        print_statement=False,
-    )
-    del groups_list
+    # The rows are sorted by group, put them back in the order of the file
+    real_data_frame = real_data_frame.sort_index()
+
+    ### Section 2 - Remove Label Encoder
+    label_columns = [
+        x for x in list(real_data_frame) if x in mapping_dict.keys()
+    ]
 
-    ### Section 1 - Remove Label Encoder
     final_out = invertor_cat_col_convertor(
-        real_data_frame, mapping_dict, categorical_variables
+        real_data_frame, mapping_dict, label_columns
     )
 
-    ### Section 2 - Replace '_Missing' values with ''
+    ### Section 3 - Replace '_Missing' values with ''
     original_data_out = reverse_NaN(
-        final_out, m_values_list, removal_columns=[]
+        final_out, preprocessed_data["m_values_list"], removal_columns
     )
 
-    ### Section 3 - Return NaN dates
-    original_data_out = return_date_nan(original_data_out, date_columns)
-
-    ### Section 4 - Save to .csv
-    original_data_out.to_csv(name_of_output_original, index=False)
+    ### Section 4 - Rejoin split dates as YYYY-MM-DD and return NaN dates
+    if processed_date_columns_reverse is not None:
+        for key, (day, month, year) in processed_date_columns_reverse.items():
+            original_data_out[key] = original_data_out[year].str.cat(
+                [original_data_out[month], original_data_out[day]], sep="-"
+            )
+
+            original_data_out = original_data_out.drop(
+                columns=[day, month, year]
+            )
+
+        original_data_out = return_date_nan(original_data_out, date_columns)
+
+    ### Section 5 - Put columns back in the order of the input file
+    original_data_out = original_data_out[
+        [x for x in categorical_variables if x in list(original_data_out)]
+    ]
+
+    ### Section 6 - Save to .csv or Parquet
+    write_output_file(
+        original_data_out,
+        name_of_output_original,
+        file_format=output_format,
+        row_group_size=row_group_size,
+    )
 
-    enablePrint()
+    return original_data_out
@@ -0,0 +1,104 @@
+# coding: utf-8
+
+### General Modules
+from SDS.src.back_end.General_Utility.Label_Convertor import (
+    invertor_cat_col_convertor,
+)
+
+from SDS.src.back_end.General_Utility.General_Utilities import reverse_NaN
+
+### Date Reversal Modules
+from SDS.src.simple_date_interface.\
+    Reverse_Date_Processing.Reverse_Date_Transforms import (
+    reverse_split_out_date,
+    return_date_nan,
+)
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the post processing that turns a batch of label encoded
+synthetic data back into the values of the original file. It is applied to
+each batch as it is finished so the full synthetic dataset never needs to be
+held in memory.
+"""
+
+
+def post_process_batch(
+    dataframe,
+    mapping_dict,
+    categorical_variables,
+    numeric_group_vars,
+    m_values_list,
+    removal_columns,
+    processed_date_columns_reverse=None,
+    date_columns=None,
+):
+
+    """Decodes a batch of synthetic data, returns missing values and
+            rejoins dates.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        A batch of synthetic data with synthetic labels already removed.
+
+    mapping_dict: dict
+        Contains the label classes and information for EACH column.
+
+    categorical_variables: list
+        The processed categorical variables, including synthetic labels.
+
+    numeric_group_vars: list
+        Columns grouped by GMM_Transform, these are not label encoded.
+
+    m_values_list: list
+        A list of '_Missing' markers made by NaN_Handle_Cat.
+
+    removal_columns: list
+        Synthetic label columns that have been removed.
+
+    processed_date_columns_reverse: dict, optional
+        Date columns and their _DAY, _MONTH, _YEAR columns.
+
+    date_columns: list, optional
+        A list of columns specified by the user that are to be processed using
+        the date handling methods.
+
+
+    Returns
+    -------
+    final_out: pd.DataFrame
+        The decoded batch, ready to be saved.
+    """
+
+    ### Get rid of synthetic labels and GMM columns
+    decode_variables = [
+        x
+        for x in categorical_variables
+        if x not in removal_columns and x not in (numeric_group_vars or [])
+    ]
+
+    ### Label Conversion
+    final_out = invertor_cat_col_convertor(
+        dataframe, mapping_dict, decode_variables
+    )
+
+    ### Dealing with m_values_list
+    final_out = reverse_NaN(final_out, m_values_list, removal_columns)
+
+    ### Date Reversal
+    if processed_date_columns_reverse:
+
+        final_out = reverse_split_out_date(
+            final_out, processed_date_columns_reverse
+        )
+
+        final_out = return_date_nan(final_out, date_columns)
+
+    return final_out
@@ -0,0 +1,412 @@
+### Standard Libraries
+import numpy as np
+import pandas as pd
+
+### General Modules
+from SDS.src.back_end.General_Utility.Cache_Utilities import (
+    atomic_write_bytes,
+    dumps_compact,
+    loads_compact,
+)
+
+### Control Method Modules
+from SDS.src.back_end.Looping_Control_Methods.Synthesis_Loop_vars import (
+    cached_prep_synth_loop,
+    fit_batch,
+    sample_batch,
+)
+
+from SDS.src.back_end.Looping_Control_Methods.Parallel_Batches import (
+    batch_seed,
+)
+
+from SDS.src.back_end.Demographic_Synthesis.Demographic_Synthesis_Utilities import (
+    group_slice,
+    schedule_batches,
+)
+
+### Tree Based Synthesis Methods
+from SDS.src.back_end.Machine_Learning_Synthesis.Hierarchical_Synthesis import (
+    label_prefix_columns,
+)
+
+from SDS.src.back_end.Tree_Methods.Tree_Functions_debug import training_device
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the Synthesizer, which splits synthesis into a fit step
+and a sample step. fit() does the pre-processing, works out the demographic
+probabilities and trains the tree models of every batch. sample() then makes
+any number of synthetic rows from those, without the real data, so 1M and
+then 10M rows only pay for the fit once. A fitted Synthesizer can be saved
+and loaded again later.
+
+IMPORTANT: a saved Synthesizer holds the probabilities, models and (for small
+    batches) real rows it was fitted on, so it must be kept as securely as
+    the real data.
+"""
+
+# The optional arguments of Synth_Control_Function that change the fit
+FIT_OPTIONS = (
+    "cutting_vars",
+    "length_cuts",
+    "numeric_group_vars",
+    "group_size",
+    "remove_small_vals",
+    "number_gaussian",
+    "GMM_cutoff",
+    "synth_label_cols",
+    "synth_label_cols_stucture",
+    "date_columns",
+    "chunk_size",
+    "input_format",
+    "cache_directory",
+    "cache_size_limit",
+    "target_batch_rows",
+    "max_batch_groups",
+    "random_seed",
+    "task_type",
+    "tree_iterations",
+    "tree_depth",
+    "early_stopping_rounds",
+    "fit_workers",
+    "empirical_threshold",
+    "weighted_training",
+    "rare_class_threshold",
+    "hierarchical_labels",
+    "branch_min_rows",
+)
+
+# Bump this if the layout of saved Synthesizers changes
+SYNTHESIZER_VERSION = 1
+
+
+class Synthesizer:
+
+    """ Fits the synthesis models to a real data file once and samples
+            synthetic data from them as often as needed.
+
+    Parameters
+    ----------
+    demographic_variables: list
+        The demographic columns, see Synth_Control_Function().
+
+    machine_learning_variables: list
+        The columns synthesised by the tree models.
+
+    categorical_variables: list
+        All categorical columns in the data.
+
+    combination_cols: list
+        The columns that make the 'Combi' groups.
+
+    GPU_IDs: list, optional
+        The IDs of the GPUs to train on (default = ["0"]).
+
+    **options:
+        Any of FIT_OPTIONS, as in Synth_Control_Function().
+
+
+    Example
+    -------
+    synthesizer = Synthesizer(demo_vars, ML_vars, cat_vars, combi_vars)
+    synthesizer.fit("real_data.csv")
+    synthesizer.save("synthesizer.sds")
+
+    synthetic_df = Synthesizer.load("synthesizer.sds").sample(10 ** 6)
+    """
+
+    def __init__(
+        self,
+        demographic_variables,
+        machine_learning_variables,
+        categorical_variables,
+        combination_cols,
+        GPU_IDs=None,
+        **options
+    ):
+
+        unknown_options = [x for x in options if x not in FIT_OPTIONS]
+
+        if len(unknown_options) > 0:
+            raise TypeError(
+                "Unknown Synthesizer options: " + ", ".join(unknown_options)
+            )
+
+        if GPU_IDs is None:
+            GPU_IDs = ["0"]
+
+        self.settings = dict(
+            {x: None for x in FIT_OPTIONS},
+            demographic_variables=demographic_variables,
+            machine_learning_variables=machine_learning_variables,
+            categorical_variables=categorical_variables,
+            combination_cols=combination_cols,
+            GPU_IDs=GPU_IDs,
+        )
+        self.settings.update(options)
+
+        self.batch_settings = None
+        self.batch_models = []
+
+    def fit(self, file_path):
+
+        """ Pre-processes the real data and fits every batch.
+
+        Parameters
+        ----------
+        file_path: string
+            The real data file.
+
+
+        Returns
+        -------
+        self: Synthesizer
+        """
+
+        settings = self.settings
+
+        numeric_group_vars = settings["numeric_group_vars"] or []
+
+        group_size = settings["group_size"]
+
+        if group_size is None:
+            group_size = 10
+
+        remove_small_vals = settings["remove_small_vals"]
+
+        if remove_small_vals is None:
+            remove_small_vals = 10
+
+        """ Data load and process """
+        (
+            real_data_frame,
+            groups_list,
+            group_index,
+            information_dictionary,
+            threshold_hit,
+            m_values_list,
+            demographic_variables,
+            categorical_variables,
+            mapping_dict,
+            m_values_list,
+            processed_date_columns_reverse,
+            machine_learning_variables,
+            preprocessed_data,
+        ) = cached_prep_synth_loop(
+            cache_directory=settings["cache_directory"],
+            cache_size_limit=settings["cache_size_limit"],
+            categorical_variables=settings["categorical_variables"],
+            combination_cols=settings["combination_cols"],
+            demographic_variables=settings["demographic_variables"],
+            cutting_vars=settings["cutting_vars"],
+            length_cuts=settings["length_cuts"],
+            GPU_IDs=settings["GPU_IDs"],
+            remove_small_vals=remove_small_vals,
+            numeric_group_vars=numeric_group_vars,
+            number_gaussian=settings["number_gaussian"] or 10,
+            GMM_cutoff=settings["GMM_cutoff"] or 20,
+            synth_label_cols=settings["synth_label_cols"],
+            synth_label_cols_stucture=settings["synth_label_cols_stucture"],
+            date_columns=settings["date_columns"],
+            file_path=file_path,
+            machine_learning_variables=settings["machine_learning_variables"],
+            chunk_size=settings["chunk_size"],
+            file_format=settings["input_format"],
+        )
+
+        del preprocessed_data
+
+        if settings["hierarchical_labels"]:
+            label_prefixes = label_prefix_columns(
+                settings["synth_label_cols"], machine_learning_variables
+            )
+
+        else:
+            label_prefixes = None
+
+        # Settings that are the same for every batch
+        self.batch_settings = {
+            "demographic_variables": demographic_variables,
+            "categorical_variables": categorical_variables,
+            "machine_learning_variables": machine_learning_variables,
+            "GPU_IDs": settings["GPU_IDs"],
+            "mapping_dict": mapping_dict,
+            "numeric_group_vars": numeric_group_vars,
+            "threshold_hit": threshold_hit,
+            "information_dictionary": information_dictionary,
+            "real_data_size": len(real_data_frame),
+            "size_of_synth_rows": None,
+            "thread_count": None,
+            "task_type": training_device(
+                settings["task_type"], settings["GPU_IDs"]
+            ),
+            "tree_iterations": settings["tree_iterations"],
+            "tree_depth": settings["tree_depth"],
+            "early_stopping_rounds": settings["early_stopping_rounds"],
+            "fit_workers": settings["fit_workers"],
+            "empirical_threshold": settings["empirical_threshold"],
+            "weighted_training": settings["weighted_training"],
+            "rare_class_threshold": settings["rare_class_threshold"],
+            "label_prefixes": label_prefixes,
+            "branch_min_rows": settings["branch_min_rows"],
+            "cache_directory": settings["cache_directory"],
+            "cache_size_limit": settings["cache_size_limit"],
+            "post_process": {
+                "m_values_list": m_values_list,
+                "processed_date_columns_reverse": (
+                    processed_date_columns_reverse
+                ),
+                "date_columns": settings["date_columns"],
+            },
+        }
+
+        main_control_loop = schedule_batches(
+            np.diff(group_index["offsets"]),
+            group_size=group_size,
+            target_rows=settings["target_batch_rows"],
+            max_groups=settings["max_batch_groups"],
+        )
+
+        self.batch_models = []
+
+        for batch_number, (group_start, group_end) in enumerate(
+            main_control_loop
+        ):
+            print("\n")
+            print(
+                "Fitting batch "
+                + str(batch_number + 1)
+                + " of "
+                + str(len(main_control_loop))
+            )
+
+            self.batch_models.append(
+                fit_batch(
+                    group_slice(
+                        real_data_frame, group_index, group_start, group_end
+                    ),
+                    self.batch_settings,
+                    batch_seed(settings["random_seed"], batch_number),
+                )
+            )
+
+        return self
+
+    def sample(self, size_of_synth_rows, random_seed=None):
+
+        """ Synthesises data from the fitted batches.
+
+        Parameters
+        ----------
+        size_of_synth_rows: integer
+            About how many rows to make. Each batch makes its share, so the
+            total can be a few rows less.
+
+        random_seed: integer, optional
+            Makes the sample repeatable. With the random_seed the
+            Synthesizer was fitted with, the sample is the same as
+            Synth_Control_Function() makes with those settings.
+
+
+        Returns
+        -------
+        synthetic_df: pd.DataFrame
+            The synthetic data in the values of the original file.
+        """
+
+        if self.batch_settings is None:
+            raise ValueError("Please fit() the Synthesizer before sampling")
+
+        batch_settings = dict(
+            self.batch_settings, size_of_synth_rows=int(size_of_synth_rows)
+        )
+
+        batch_list = []
+
+        for batch_number, batch_model in enumerate(self.batch_models):
+            final_data_out, removal_columns = sample_batch(
+                batch_model,
+                batch_settings,
+                batch_seed(random_seed, batch_number),
+            )
+
+            batch_list.append(final_data_out)
+
+        if len(batch_list) == 0:
+            return pd.DataFrame()
+
+        return pd.concat(batch_list, ignore_index=True)
+
+    def save(self, file_path):
+
+        """ Saves the fitted Synthesizer to a file.
+
+        Parameters
+        ----------
+        file_path: string
+            The file to be made.
+
+
+        Returns
+        -------
+        None.
+        """
+
+        if self.batch_settings is None:
+            raise ValueError("Please fit() the Synthesizer before saving")
+
+        saved = {
+            "version": SYNTHESIZER_VERSION,
+            "settings": self.settings,
+            "batch_settings": self.batch_settings,
+            "batch_models": self.batch_models,
+        }
+
+        atomic_write_bytes(file_path, dumps_compact(saved))
+
+    @classmethod
+    def load(cls, file_path):
+
+        """ Loads a Synthesizer saved by save().
+
+        Parameters
+        ----------
+        file_path: string
+            The saved file. Only load files you trust, as they are pickles.
+
+
+        Returns
+        -------
+        synthesizer: Synthesizer
+        """
+
+        with open(file_path, "rb") as f:
+            saved = loads_compact(f.read())
+
+        if saved.get("version") != SYNTHESIZER_VERSION:
+            raise ValueError(
+                "This Synthesizer was saved by a different version of the SDS"
+            )
+
+        settings = dict(saved["settings"])
+
+        synthesizer = cls(
+            settings.pop("demographic_variables"),
+            settings.pop("machine_learning_variables"),
+            settings.pop("categorical_variables"),
+            settings.pop("combination_cols"),
+            settings.pop("GPU_IDs"),
+            **settings
+        )
+
+        synthesizer.batch_settings = saved["batch_settings"]
+        synthesizer.batch_models = saved["batch_models"]
+
+        return synthesizer
@@ -0,0 +1,243 @@
+# coding: utf-8
+
+# Standard Libraries
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from SDS.src.back_end.General_Utility.Cache_Utilities import (
+    CACHE_VERSION,
+    CACHE_SUFFIXES,
+    atomic_write_bytes,
+    evict_cache,
+    hash_config,
+    touch_cache_file,
+)
+
+"""
+Please cite this system as:
+
+Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
+    [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
+"""
+
+"""
+This file contains the functions for the cache of trained tree models. A
+model is named by a hash of the data it was trained on and every setting
+that changes it, so a rerun on the same data with the same settings loads
+the model rather than training it again. Models are stored as CatBoost
+binary (.cbm) files with a small JSON file of what was reported about them,
+in the same folder and under the same size limit as the pre-processing
+cache.
+"""
+
+
+def hash_frame(dataframe):
+
+    """ Creates a SHA-256 hash of the contents of a dataframe.
+
+    Parameters
+    ----------
+    dataframe: pd.DataFrame
+        The data to be hashed. The index is ignored.
+
+
+    Returns
+    -------
+    frame_hash: string
+        The hex digest of the column names, types and values.
+    """
+
+    frame_hash = hashlib.sha256()
+
+    frame_layout = [
+        [str(x) for x in dataframe.columns],
+        [str(x) for x in dataframe.dtypes],
+    ]
+
+    frame_hash.update(json.dumps(frame_layout).encode("utf-8"))
+
+    frame_hash.update(
+        pd.util.hash_pandas_object(dataframe, index=False).to_numpy().tobytes()
+    )
+
+    return frame_hash.hexdigest()
+
+
+def model_cache_key(Data, Label, settings):
+
+    """ Builds the cache key of a tree model.
+
+    Parameters
+    ----------
+    Data: pd.DataFrame
+        The columns the model is trained on.
+
+    Label: pd.Series
+        The target.
+
+    settings: dict
+        Every setting that changes the trained model. Values must be JSON
+        friendly or have a sensible str().
+
+
+    Returns
+    -------
+    key: string
+        Hex digest of the data and settings.
+    """
+
+    import catboost
+
+    settings = dict(
+        settings,
+        cache_version=CACHE_VERSION,
+        catboost_version=catboost.__version__,
+    )
+
+    combined = (
+        hash_frame(pd.concat([Data, Label], axis=1)) + hash_config(settings)
+    )
+
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest()
+
+
+def model_cache_paths(cache_directory, key):
+
+    """ The files of a cached model.
+
+    Parameters
+    ----------
+    cache_directory: string
+        The cache directory.
+
+    key: string
+        Made by model_cache_key().
+
+
+    Returns
+    -------
+    model_path: string
+        The CatBoost binary file.
+
+    info_path: string
+        The JSON file of what was reported about the model.
+    """
+
+    model_path = os.path.join(cache_directory, "model_" + key + ".cbm")
+    info_path = os.path.join(cache_directory, "model_" + key + ".json")
+
+    return (model_path, info_path)
+
+
+def load_cached_model(cache_directory, key):
+
+    """ Loads a model from the cache.
+
+    Parameters
+    ----------
+    cache_directory: string
+        The cache directory.
+
+    key: string
+        Made by model_cache_key().
+
+
+    Returns
+    -------
+    model: CatBoostClassifier or None
+        None if the model is not in the cache.
+
+    model_info: dict or None
+        What was reported about the model when it was trained.
+    """
+
+    model_path, info_path = model_cache_paths(cache_directory, key)
+
+    if not (os.path.exists(model_path) and os.path.exists(info_path)):
+        return (None, None)
+
+    from catboost import CatBoostClassifier
+
+    try:
+        with open(info_path, "r") as f:
+            model_info = json.load(f)
+
+        model = CatBoostClassifier()
+        model.load_model(model_path)
+
+    except Exception:
+        # Treat a damaged entry as missing, it is overwritten after training
+        return (None, None)
+
+    touch_cache_file(model_path)
+    touch_cache_file(info_path)
+
+    return (model, model_info)
+
+
+def save_cached_model(
+    model, model_info, cache_directory, key, cache_size_limit=None
+):
+
+    """ Saves a model to the cache and removes the least recently used
+            entries if the cache is too big.
+
+    Parameters
+    ----------
+    model: CatBoostClassifier
+        The trained model.
+
+    model_info: dict
+        What was reported about the model.
+
+    cache_directory: string
+        The cache directory.
+
+    key: string
+        Made by model_cache_key().
+
+    cache_size_limit: integer, optional
+        Largest size of the cache folder in megabytes (default = 10000).
+
+
+    Returns
+    -------
+    None.
+    """
+
+    if cache_size_limit is None:
+        cache_size_limit = 10000
+
+    os.makedirs(cache_directory, exist_ok=True)
+
+    model_path, info_path = model_cache_paths(cache_directory, key)
+
+    # CatBoost writes the file itself, so it is moved into place when done
+    file_handle, temp_path = tempfile.mkstemp(
+        dir=cache_directory, suffix=".tmp"
+    )
+    os.close(file_handle)
+
+    try:
+        model.save_model(temp_path)
+        os.replace(temp_path, model_path)
+
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    atomic_write_bytes(
+        info_path, json.dumps(model_info, default=str).encode("utf-8")
+    )
+
+    evict_cache(
+        cache_directory,
+        int(cache_size_limit * 1024 ** 2),
+        suffixes=CACHE_SUFFIXES,
+        keep=(model_path, info_path),
+    )
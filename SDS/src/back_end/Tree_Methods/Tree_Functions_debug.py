@@ -4,12 +4,14 @@
 # Standard Libraries
 import numpy as np
 import pandas as pd
-import sklearn as sk
-import scipy
-import secrets
 
-# ML Libraries
-from catboost import Pool, CatBoostClassifier, CatBoostRegressor
+from SDS.src.front_interface.test_gpu import cuda_device_count
+
+from SDS.src.back_end.Tree_Methods.Model_Cache import (
+    load_cached_model,
+    model_cache_key,
+    save_cached_model,
+)
 
 """
 Please cite this system as:
@@ -22,24 +24,323 @@ Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
 This file contains the Machine Learning core of the system.
 """
 
+# Model settings for each training device. Deep trees are cheap on a GPU but
+# slow on a CPU, so the CPU uses shallower trees and fewer feature borders.
+GPU_MODEL_PARAMS = {"depth": 11}
 
-def tree_synth(
-    Synthetc_Prob_Df,
+CPU_MODEL_PARAMS = {"depth": 6, "border_count": 128}
+
+# Iterations without improvement on the eval data before training stops
+EARLY_STOPPING_ROUNDS = 40
+
+# Rows per unique row at which training on the unique rows with weights pays
+# for the work of finding them
+WEIGHTED_COMPRESSION = 2.0
+
+
+def training_device(task_type=None, GPU_IDs=None):
+
+    """ Picks the device the tree models are trained on.
+
+    Parameters
+    ----------
+    task_type: string, optional
+        "CPU", "GPU" or "auto" (default). With "auto" the GPU is used if a
+        CUDA device is found, unless GPU_IDs is No_Gpus.
+
+    GPU_IDs: list, optional
+        The user's GPU IDs.
+
+
+    Returns
+    -------
+    device: string
+        Either "CPU" or "GPU".
+    """
+
+    if task_type is None:
+        task_type = "auto"
+
+    device = str(task_type).upper()
+
+    if device not in ("AUTO", "CPU", "GPU"):
+        raise ValueError(
+            "Training device must be 'auto', 'CPU' or 'GPU', not: "
+            + str(task_type)
+        )
+
+    if device != "AUTO":
+        return device
+
+    if GPU_IDs is not None and "no_gpus" in [
+        str(x).lower() for x in np.atleast_1d(GPU_IDs)
+    ]:
+        return "CPU"
+
+    if cuda_device_count() > 0:
+        return "GPU"
+
+    return "CPU"
+
+
+def auto_tree_settings(number_rows, number_classes, max_depth):
+
+    """ Scales the size of a tree model to the data it is trained on, so
+            small groups don't pay for a large ensemble.
+
+    Parameters
+    ----------
+    number_rows: integer
+        Rows the model is trained on.
+
+    number_classes: integer
+        Number of classes of the target.
+
+    max_depth: integer
+        The deepest trees allowed, normally the device's default depth.
+
+
+    Returns
+    -------
+    iterations: integer
+        Between 50 and 400, growing with the rows and classes.
+
+    depth: integer
+        Between 2 and max_depth, growing with log2 of the rows.
+    """
+
+    number_rows = max(int(number_rows), 2)
+    number_classes = max(int(number_classes), 2)
+
+    iterations = int(np.clip(number_rows / 10 + 20 * number_classes, 50, 400))
+
+    depth = int(np.clip(np.ceil(np.log2(number_rows) / 2), 2, max_depth))
+
+    return (iterations, depth)
+
+
+def tree_settings(
+    tree_iterations, tree_depth, number_rows, number_classes, device
+):
+
+    """ Works out the iterations and depth of a tree model.
+
+    Parameters
+    ----------
+    tree_iterations: integer, "auto" or None
+        The number of iterations. None is the default of 400 and "auto" uses
+        auto_tree_settings().
+
+    tree_depth: integer, "auto" or None
+        The depth of the trees. None is the device's default depth and
+        "auto" uses auto_tree_settings().
+
+    number_rows: integer
+        Rows the model is trained on.
+
+    number_classes: integer
+        Number of classes of the target.
+
+    device: string
+        Either "CPU" or "GPU".
+
+
+    Returns
+    -------
+    iterations: integer
+
+    depth: integer
+    """
+
+    if device == "GPU":
+        default_depth = GPU_MODEL_PARAMS["depth"]
+    else:
+        default_depth = CPU_MODEL_PARAMS["depth"]
+
+    auto_iterations, auto_depth = auto_tree_settings(
+        number_rows, number_classes, default_depth
+    )
+
+    if tree_iterations is None:
+        iterations = 400
+    elif str(tree_iterations).lower() == "auto":
+        iterations = auto_iterations
+    else:
+        iterations = int(tree_iterations)
+
+    if tree_depth is None:
+        depth = default_depth
+    elif str(tree_depth).lower() == "auto":
+        depth = auto_depth
+    else:
+        depth = int(tree_depth)
+
+    if iterations < 1 or depth < 1:
+        raise ValueError("Tree iterations and depth must be at least 1")
+
+    return (iterations, depth)
+
+
+def unique_row_counts(Data, Label):
+
+    """ Collapses the training data to its unique rows and how often each
+            one appears.
+
+    Parameters
+    ----------
+    Data: pd.DataFrame
+        The columns trained on.
+
+    Label: pd.Series
+        The target.
+
+
+    Returns
+    -------
+    unique_data: pd.DataFrame
+        Each unique row of Data and Label once, Label last.
+
+    counts: np.array
+        How many times each unique row appears.
+    """
+
+    frame = pd.concat([Data, Label], axis=1)
+
+    grouped = frame.groupby(
+        list(frame), sort=False, dropna=False, observed=True
+    ).size()
+
+    unique_data = grouped.index.to_frame(index=False)
+    unique_data.columns = list(frame)
+
+    return (unique_data, grouped.to_numpy())
+
+
+def use_weighted_training(weighted_training, compression):
+
+    """ Decides whether a model is trained on the unique rows with weights.
+
+    Parameters
+    ----------
+    weighted_training: boolean, "auto" or None
+        True or False forces the choice. "auto" (default) trains on the
+        unique rows when the data has at least WEIGHTED_COMPRESSION rows for
+        each unique row.
+
+    compression: float
+        Rows divided by unique rows.
+
+
+    Returns
+    -------
+    weighted: boolean
+    """
+
+    if weighted_training is None or (
+        str(weighted_training).lower() == "auto"
+    ):
+        return compression >= WEIGHTED_COMPRESSION
+
+    if isinstance(weighted_training, (bool, np.bool_)):
+        return bool(weighted_training)
+
+    raise ValueError(
+        "Weighted training must be True, False or 'auto', not: "
+        + str(weighted_training)
+    )
+
+
+def split_counts(counts, test_size, seed):
+
+    """ Splits the rows behind each unique row between train and eval data.
+            Each row goes to the eval data with chance test_size, the same
+            as a random split of the full rows.
+
+    Parameters
+    ----------
+    counts: np.array
+        How many times each unique row appears.
+
+    test_size: float
+        Share of rows for the eval data.
+
+    seed: integer
+        Sets the randomness of the split.
+
+
+    Returns
+    -------
+    train_counts: np.array
+
+    eval_counts: np.array
+        Both the same length as counts and adding up to counts.
+    """
+
+    eval_counts = np.random.RandomState(seed).binomial(counts, test_size)
+
+    return (counts - eval_counts, eval_counts)
+
+
+def device_model_params(device, GPU_IDs, thread_count=None):
+
+    """ The CatBoost settings for a training device.
+
+    Parameters
+    ----------
+    device: string
+        Either "CPU" or "GPU", see training_device().
+
+    GPU_IDs: list
+        The IDs of the GPUs to train on.
+
+    thread_count: integer, optional
+        The most CPU threads CatBoost can use, by default all cores.
+
+
+    Returns
+    -------
+    model_params: dict
+        Arguments for CatBoostClassifier.
+    """
+
+    if thread_count is None:
+        thread_count = -1
+
+    if device == "GPU":
+        model_params = dict(GPU_MODEL_PARAMS, task_type="GPU", devices=GPU_IDs)
+
+    else:
+        model_params = dict(CPU_MODEL_PARAMS, task_type="CPU")
+
+    model_params["thread_count"] = thread_count
+
+    return model_params
+
+
+def tree_fit(
     Real_Data,
     Real_Data_Cols,
     Real_Label_Col,
     Rand_Seed,
     Cat_Features,
     GPU_IDs,
+    thread_count=None,
+    task_type=None,
+    model_report=None,
+    tree_iterations=None,
+    tree_depth=None,
+    early_stopping_rounds=None,
+    weighted_training=None,
+    cache_directory=None,
+    cache_size_limit=None,
+    seeded=True,
 ):
 
-    """ Main tree synthesis algorithm.
+    """ Trains the tree model of one target. This only needs the real data
+            so the models of every target can be trained at the same time.
 
     Parameters
     ----------
-    Synthetc_Prob_Df: pd.Dataframe
-        The previously generated demographics from the probability function.
-
     Real_Data: pd.dataframe
         A subset of the original real data file to be worked on.
 
@@ -55,29 +356,163 @@ def tree_synth(
     Cat_Features: list
         The columns in your data NOT continous numeric.
 
+    GPU_IDs: list
+        The IDs of the GPUs to train on.
+
+    thread_count: integer, optional
+        The most CPU threads CatBoost can use. By default all cores are used,
+        set this when several models are trained at the same time.
+
+    task_type: string, optional
+        "CPU", "GPU" or "auto" (default), see training_device().
+
+    model_report: list, optional
+        If given, a dict of the target, the device used, the size of the
+        model and its best iteration is added to it for each model.
+
+    tree_iterations: integer or "auto", optional
+        The number of iterations (default = 400), see tree_settings().
+
+    tree_depth: integer or "auto", optional
+        The depth of the trees (default depends on device), see
+        tree_settings().
+
+    early_stopping_rounds: integer, optional
+        Training stops once the eval data has not improved for this many
+        iterations and the best iteration is kept (default = 40). 0 turns
+        early stopping off.
+
+    weighted_training: boolean or "auto", optional
+        Train on the unique rows, weighted by how often they appear, rather
+        than on every row. By default this is done when it makes the data
+        at least WEIGHTED_COMPRESSION times smaller.
+
+    cache_directory: string, optional
+        If set, a model trained before on the same data with the same
+        settings is loaded from here rather than trained, and new models
+        are saved here, see model_cache_key().
+
+    cache_size_limit: integer, optional
+        Largest size of the cache folder in megabytes (default = 10000).
+
+    seeded: boolean, optional
+        False if Rand_Seed was drawn at random for this run rather than set
+        by the user. The seed is then left out of the cache key, so a model
+        cached by an earlier unseeded run (trained on another random split)
+        is reused rather than the cache never being hit (default = True).
+
 
     Returns
     -------
-        preds_class: np.array
-            An array of predicted values that can be appended to a dataframe
-            by later functions.
+        model: CatBoostClassifier
+            The trained model.
     """
 
+    # ML Libraries, loaded here so startup doesn't wait on them
+    from catboost import Pool, CatBoostClassifier
+
     # Set random seed
     seed = Rand_Seed
 
+    if early_stopping_rounds is None:
+        early_stopping_rounds = EARLY_STOPPING_ROUNDS
+
+    # Settings for the device the model is trained on
+    device = training_device(task_type, GPU_IDs)
+
+    model_params = device_model_params(device, GPU_IDs, thread_count)
+
     # Find data
     Data = Real_Data[Real_Data_Cols]
     Label = Real_Data[Real_Label_Col]
 
-    # train/test split for evaluation
-    from sklearn import preprocessing
-    from sklearn.model_selection import train_test_split
+    # Size the model to the data
+    iterations, model_params["depth"] = tree_settings(
+        tree_iterations,
+        tree_depth,
+        number_rows=len(Data),
+        number_classes=Label.nunique(),
+        device=device,
+    )
+
+    # Reuse a model trained on the same data with the same settings
+    if cache_directory is not None:
+        key = model_cache_key(
+            Data,
+            Label,
+            {
+                "target": Real_Label_Col,
+                "cat_features": Cat_Features,
+                "seed": seed if seeded else None,
+                "iterations": iterations,
+                "model_params": {
+                    x: model_params[x]
+                    for x in model_params
+                    if x not in ("thread_count", "devices")
+                },
+                "early_stopping_rounds": early_stopping_rounds,
+                "weighted_training": weighted_training,
+            },
+        )
+
+        model, model_info = load_cached_model(cache_directory, key)
+
+        if model is not None:
+            print("\n" + "Loaded trained model from cache")
+
+            if model_report is not None:
+                model_report.append(dict(model_info, cached=True))
 
+            return model
+
+    # Repeated rows are trained on once with a weight if that saves enough
+    unique_data, counts = unique_row_counts(Data, Label)
+
+    compression = len(Data) / max(len(unique_data), 1)
+
+    weighted = use_weighted_training(weighted_training, compression)
+
+    if weighted:
+        print(
+            "\n"
+            + "Training on "
+            + str(len(unique_data))
+            + " unique rows of "
+            + str(len(Data))
+            + " with weights"
+        )
+
+        Data = unique_data[Real_Data_Cols]
+        Label = unique_data[Real_Label_Col]
+        weights = counts.astype(np.float64)
+
+    else:
+        weights = None
+
+    # train/test split for evaluation
     test_size = 0.2
-    X_train, X_test, Y_train, Y_test = train_test_split(
-        Data, Label, test_size=test_size, random_state=seed
-    )
+
+    if weighted:
+        train_counts, eval_counts = split_counts(counts, test_size, seed)
+
+        train_rows = train_counts > 0
+        eval_rows = eval_counts > 0
+
+        X_train = Data[train_rows]
+        X_test = Data[eval_rows]
+        Y_train = Label[train_rows]
+        Y_test = Label[eval_rows]
+        W_train = train_counts[train_rows].astype(np.float64)
+        W_test = eval_counts[eval_rows].astype(np.float64)
+
+    else:
+        from sklearn.model_selection import train_test_split
+
+        X_train, X_test, Y_train, Y_test = train_test_split(
+            Data, Label, test_size=test_size, random_state=seed
+        )
+        W_train = None
+        W_test = None
 
     # Setting up model
     train_data = X_train
@@ -92,33 +527,47 @@ def tree_synth(
 
     try:
         train_dataset = Pool(
-            data=train_data, label=train_label, cat_features=cat_features
+            data=train_data,
+            label=train_label,
+            cat_features=cat_features,
+            weight=W_train,
         )
 
         eval_dataset = Pool(
-            data=eval_data, label=eval_label, cat_features=cat_features
+            data=eval_data,
+            label=eval_label,
+            cat_features=cat_features,
+            weight=W_test,
         )
 
         # Initialize CatBoostClassifier
         model = CatBoostClassifier(
-            iterations=400,
-            task_type="GPU",
-            devices=GPU_IDs,
+            iterations=iterations,
             learning_rate=0.11,
-            depth=11,
             verbose=10,
             loss_function="MultiClass",
+            **model_params
         )
-        # Fit model
-        print("\n" + "Fitting Multi-Classification Tree Model")
-        model.fit(train_dataset)
-
-        # Get predicted RawFormulaVal
-        preds_raw = model.predict(
-            eval_dataset, prediction_type="RawFormulaVal"
+        # Fit model, stopping once the eval data stops improving
+        print("\n" + "Fitting Multi-Classification Tree Model on " + device)
+        model.fit(
+            train_dataset,
+            eval_set=eval_dataset,
+            early_stopping_rounds=early_stopping_rounds or None,
+            use_best_model=bool(early_stopping_rounds),
         )
 
-        preds_class = model.predict(Synthetc_Prob_Df)
+        pooled = False
+
+        best_iteration = model.get_best_iteration()
+
+        print(
+            "Best iteration: "
+            + str(best_iteration)
+            + " of "
+            + str(model.tree_count_)
+            + " trees kept"
+        )
 
     except:
 
@@ -132,32 +581,112 @@ def tree_synth(
             + "\n"
         )
 
-        train_dataset = Pool(data=Data, label=Label, cat_features=cat_features)
+        train_dataset = Pool(
+            data=Data, label=Label, cat_features=cat_features, weight=weights
+        )
 
         # Initialize CatBoostClassifier
         model = CatBoostClassifier(
-            iterations=400,
-            task_type="GPU",
-            devices=GPU_IDs,
+            iterations=iterations,
             learning_rate=0.11,
-            depth=11,
             verbose=100,
             loss_function="MultiClass",
+            **model_params
         )
         # Fit model
         print(
             "\n"
-            + "Fitting Multi-Classification Tree Model"
-            + "- Pooled Data (NO METRICS)"
+            + "Fitting Multi-Classification Tree Model on "
+            + device
+            + " - Pooled Data (NO METRICS)"
         )
 
+        pooled = True
+
         model.fit(train_dataset)
 
-        # Get predicted RawFormulaVal
-        preds_raw = model.predict(
-            train_dataset, prediction_type="RawFormulaVal"
+        # No eval data so every iteration is kept
+        best_iteration = None
+
+    model_info = {
+        "target": Real_Label_Col,
+        "device": device,
+        "pooled": pooled,
+        "iterations": iterations,
+        "depth": model_params["depth"],
+        "best_iteration": best_iteration,
+        "weighted": weighted,
+        "training_rows": len(Data),
+    }
+
+    if model_report is not None:
+        model_report.append(dict(model_info, cached=False))
+
+    if cache_directory is not None:
+        save_cached_model(
+            model, model_info, cache_directory, key, cache_size_limit
         )
 
-        preds_class = model.predict(Synthetc_Prob_Df)
+    return model
+
+
+def tree_synth(
+    Synthetc_Prob_Df,
+    Real_Data,
+    Real_Data_Cols,
+    Real_Label_Col,
+    Rand_Seed,
+    Cat_Features,
+    GPU_IDs,
+    **fit_options
+):
+
+    """ Main tree synthesis algorithm.
+
+    Parameters
+    ----------
+    Synthetc_Prob_Df: pd.Dataframe
+        The previously generated demographics from the probability function.
+
+    Real_Data: pd.dataframe
+        A subset of the original real data file to be worked on.
+
+    Real_Data_Cols: list
+        The data to be trained on.
+
+    Real_Label_Col: string
+        Target label.
+
+    Rand_Seed: integer
+        For replicability, sets the randomness of the train/test split.
+
+    Cat_Features: list
+        The columns in your data NOT continous numeric.
+
+    GPU_IDs: list
+        The IDs of the GPUs to train on.
+
+    **fit_options:
+        The optional arguments of tree_fit().
+
+
+    Returns
+    -------
+        preds_class: np.array
+            An array of predicted values that can be appended to a dataframe
+            by later functions.
+    """
+
+    model = tree_fit(
+        Real_Data,
+        Real_Data_Cols,
+        Real_Label_Col,
+        Rand_Seed,
+        Cat_Features,
+        GPU_IDs,
+        **fit_options
+    )
+
+    preds_class = model.predict(Synthetc_Prob_Df)
 
     return preds_class
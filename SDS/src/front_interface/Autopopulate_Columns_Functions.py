@@ -10,9 +10,6 @@ import textwrap
 import csv
 
 # External library imports
-import numpy as np
-import pandas as pd
-from pandas.api.types import is_numeric_dtype, is_datetime64_dtype
 import yaml
 
 ### General Information
@@ -23,9 +20,9 @@ Gardner, E. (2019). Synthetic Data Experimental Research System (Version 0.1a)
     [software]. Avaliable from: https://github.com/SDS-Architect/SDS_Public
 """
 
-def read_col_names(file_path):
+def read_col_names(file_path, file_format=None):
     """ Function designed to simply read in only the columns of a csv
-        file without loading the full file"""
+        or Parquet file without loading the full file"""
 
     """
     Parameters
@@ -33,6 +30,9 @@ def read_col_names(file_path):
     file_path: str
         Simple string for path to the needed file.
 
+    file_format: str, optional
+        Either "csv" or "parquet", otherwise taken from the extension.
+
 
     Returns
     -------
@@ -40,6 +40,15 @@ def read_col_names(file_path):
         A list of all column headers in file.
     """
 
+    # Loaded here so reading a control file doesn't wait on pandas
+    from SDS.src.back_end.General_Utility.File_Ingestion import (
+        file_format_from_path,
+        read_column_names,
+    )
+
+    if file_format_from_path(file_path, file_format) == "parquet":
+        return read_column_names(file_path, "parquet")
+
     with open(file_path, "r") as f:
         d_reader = csv.DictReader(f)
 
@@ -49,6 +58,119 @@ def read_col_names(file_path):
     return headers
 
 
+def read_optional_control(control_variables, section, key, default=None):
+    """ Function to read an optional single value from the control file.
+        Missing sections/keys and empty lists return the default."""
+
+    """
+    Parameters
+    ----------
+    control_variables: dict
+        The loaded control file.
+
+    section: str
+        The heading in the control file, e.g. "Computer Parameters".
+
+    key: str
+        The name of the parameter in that section.
+
+    default: optional
+        Returned if the parameter has not been filled in.
+
+
+    Returns
+    -------
+    value:
+        The first value of the parameter, or default.
+    """
+
+    value = (control_variables.get(section) or {}).get(key)
+
+    if value is None or value == []:
+        return default
+
+    if isinstance(value, list):
+        return value[0]
+
+    return value
+
+
+def read_list_control(control_variables, section, key):
+    """ Function to read an optional list of values from the control file.
+        Missing sections/keys return an empty list, as in the template."""
+
+    """
+    Parameters
+    ----------
+    control_variables: dict
+        The loaded control file.
+
+    section: str
+        The heading in the control file, e.g. "Optional Parameters".
+
+    key: str
+        The name of the parameter in that section.
+
+
+    Returns
+    -------
+    values: list
+        The values of the parameter.
+    """
+
+    value = (control_variables.get(section) or {}).get(key)
+
+    if value is None:
+        return []
+
+    if not isinstance(value, list):
+        return [value]
+
+    return value
+
+
+def read_required_control(control_variables, section, key, single=False):
+    """ Function to read a parameter that must be filled in from the control
+        file. Missing sections/keys and empty lists raise a ValueError."""
+
+    """
+    Parameters
+    ----------
+    control_variables: dict
+        The loaded control file.
+
+    section: str
+        The heading in the control file, e.g. "Column Parameters".
+
+    key: str
+        The name of the parameter in that section.
+
+    single: bool, optional
+        If True, the first value is returned rather than the list.
+
+
+    Returns
+    -------
+    value:
+        The parameter as written, or its first value if single.
+    """
+
+    value = (control_variables.get(section) or {}).get(key)
+
+    if value is None or value == []:
+        raise ValueError(
+            'Please fill in "' + key + '" in the ' + section + " section"
+        )
+
+    if single:
+        return read_optional_control(control_variables, section, key)
+
+    if not isinstance(value, list):
+        return [value]
+
+    return value
+
+
 """
 Please note that all code below is taken from:
 
@@ -62,6 +184,8 @@ def convert_dtypes(dtype):
     """
     Rename pandas default dtypes for readability
     """
+    from pandas.api.types import is_numeric_dtype, is_datetime64_dtype
+
     if is_numeric_dtype(dtype):
         return "Continuous"
     elif is_datetime64_dtype(dtype):
@@ -111,6 +235,8 @@ def create_control_file(column_headers=None):
                 "Synthetic File Parameters": {
                     "Output File Name": [],
                     "Number of Rows": [],
+                    "Input File Format": [],
+                    "Output File Format": [],
                 }
             }
         )
@@ -131,7 +257,10 @@ def create_control_file(column_headers=None):
                     "Numeric Grouping Columns": [],
                     "Synthetic Label Columns": [],
                     "Synthetic Label Structure": [],
+                    "Hierarchical Labels": [],
+                    "Sample Branches Below Rows": [],
                     "Date Columns": [],
+                    "Random Seed": [],
                 }
             }
         )
@@ -141,8 +270,22 @@ def create_control_file(column_headers=None):
                 "Computer Parameters": {
                     "Group Size": [],
                     "Graphics Card(s) ID Number(s)": [],
+                    "Training Device": [],
                     "Number of Training Cycles for Random Forests": [],
                     "Depth of Random Forests Allowed": [],
+                    "Early Stopping Rounds": [],
+                    "Parallel Model Fits": [],
+                    "Empirical Sampling Below Rows": [],
+                    "Weighted Training": [],
+                    "Pool Target Classes Below Count": [],
+                    "CSV Chunk Size": [],
+                    "Parquet Row Group Size": [],
+                    "Cache Directory": [],
+                    "Cache Size Limit (MB)": [],
+                    "Target Rows per Batch": [],
+                    "Max Groups per Batch": [],
+                    "Number of Workers": [],
+                    "Run Directory": [],
                 }
             }
         )
@@ -1,16 +1,16 @@
-import psutil
 import platform
 from datetime import datetime
 
 import os
 import sys
-from tkinter import Tk
-from tkinter.filedialog import askopenfilename
 
 from SDS.src.front_interface.terminalsize import get_terminal_size
 
-from SDS.src.front_interface.test_gpu import ConvertSMVer2Cores, main
-import numpy
+from SDS.src.front_interface.test_gpu import (
+    ConvertSMVer2Cores,
+    cuda_device_count,
+    main,
+)
 
 ### General Information
 """
@@ -34,6 +34,10 @@ def open_file():
     main_file: pd.DataFrame
         A pandas dataframe of the selected file.
     """
+    # Only needed for the file picker, so not loaded on headless runs
+    from tkinter import Tk
+    from tkinter.filedialog import askopenfilename
+
     # Load a Tk Inter instance
     root = Tk()
     root.withdraw()
@@ -105,6 +109,9 @@ def testing():
 
     """
 
+    # Only needed for this machine test, so not loaded on headless runs
+    import psutil
+
     ### Obtain width of terminal for printing
     size_x, size_y = get_terminal_size()
 
@@ -215,7 +222,12 @@ def testing():
         + "-" * int(size_x - (int(size_x / 2) + len(cur_message)))
     )
 
-    gpu_total = main()
+    if cuda_device_count() > 0:
+        gpu_total = main()
+
+    else:
+        print("No CUDA GPU found, models will be trained on the CPU")
+        gpu_total = []
 
     print("-" * size_x)
     print("\n")
@@ -287,6 +299,15 @@ def testing():
 
     ### Calculate Avaliable Memory
 
+    if not isinstance(gpu_total, list) or sum(gpu_total) == 0:
+        print("GPU Memory Check: SKIPPED")
+        print("No usable GPU, the CPU training settings will be used")
+        print("\n")
+
+        print("=" * size_x)
+        print("\n")
+        return file_path
+
     gpu_total = sum(gpu_total)
 
     if int(raw_byte) / gpu_total * 100 <= 50:
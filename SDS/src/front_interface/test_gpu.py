@@ -61,6 +61,35 @@ CU_DEVICE_ATTRIBUTE_CLOCK_RATE = 13
 CU_DEVICE_ATTRIBUTE_MEMORY_CLOCK_RATE = 36
 
 
+def cuda_device_count():
+    # Returns the number of CUDA devices without printing anything, or 0 if
+    # the CUDA driver can't be loaded or started (e.g. a machine with no GPU).
+    libnames = ("libcuda.so", "libcuda.dylib", "cuda.dll")
+    for libname in libnames:
+        try:
+            cuda = ctypes.CDLL(libname)
+        except OSError:
+            continue
+        else:
+            break
+    else:
+        return 0
+
+    nGpus = ctypes.c_int()
+
+    try:
+        if cuda.cuInit(0) != CUDA_SUCCESS:
+            return 0
+
+        if cuda.cuDeviceGetCount(ctypes.byref(nGpus)) != CUDA_SUCCESS:
+            return 0
+
+    except (AttributeError, OSError):
+        return 0
+
+    return nGpus.value
+
+
 def main():
     libnames = ("libcuda.so", "libcuda.dylib", "cuda.dll")
     for libname in libnames:
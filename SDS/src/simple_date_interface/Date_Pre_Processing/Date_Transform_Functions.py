@@ -59,6 +59,10 @@ def date_only(dataframe, date_columns):
     working_df = dataframe.copy()
 
     for column in date_columns:
+        # Dates loaded as categories are handled as plain strings
+        if isinstance(working_df[column].dtype, pd.CategoricalDtype):
+            working_df[column] = working_df[column].astype(object)
+
         working_df[column].fillna("9999-12-31 00:00:00", inplace=True)
         working_df[column] = working_df[column].apply(date_strip)
 
@@ -0,0 +1,235 @@
+""" Test files for Cache_Utilities functions """
+
+### Load in test module
+import SDS.src.back_end.General_Utility.Cache_Utilities as tm
+import SDS.src.back_end.Looping_Control_Methods.Synthesis_Loop_vars as sl
+
+### Load in needed libraries
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+
+
+class Test_Cache_Key(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR hash_file(), hash_config() and cache_key()
+    ---------------------------------------------------------------------------
+    Testing the key changes with the file contents and settings, and only
+    with them.
+    """
+
+    def test_key_invalidation(self):
+        """ Tests a changed file or setting gives a new key. """
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "real.csv")
+
+            with open(file_path, "w") as f:
+                f.write("SEX,LOC\nF,A\n")
+
+            key = tm.cache_key(file_path, {"remove_small_vals": 5})
+
+            # Same contents under another name, and settings in another order
+            other_path = os.path.join(directory, "copy.csv")
+
+            with open(other_path, "w") as f:
+                f.write("SEX,LOC\nF,A\n")
+
+            self.assertEqual(tm.hash_file(file_path), tm.hash_file(other_path))
+            self.assertEqual(
+                tm.hash_config({"a": 1, "b": [2]}),
+                tm.hash_config({"b": [2], "a": 1}),
+            )
+            self.assertEqual(
+                key, tm.cache_key(other_path, {"remove_small_vals": 5})
+            )
+
+            self.assertNotEqual(
+                key, tm.cache_key(file_path, {"remove_small_vals": 6})
+            )
+
+            with open(file_path, "a") as f:
+                f.write("M,B\n")
+
+            self.assertNotEqual(
+                key, tm.cache_key(file_path, {"remove_small_vals": 5})
+            )
+
+
+class Test_Compact(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR dumps_compact() and loads_compact()
+    ---------------------------------------------------------------------------
+    Testing nested outputs with DataFrames come back as they were saved.
+    """
+
+    def test_round_trip(self):
+        """ Tests frames, lists and dicts survive a save and load. """
+
+        frame = pd.DataFrame({"SEX": ["F", "M", "F"], "AGE": [1, 2, 3]})
+
+        value = (frame, ["SEX"], {"mapping": {"F": 0}, "frame": frame}, None)
+
+        restored = tm.loads_compact(tm.dumps_compact(value))
+
+        pd.testing.assert_frame_equal(restored[0], frame)
+        pd.testing.assert_frame_equal(restored[2]["frame"], frame)
+        self.assertEqual(restored[1], ["SEX"])
+        self.assertEqual(restored[2]["mapping"], {"F": 0})
+        self.assertIsNone(restored[3])
+
+
+class Test_Evict_Cache(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR evict_cache()
+    ---------------------------------------------------------------------------
+    Testing the least recently used files go first and kept files stay.
+    """
+
+    def write_entries(self, directory):
+        """ Writes 100 byte entries a.pkl, b.pkl and c.pkl, a used first. """
+
+        for mtime, name in enumerate(["a.pkl", "b.pkl", "c.pkl"]):
+            path = os.path.join(directory, name)
+
+            with open(path, "wb") as f:
+                f.write(b"0" * 100)
+
+            os.utime(path, (1000 + mtime, 1000 + mtime))
+
+    def test_lru_order(self):
+        """ Tests a used entry outlives older unused ones. """
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_entries(directory)
+
+            # Using a makes it the most recent
+            tm.touch_cache_file(os.path.join(directory, "a.pkl"))
+
+            with open(os.path.join(directory, "notes.txt"), "w") as f:
+                f.write("0" * 1000)
+
+            removed = tm.evict_cache(directory, 150, suffixes=(".pkl",))
+
+            self.assertEqual(removed, ["b.pkl", "c.pkl"])
+            self.assertEqual(
+                sorted(os.listdir(directory)), ["a.pkl", "notes.txt"]
+            )
+
+    def test_keep(self):
+        """ Tests a kept entry is skipped even if it is the oldest. """
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_entries(directory)
+
+            keep = os.path.join(directory, "a.pkl")
+
+            removed = tm.evict_cache(directory, 50, keep=(keep,))
+
+            self.assertEqual(removed, ["b.pkl", "c.pkl"])
+            self.assertEqual(os.listdir(directory), ["a.pkl"])
+
+
+class Test_Cached_Prep(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR cached_prep_synth_loop()
+    ---------------------------------------------------------------------------
+    Testing a rerun loads the cache, a change misses it and outputs larger
+    than the limit are not cached.
+    """
+
+    def setUp(self):
+
+        self.directory = tempfile.TemporaryDirectory()
+
+        self.cache_directory = os.path.join(self.directory.name, "cache")
+
+        self.file_path = os.path.join(self.directory.name, "real.csv")
+
+        with open(self.file_path, "w") as f:
+            f.write("SEX,LOC\nF,A\nM,B\n")
+
+        self.prep_outputs = (pd.DataFrame({"SEX": ["F", "M"]}), {"F": 0})
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+
+    def run_prep(self, cache_size_limit=None, **prep_arguments):
+        """ Runs the cached prep, counting the calls of prep_synth_loop. """
+
+        with mock.patch.object(
+            sl, "prep_synth_loop", return_value=self.prep_outputs
+        ) as prep:
+            with contextlib.redirect_stdout(io.StringIO()):
+                outputs = sl.cached_prep_synth_loop(
+                    cache_directory=self.cache_directory,
+                    cache_size_limit=cache_size_limit,
+                    file_path=self.file_path,
+                    **prep_arguments
+                )
+
+        return (outputs, prep.call_count)
+
+    def test_hit_and_miss(self):
+        """ Tests the second run is loaded and a new setting misses. """
+
+        self.assertEqual(self.run_prep(remove_small_vals=5)[1], 1)
+
+        outputs, calls = self.run_prep(remove_small_vals=5)
+
+        self.assertEqual(calls, 0)
+        pd.testing.assert_frame_equal(outputs[0], self.prep_outputs[0])
+        self.assertEqual(outputs[1], {"F": 0})
+
+        self.assertEqual(self.run_prep(remove_small_vals=6)[1], 1)
+
+        with open(self.file_path, "a") as f:
+            f.write("F,B\n")
+
+        self.assertEqual(self.run_prep(remove_small_vals=5)[1], 1)
+
+    def test_new_entry_kept(self):
+        """ Tests the entry just saved is not the one evicted. """
+
+        self.run_prep(remove_small_vals=5)
+
+        entry_name = os.listdir(self.cache_directory)[0]
+
+        entry_size = os.path.getsize(
+            os.path.join(self.cache_directory, entry_name)
+        )
+
+        # Room for one entry only, so the older one goes
+        limit = 1.5 * entry_size / 1024 ** 2
+
+        self.run_prep(cache_size_limit=limit, remove_small_vals=6)
+
+        self.assertEqual(len(os.listdir(self.cache_directory)), 1)
+        self.assertEqual(
+            self.run_prep(cache_size_limit=limit, remove_small_vals=6)[1], 0
+        )
+
+    def test_too_large(self):
+        """ Tests an output bigger than the limit is not cached. """
+
+        self.run_prep(remove_small_vals=5)
+
+        entries = os.listdir(self.cache_directory)
+
+        self.run_prep(cache_size_limit=1e-6, remove_small_vals=6)
+
+        # Nothing is written, so nothing is evicted to make room for it
+        self.assertEqual(os.listdir(self.cache_directory), entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
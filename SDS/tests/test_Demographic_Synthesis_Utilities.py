@@ -0,0 +1,214 @@
+""" Test files for Demographic_Synthesis_Utilities functions """
+
+### Load in test module
+import SDS.src.back_end.Demographic_Synthesis.Demographic_Synthesis_Utilities as tm
+
+### Load in needed libraries
+import unittest
+import pandas as pd
+import numpy as np
+
+
+def iterative_low_counts(data, threshold):
+    """ The original pass by pass removal, kept to check results against. """
+
+    output_df = data.copy()
+
+    while True:
+        start_shape = output_df.shape
+
+        for col in data.columns.values:
+            counts = output_df[col].value_counts()
+            low_values = counts[counts <= threshold].index.values
+            output_df = output_df[~output_df[col].isin(low_values)]
+
+        if output_df.shape == start_shape:
+            return output_df
+
+
+class Test_Separate_Low_Counts(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR separate_low_counts()
+    ---------------------------------------------------------------------------
+    Testing the incremental removal gives the same rows as removing values
+    pass by pass over the whole dataframe.
+    """
+
+    def test_same_as_iterative(self):
+        """ Tests skewed random data with missing values. """
+
+        rng = np.random.RandomState(0)
+
+        for threshold in [0, 1, 3, 6]:
+            test_df = pd.DataFrame(
+                {
+                    "Column_" + str(i): rng.zipf(1.6, size=2000).astype(str)
+                    for i in range(4)
+                }
+            )
+            test_df.loc[rng.rand(2000) < 0.05, "Column_1"] = np.nan
+
+            result = tm.separate_low_counts(
+                test_df, threshold, print_statement=False
+            )
+
+            pd.testing.assert_frame_equal(
+                result, iterative_low_counts(test_df, threshold)
+            )
+
+    def test_chain_of_removals(self):
+        """ Tests removals that only show up after other rows are gone. """
+
+        codes = [np.array([0, 0, 1, 1]), np.array([0, 1, 1, 1])]
+
+        keep, passes, rows_removed = tm.low_count_fixpoint(codes, 1)
+
+        self.assertEqual(list(keep), [False, False, True, True])
+        self.assertEqual(rows_removed, 2)
+        self.assertEqual(passes, 2)
+
+
+class Test_Create_Group_Index(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR create_group_index() and group_slice()
+    ---------------------------------------------------------------------------
+    Testing the rows are sorted into runs of groups and sliced by offsets.
+    """
+
+    def setUp(self):
+
+        self.test_df = pd.DataFrame(
+            {"Combi": ["b", "a", "c", "a", "b", "a", "d"], "Row": range(7)},
+            index=[10, 11, 12, 13, 14, 15, 16],
+        )
+
+    def test_default_order(self):
+        """ Tests groups are largest first and rows keep their order. """
+
+        output_df, group_index = tm.create_group_index(self.test_df)
+
+        self.assertEqual(group_index["groups"][:2], ["a", "b"])
+        self.assertEqual(list(group_index["offsets"]), [0, 3, 5, 6, 7])
+        self.assertIsNone(group_index["lookup"])
+
+        # The original index is kept and rows keep their order in a group
+        self.assertEqual(list(output_df.index[:5]), [11, 13, 15, 10, 14])
+
+    def test_groups_list(self):
+        """ Tests empty groups, dropped groups and slices of several. """
+
+        output_df, group_index = tm.create_group_index(
+            self.test_df, groups_list=["c", "e", "a", "b"], lookup="lookup"
+        )
+
+        # "d" is not in groups_list and "e" has no rows
+        self.assertEqual(list(group_index["offsets"]), [0, 1, 1, 4, 6])
+        self.assertEqual(len(output_df), 6)
+        self.assertEqual(group_index["lookup"], "lookup")
+
+        self.assertEqual(len(tm.group_slice(output_df, group_index, 1, 2)), 0)
+        self.assertEqual(
+            list(tm.group_slice(output_df, group_index, 0, 3)["Row"]),
+            [2, 1, 3, 5],
+        )
+        self.assertEqual(
+            list(tm.group_slice(output_df, group_index, 3, 9)["Row"]),
+            [0, 4],
+        )
+
+
+class Test_Group_Index(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR create_filtered_index()
+    ---------------------------------------------------------------------------
+    Testing the integer Combi ids and that each group is one block of rows.
+    """
+
+    def setUp(self):
+        """ Label encoded codes where plain joining of strings collides. """
+
+        self.test_df = pd.DataFrame(
+            {
+                "Column_1": ["1", "11", "1", "11", "2", "1"],
+                "Column_2": ["11", "1", "11", "1", "2", "11"],
+            }
+        )
+
+    def test_combination_codes_distinct(self):
+        """ Tests '1' + '11' and '11' + '1' are different groups. """
+
+        combi, lookup = tm.combination_codes(
+            self.test_df, ["Column_1", "Column_2"]
+        )
+
+        self.assertEqual(list(combi), [0, 1, 0, 1, 2, 0])
+
+        pd.testing.assert_frame_equal(
+            lookup.loc[combi].reset_index(drop=True),
+            self.test_df,
+        )
+
+    def test_group_slices(self):
+        """ Tests each slice holds exactly the rows of its groups. """
+
+        output_df, groups_list, group_index = tm.create_filtered_index(
+            self.test_df, ["Column_1", "Column_2"], 0, print_statement=False
+        )
+
+        # Largest group first
+        self.assertEqual(groups_list, [0, 1, 2])
+
+        for position, group in enumerate(groups_list):
+            working_df = tm.group_slice(
+                output_df, group_index, position, position + 1
+            )
+
+            expected = output_df[output_df["Combi"] == group]
+
+            self.assertEqual(
+                sorted(working_df.index.tolist()),
+                sorted(expected.index.tolist()),
+            )
+
+        # Slices past the end are cut short
+        self.assertEqual(
+            len(tm.group_slice(output_df, group_index, 2, 10)), 1
+        )
+
+
+class Test_Schedule_Batches(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR schedule_batches()
+    ---------------------------------------------------------------------------
+    Testing batches are packed by rows and cover every group once.
+    """
+
+    def test_fixed_group_size(self):
+        """ Tests the default batches of group_size groups. """
+
+        batches = tm.schedule_batches([5, 4, 3, 2, 1], group_size=2)
+
+        self.assertEqual(batches, [(0, 2), (2, 4), (4, 5)])
+
+    def test_packed_by_rows(self):
+        """ Tests big groups are alone and small groups are joined. """
+
+        group_counts = [500, 120, 60, 30, 10, 5, 5, 1, 1, 1]
+
+        batches = tm.schedule_batches(
+            group_counts, target_rows=100, max_groups=4
+        )
+
+        self.assertEqual(batches, [(0, 1), (1, 2), (2, 5), (5, 9), (9, 10)])
+
+        # Every group once, in order
+        covered = [i for start, end in batches for i in range(start, end)]
+        self.assertEqual(covered, list(range(len(group_counts))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+""" Test files for Empirical_Sampler functions """
+
+### Load in test module
+import SDS.src.back_end.Machine_Learning_Synthesis.Empirical_Sampler as tm
+
+### Load in needed libraries
+import unittest
+import pandas as pd
+import numpy as np
+
+
+class Test_Empirical_Sampler(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR empirical_sample()
+    ---------------------------------------------------------------------------
+    Testing sampling from seen contexts, backoff for unseen contexts and the
+    sampled proportions.
+    """
+
+    def setUp(self):
+        self.real_data = pd.DataFrame(
+            {
+                "Column_1": ["1", "1", "2", "2", "2"],
+                "Column_2": ["1", "2", "1", "1", "2"],
+                "Target": ["A", "B", "C", "C", "D"],
+            }
+        )
+
+        self.random_state = np.random.RandomState(0)
+
+    def test_seen_context(self):
+        """ Tests a context with one real row always gives its target. """
+
+        synth = pd.DataFrame({"Column_1": ["1", "1"], "Column_2": ["1", "2"]})
+
+        result = tm.empirical_sample(
+            self.real_data[["Column_1", "Column_2"]],
+            self.real_data["Target"],
+            synth,
+            random_state=self.random_state,
+        )
+
+        self.assertEqual(list(result), ["A", "B"])
+
+    def test_backoff(self):
+        """ Tests unseen contexts use fewer columns, then all rows. """
+
+        synth = pd.DataFrame(
+            {"Column_1": ["2"] * 200 + ["9"] * 200, "Column_2": ["7"] * 400}
+        )
+
+        result = tm.empirical_sample(
+            self.real_data[["Column_1", "Column_2"]],
+            self.real_data["Target"],
+            synth,
+            random_state=self.random_state,
+        )
+
+        # Column_1 = 2 is seen, so only its targets are used
+        self.assertEqual(set(result[:200]), {"C", "D"})
+
+        # Nothing is seen, so all targets are possible
+        self.assertEqual(set(result[200:]), {"A", "B", "C", "D"})
+
+    def test_proportions(self):
+        """ Tests sampled proportions follow the real ones. """
+
+        synth = pd.DataFrame({"Column_1": ["2"] * 30000})
+
+        result = tm.empirical_sample(
+            self.real_data[["Column_1"]],
+            self.real_data["Target"],
+            synth,
+            random_state=self.random_state,
+        )
+
+        self.assertAlmostEqual(np.mean(result == "C"), 2 / 3, places=2)
+
+    def test_constant_features(self):
+        """ Tests only features with one value each count as constant. """
+
+        single_group = pd.DataFrame({"LOC": ["A"] * 3, "SEX": ["F"] * 3})
+
+        self.assertTrue(tm.constant_features(single_group, ["LOC", "SEX"]))
+        self.assertFalse(
+            tm.constant_features(self.real_data, ["Column_1", "Column_2"])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+""" Test files for File_Ingestion functions """
+
+### Load in test module
+import SDS.src.back_end.General_Utility.File_Ingestion as tm
+
+### Load in needed libraries
+import os
+import tempfile
+import unittest
+import pandas as pd
+import numpy as np
+
+
+class Test_File_Ingestion(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR chunked_read_csv()
+    ---------------------------------------------------------------------------
+    Testing that a chunked load holds the same values as a plain pandas load
+    while using compact types.
+    """
+
+    def setUp(self):
+        """ Writes a small toy file with a missing value in the last chunk. """
+
+        rng = np.random.RandomState(0)
+
+        self.test_df = pd.DataFrame(
+            {
+                "Column_1": rng.choice(["A", "B", "C"], size=1000),
+                "Column_2": rng.randint(0, 100, size=1000),
+                "Column_3": rng.normal(size=1000),
+            }
+        )
+
+        self.test_df.loc[998, "Column_1"] = np.nan
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "test_1.csv")
+        self.test_df.to_csv(self.file_path, index=False)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_chunked_read_same_values(self):
+        """ Tests chunked values match a plain read_csv. """
+
+        result, peak_memory = tm.chunked_read_csv(
+            self.file_path, chunk_size=128, sample_rows=200
+        )
+
+        expected = pd.read_csv(self.file_path)
+
+        pd.testing.assert_frame_equal(
+            result.astype(object), expected.astype(object)
+        )
+
+        self.assertGreater(peak_memory, 0)
+
+    def test_chunked_read_compact_types(self):
+        """ Tests text columns are categories and integers downcast. """
+
+        result, peak_memory = tm.chunked_read_csv(
+            self.file_path, chunk_size=128, sample_rows=200
+        )
+
+        self.assertIsInstance(result["Column_1"].dtype, pd.CategoricalDtype)
+        self.assertEqual(result["Column_2"].dtype, np.int8)
+        self.assertEqual(result["Column_3"].dtype, np.float64)
+
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR read_parquet_file()
+    ---------------------------------------------------------------------------
+    Testing that Parquet files only return the columns asked for.
+    """
+
+    def test_parquet_column_projection(self):
+        """ Tests only projected columns are read from Parquet. """
+
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+
+        from SDS.src.back_end.General_Utility.File_Output import (
+            write_output_file,
+        )
+
+        parquet_path = os.path.join(self.temp_dir.name, "test_1.parquet")
+
+        write_output_file(self.test_df, parquet_path, row_group_size=100)
+
+        result = tm.read_parquet_file(parquet_path, columns=["Column_2"])
+
+        self.assertEqual(list(result), ["Column_2"])
+
+        self.assertEqual(
+            tm.read_column_names(parquet_path),
+            ["Column_1", "Column_2", "Column_3"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
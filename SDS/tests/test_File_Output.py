@@ -0,0 +1,243 @@
+""" Test files for File_Output functions """
+
+### Load in test module
+import SDS.src.back_end.General_Utility.File_Output as tm
+from SDS.src.back_end.General_Utility.File_Ingestion import read_parquet_file
+
+### Load in needed libraries
+import os
+import tempfile
+import unittest
+import pandas as pd
+import numpy as np
+
+
+class Test_Batch_File_Writer(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR Batch_File_Writer
+    ---------------------------------------------------------------------------
+    Testing decoded batches written to Parquet keep their numeric and date
+    types when read back, under one schema set by the first batch.
+    """
+
+    def setUp(self):
+
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.file_path = os.path.join(self.temp_dir.name, "synthetic.parquet")
+
+        # Decoded batches hold text, with " " and "NaN" for missing values
+        self.batches = [
+            pd.DataFrame(
+                {
+                    "SEX": ["F", "M"],
+                    "AGE": ["34", 71],
+                    "WEIGHT": ["70.5", "81.0"],
+                    "CODE": ["007", "120"],
+                    "ADMITTIME": ["04-03-2151", "21-11-2150"],
+                    "NOTES": [None, None],
+                }
+            ),
+            pd.DataFrame(
+                {
+                    "SEX": ["F", " "],
+                    "AGE": [" ", "5"],
+                    "WEIGHT": ["64.25", " "],
+                    "CODE": ["301", " "],
+                    "ADMITTIME": ["NaN", "01-01-2151"],
+                    "NOTES": ["late", " "],
+                }
+            ),
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parquet_round_trip(self):
+        """ Tests numbers and dates are typed and missing values are null. """
+
+        with tm.Batch_File_Writer(self.file_path, row_group_size=1) as writer:
+            for batch in self.batches:
+                writer.write(batch)
+
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(self.file_path)
+
+        self.assertEqual(str(schema.field("AGE").type), "int64")
+        self.assertEqual(str(schema.field("WEIGHT").type), "double")
+        self.assertEqual(str(schema.field("CODE").type), "string")
+        self.assertEqual(str(schema.field("NOTES").type), "string")
+
+        result = read_parquet_file(self.file_path)
+
+        self.assertEqual(len(result), 4)
+        self.assertEqual(list(result["AGE"].fillna(-1)), [34, 71, -1, 5])
+        self.assertEqual(result["WEIGHT"].dtype, np.float64)
+        self.assertTrue(
+            pd.api.types.is_datetime64_any_dtype(result["ADMITTIME"].dtype)
+        )
+        self.assertEqual(
+            result["ADMITTIME"].iloc[0], pd.Timestamp("2151-03-04")
+        )
+        self.assertTrue(pd.isna(result["ADMITTIME"].iloc[2]))
+
+        # Leading zeros and text are kept as they were
+        self.assertEqual(list(result["CODE"]), ["007", "120", "301", " "])
+        self.assertEqual(list(result["SEX"]), ["F", "M", "F", " "])
+        self.assertEqual(list(result["NOTES"])[2:], ["late", " "])
+
+    def test_integer_column_without_missing(self):
+        """ Tests whole numbers with no missing values stay integers. """
+
+        with tm.Batch_File_Writer(self.file_path) as writer:
+            writer.write(pd.DataFrame({"COUNT": ["1", "2"]}))
+            writer.write(pd.DataFrame({"COUNT": ["3"]}))
+
+        result = read_parquet_file(self.file_path)
+
+        self.assertTrue(pd.api.types.is_integer_dtype(result["COUNT"].dtype))
+        self.assertEqual(list(result["COUNT"]), [1, 2, 3])
+
+    def test_value_outside_schema(self):
+        """ Tests a later batch that doesn't fit widens the written column. """
+
+        with tm.Batch_File_Writer(self.file_path, row_group_size=1) as writer:
+            writer.write(
+                pd.DataFrame(
+                    {
+                        "COUNT": ["1", " "],
+                        "SCORE": ["3", "4"],
+                        "ADMITTIME": ["04-03-2151", "NaN"],
+                    }
+                )
+            )
+            writer.write(
+                pd.DataFrame(
+                    {
+                        "COUNT": ["2.5", "7"],
+                        "SCORE": ["many", "5"],
+                        "ADMITTIME": ["unknown", "21-11-2150"],
+                    }
+                )
+            )
+            writer.write(
+                pd.DataFrame(
+                    {"COUNT": ["3"], "SCORE": ["6"], "ADMITTIME": [" "]}
+                )
+            )
+
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(self.file_path)
+
+        self.assertEqual(str(schema.field("COUNT").type), "double")
+        self.assertEqual(str(schema.field("SCORE").type), "string")
+        self.assertEqual(str(schema.field("ADMITTIME").type), "string")
+        self.assertEqual(pq.ParquetFile(self.file_path).num_row_groups, 5)
+
+        result = read_parquet_file(self.file_path)
+
+        self.assertEqual(
+            list(result["COUNT"].fillna(-1)), [1.0, -1, 2.5, 7.0, 3.0]
+        )
+        self.assertEqual(list(result["SCORE"]), ["3", "4", "many", "5", "6"])
+        self.assertEqual(
+            list(result["ADMITTIME"]),
+            ["04-03-2151", None, "unknown", "21-11-2150", " "],
+        )
+        self.assertEqual(os.listdir(self.temp_dir.name), ["synthetic.parquet"])
+
+    def test_widen_output_types(self):
+        """ Tests only the columns a batch doesn't fit are widened. """
+
+        output_types = {
+            "AGE": ("integer", None),
+            "WEIGHT": ("float", None),
+            "ADMITTIME": ("date", "%d-%m-%Y"),
+        }
+
+        batch = pd.DataFrame(
+            {
+                "AGE": ["4", "5.5"],
+                "WEIGHT": ["1", " "],
+                "ADMITTIME": ["x", " "],
+            }
+        )
+
+        self.assertEqual(
+            tm.widen_output_types(batch, output_types),
+            {
+                "AGE": ("float", None),
+                "WEIGHT": ("float", None),
+                "ADMITTIME": ("string", None),
+            },
+        )
+
+        with self.assertRaises(ValueError):
+            tm.apply_output_types(batch, output_types)
+
+class Test_Batch_File_Writer_CSV(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR Batch_File_Writer with .csv files
+    ---------------------------------------------------------------------------
+    Testing batches are appended under one header, in the column order of
+    the first batch.
+    """
+
+    def setUp(self):
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.file_path = os.path.join(self.temp_dir.name, "synthetic.csv")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_appended_batches(self):
+        """ Tests the header is written once and later columns reordered. """
+
+        with tm.Batch_File_Writer(self.file_path) as writer:
+            writer.write(pd.DataFrame({"SEX": ["F", "M"], "LOC": ["A", " "]}))
+            writer.write(pd.DataFrame({"LOC": ["B"], "SEX": ["F"]}))
+
+        self.assertEqual(writer.rows_written, 3)
+
+        with open(self.file_path) as f:
+            self.assertEqual(
+                f.read().splitlines(), ["SEX,LOC", "F,A", "M, ", "F,B"]
+            )
+
+    def test_rewrite(self):
+        """ Tests a new writer replaces an old file rather than adding on. """
+
+        with open(self.file_path, "w") as f:
+            f.write("OLD\n1\n")
+
+        with tm.Batch_File_Writer(self.file_path) as writer:
+            writer.write(pd.DataFrame({"SEX": ["F"]}))
+
+        with open(self.file_path) as f:
+            self.assertEqual(f.read().splitlines(), ["SEX", "F"])
+
+    def test_nothing_written(self):
+        """ Tests closing with no batches leaves an empty file. """
+
+        with open(self.file_path, "w") as f:
+            f.write("OLD\n1\n")
+
+        with tm.Batch_File_Writer(self.file_path, file_format="csv"):
+            pass
+
+        self.assertEqual(os.path.getsize(self.file_path), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+""" Test files for Hierarchical_Synthesis functions """
+
+### Load in test module
+import SDS.src.back_end.Machine_Learning_Synthesis.Hierarchical_Synthesis as tm
+import SDS.src.back_end.Machine_Learning_Synthesis.ML_Synthesis_Main_debug as ml
+
+### Load in needed libraries
+import contextlib
+import io
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+
+
+class Test_Label_Prefix_Columns(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR label_prefix_columns()
+    ---------------------------------------------------------------------------
+    Testing only machine learning columns get their synthetic label.
+    """
+
+    def test_prefixes(self):
+        """ Tests the label names follow the order of synth_label_cols. """
+
+        prefixes = tm.label_prefix_columns(["AGE", "DIAG"], ["ADMIT", "DIAG"])
+
+        self.assertEqual(prefixes, {"DIAG": "Synth_Label_1"})
+        self.assertEqual(tm.label_prefix_columns(None, ["DIAG"]), {})
+
+
+class Test_Branches(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR fit_branches() and predict_branches()
+    ---------------------------------------------------------------------------
+    Testing each synthetic row only gets a code of its own prefix.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+
+        codes = rng.choice(["A01", "A02", "B10", "C20", "C21"], size=400)
+
+        self.real_data = pd.DataFrame(
+            {
+                "SEX": rng.choice(["F", "M"], size=400),
+                "Prefix": [x[0] for x in codes],
+                "DIAG": codes,
+            }
+        )
+
+        self.fitted = []
+
+        def fit_model(branch_df):
+            self.fitted.append(branch_df["Prefix"].iloc[0])
+            return "model"
+
+        self.fit_model = fit_model
+
+    def test_fit_branches(self):
+        """ Tests constant, sampled and modelled branches. """
+
+        branches = tm.fit_branches(
+            self.real_data, "DIAG", "Prefix", self.fit_model, min_rows=150
+        )
+
+        self.assertEqual(branches["B"], ("constant", "B10"))
+        self.assertEqual(branches["A"][0], "model")
+        self.assertEqual(branches["C"][0], "model")
+        self.assertEqual(sorted(self.fitted), ["A", "C"])
+
+        branches = tm.fit_branches(
+            self.real_data, "DIAG", "Prefix", self.fit_model, min_rows=1000
+        )
+
+        self.assertEqual(branches["A"][0], "empirical")
+
+    def test_predict_branches(self):
+        """ Tests codes stay in their prefix, unseen prefixes included. """
+
+        branches = tm.fit_branches(
+            self.real_data, "DIAG", "Prefix", self.fit_model, min_rows=1000
+        )
+
+        synth = pd.DataFrame(
+            {
+                "SEX": ["F"] * 300,
+                "Prefix": ["A"] * 100 + ["B"] * 100 + ["Z"] * 100,
+            }
+        )
+
+        result = tm.predict_branches(
+            branches,
+            self.real_data,
+            "DIAG",
+            "Prefix",
+            synth,
+            random_state=np.random.RandomState(0),
+        )
+
+        self.assertEqual(set(result[:100]), {"A01", "A02"})
+        self.assertEqual(set(result[100:200]), {"B10"})
+        self.assertTrue(all(x is not None for x in result[200:]))
+
+
+class Test_Branch_Min_Rows(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR branch_min_rows in fit_target_plans()
+    ---------------------------------------------------------------------------
+    Testing the smallest modelled prefix is set by branch_min_rows and not
+    by empirical_threshold.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+
+        codes = rng.choice(["A01", "A02", "C20", "C21"], size=400)
+
+        self.real_data = pd.DataFrame(
+            {
+                "SEX": rng.choice(["F", "M"], size=400),
+                "Prefix": [x[0] for x in codes],
+                "DIAG": codes,
+            }
+        )
+
+    def branches(self, **settings):
+        """ Fits the plans with a stand in model and gives the branches. """
+
+        with mock.patch.object(ml, "tree_fit", return_value="model"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                target_plans = ml.fit_target_plans(
+                    feed_real_data_sub_df=self.real_data,
+                    demographic_vars=["SEX"],
+                    ml_variables=["Prefix", "DIAG"],
+                    categorical_variables=["SEX", "Prefix", "DIAG"],
+                    GPU_IDs=["0"],
+                    seed_training=7,
+                    mapping_dict={},
+                    label_prefixes={"DIAG": "Prefix"},
+                    **settings
+                )
+
+        return target_plans[-1]["model"]
+
+    def test_branch_min_rows(self):
+        """ Tests a small empirical_threshold doesn't model small prefixes. """
+
+        branches = self.branches(empirical_threshold=5)
+
+        self.assertEqual(branches["A"][0], "model")
+
+        branches = self.branches(empirical_threshold=5, branch_min_rows=1000)
+
+        self.assertEqual(branches["A"][0], "empirical")
+        self.assertEqual(branches["C"][0], "empirical")
+
+        # Branch models no longer follow the batch threshold
+        branches = self.branches(empirical_threshold=1, branch_min_rows=50)
+
+        self.assertEqual(branches["C"][0], "model")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+""" Test files for ML_Synthesis_Utilities functions """
+
+### Load in test module
+import SDS.src.back_end.Machine_Learning_Synthesis.ML_Synthesis_Utilities as tm
+
+### Load in needed libraries
+import unittest
+from unittest import mock
+
+
+class Test_Share_Fit_Threads(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR share_fit_threads()
+    ---------------------------------------------------------------------------
+    Testing the models trained at once and their threads are never below 1
+    or above what there is to share.
+    """
+
+    def test_share(self):
+        """ Tests the threads are split between the models. """
+
+        self.assertEqual(tm.share_fit_threads(8, 2, 5), (2, 4))
+        self.assertEqual(tm.share_fit_threads(7, 2, 5), (2, 3))
+
+    def test_clamping(self):
+        """ Tests too many workers, too few threads and no setting. """
+
+        # No more workers than models or threads
+        self.assertEqual(tm.share_fit_threads(8, 4, 2), (2, 4))
+        self.assertEqual(tm.share_fit_threads(3, 8, 5), (3, 1))
+        self.assertEqual(tm.share_fit_threads(8, 4, 0), (1, 8))
+
+        self.assertEqual(tm.share_fit_threads(8, None, 5), (1, 8))
+        self.assertEqual(tm.share_fit_threads(8, 0, 5), (1, 8))
+        self.assertEqual(tm.share_fit_threads(8, -2, 5), (1, 8))
+
+        with mock.patch.object(tm.os, "cpu_count", return_value=None):
+            self.assertEqual(tm.share_fit_threads(None, 4, 5), (1, 1))
+
+        with mock.patch.object(tm.os, "cpu_count", return_value=6):
+            self.assertEqual(tm.share_fit_threads(0, 4, 5), (4, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+""" Test files for Model_Cache functions """
+
+### Load in test module
+import SDS.src.back_end.Tree_Methods.Model_Cache as tm
+import SDS.src.back_end.Tree_Methods.Tree_Functions_debug as tf
+
+### Load in needed libraries
+import os
+import tempfile
+import unittest
+import pandas as pd
+import numpy as np
+
+
+class Test_Model_Cache(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR model_cache_key() and tree_fit() with a cache_directory
+    ---------------------------------------------------------------------------
+    Testing the key follows the data and settings and that a second fit
+    loads the saved model.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+
+        self.real_data = pd.DataFrame(
+            {
+                "Column_1": rng.choice(["1", "2", "3"], size=200),
+                "Column_2": rng.choice(["1", "2"], size=200),
+            }
+        )
+
+    def test_model_cache_key(self):
+        """ Tests the key ignores the index but not values or settings. """
+
+        data = self.real_data[["Column_1"]]
+        label = self.real_data["Column_2"]
+
+        key = tm.model_cache_key(data, label, {"seed": 1})
+
+        self.assertEqual(
+            key,
+            tm.model_cache_key(
+                data.set_index(data.index + 5),
+                label.set_axis(label.index + 5),
+                {"seed": 1},
+            ),
+        )
+        self.assertNotEqual(key, tm.model_cache_key(data, label, {"seed": 2}))
+        self.assertNotEqual(
+            key,
+            tm.model_cache_key(
+                data, label.where(label.index != 0, "3"), {"seed": 1}
+            ),
+        )
+
+    def test_second_fit_from_cache(self):
+        """ Tests the cached model is used and predicts the same. """
+
+        with tempfile.TemporaryDirectory() as cache_directory:
+            reports = []
+
+            for attempt in range(2):
+                model_report = []
+
+                model = tf.tree_fit(
+                    self.real_data,
+                    ["Column_1"],
+                    "Column_2",
+                    1,
+                    [0],
+                    ["0"],
+                    thread_count=1,
+                    task_type="CPU",
+                    model_report=model_report,
+                    tree_iterations=20,
+                    cache_directory=cache_directory,
+                )
+
+                reports.append(model_report[0])
+
+                if attempt == 0:
+                    first_predictions = model.predict(
+                        self.real_data[["Column_1"]]
+                    )
+
+            self.assertFalse(reports[0]["cached"])
+            self.assertTrue(reports[1]["cached"])
+            self.assertEqual(
+                reports[0]["best_iteration"], reports[1]["best_iteration"]
+            )
+            self.assertEqual(
+                list(model.predict(self.real_data[["Column_1"]]).ravel()),
+                list(first_predictions.ravel()),
+            )
+            self.assertEqual(
+                sorted(x[-4:] for x in os.listdir(cache_directory)),
+                [".cbm", "json"],
+            )
+
+    def test_unseeded_fit_from_cache(self):
+        """ Tests an unseeded run reuses a model trained on another random
+            split, but not one of a seeded run. """
+
+        with tempfile.TemporaryDirectory() as cache_directory:
+            reports = []
+
+            for seed, seeded in [(1, True), (2, False), (3, False)]:
+                model_report = []
+
+                tf.tree_fit(
+                    self.real_data,
+                    ["Column_1"],
+                    "Column_2",
+                    seed,
+                    [0],
+                    ["0"],
+                    thread_count=1,
+                    task_type="CPU",
+                    model_report=model_report,
+                    tree_iterations=20,
+                    cache_directory=cache_directory,
+                    seeded=seeded,
+                )
+
+                reports.append(model_report[0]["cached"])
+
+            self.assertEqual(reports, [False, False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+""" Test files for Original_Data_Out functions """
+
+### Load in test module
+import SDS.src.back_end.Original_Data_Out.Original_Data_Out as tm
+import SDS.src.back_end.Looping_Control_Methods.Synthesis_Loop_vars as sl
+
+### Load in needed libraries
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+
+class Test_Filtered_Data_Export(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR filtered_data_export()
+    ---------------------------------------------------------------------------
+    Testing the filtered real data is made from the prep_synth_loop output
+    alone, decoded and in the order of the input file.
+    """
+
+    def setUp(self):
+
+        self.directory = tempfile.TemporaryDirectory()
+
+        self.file_path = os.path.join(self.directory.name, "real.csv")
+
+        # LOC C has one row, so it is removed as a small value
+        self.real_data = pd.DataFrame(
+            {
+                "SEX": ["F", "M"] * 10 + ["F"],
+                "LOC": ["A"] * 10 + ["B"] * 10 + ["C"],
+                "ADMIT": ["E", "U", None, None] * 5 + ["E"],
+                "ADMITTIME": ["2151-03-04 10:00:00"] * 20
+                + ["2150-01-01 09:30:00"],
+            }
+        )
+
+        self.real_data.to_csv(self.file_path, index=False)
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+
+    def test_export(self):
+        """ Tests small values are removed and the rest decoded. """
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            preprocessed_data = sl.prep_synth_loop(
+                categorical_variables=list(self.real_data),
+                combination_cols=["LOC"],
+                demographic_variables=["SEX", "LOC"],
+                cutting_vars=None,
+                length_cuts=None,
+                remove_small_vals=2,
+                numeric_group_vars=[],
+                number_gaussian=10,
+                GMM_cutoff=20,
+                GPU_IDs=["0"],
+                synth_label_cols=[],
+                synth_label_cols_stucture=[],
+                date_columns=["ADMITTIME"],
+                file_path=self.file_path,
+                machine_learning_variables=["ADMIT"],
+            )[-1]
+
+        # The input file is not read again
+        os.remove(self.file_path)
+
+        output_path = os.path.join(self.directory.name, "Real_Filt_x.csv")
+
+        result = tm.filtered_data_export(
+            preprocessed_data,
+            output_path,
+            list(self.real_data),
+            ["ADMITTIME"],
+        )
+
+        expected = self.real_data.iloc[:20].copy()
+        expected["ADMITTIME"] = "2151-03-04"
+
+        self.assertEqual(list(result), list(self.real_data))
+        self.assertEqual(list(result.index), list(range(20)))
+        self.assertEqual(list(result["LOC"]), list(expected["LOC"]))
+        self.assertEqual(
+            list(result["ADMITTIME"]), list(expected["ADMITTIME"])
+        )
+        self.assertEqual(list(result["ADMIT"].iloc[:4]), ["E", "U", " ", " "])
+
+        saved = pd.read_csv(output_path, keep_default_na=False)
+
+        self.assertEqual(len(saved), 20)
+        self.assertEqual(list(saved["SEX"]), list(expected["SEX"]))
+        self.assertEqual(list(saved["ADMITTIME"]), list(expected["ADMITTIME"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
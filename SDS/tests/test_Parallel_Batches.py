@@ -0,0 +1,85 @@
+""" Test files for Parallel_Batches functions """
+
+### Load in test module
+import SDS.src.back_end.Looping_Control_Methods.Parallel_Batches as tm
+
+### Load in needed libraries
+import os
+import tempfile
+import time
+import unittest
+
+
+def slow_square(number, delay):
+    """ Sleeps then squares, so later jobs can finish first. """
+
+    time.sleep(delay)
+
+    return number * number
+
+
+def marked_square(number, delay, directory):
+    """ Leaves a file to show the job ran, then squares. """
+
+    open(os.path.join(directory, str(number)), "w").close()
+
+    return slow_square(number, delay)
+
+
+class Test_Parallel_Batches(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR ordered_parallel_map()
+    ---------------------------------------------------------------------------
+    Testing results come back in job order and the seeds and thread counts
+    of the batches.
+    """
+
+    def test_results_in_order(self):
+        """ Tests early jobs that finish last are still yielded first. """
+
+        jobs = [(i, 0.2 if i < 2 else 0.0) for i in range(8)]
+
+        results = list(
+            tm.ordered_parallel_map(slow_square, jobs, n_workers=3, window=4)
+        )
+
+        self.assertEqual(results, [i * i for i in range(8)])
+
+    def test_close_cancels_jobs(self):
+        """ Tests jobs not yet started never run once the results are
+            closed. """
+
+        with tempfile.TemporaryDirectory() as directory:
+            jobs = [(i, 0.3, directory) for i in range(12)]
+
+            results = tm.ordered_parallel_map(
+                marked_square, jobs, n_workers=1, window=8
+            )
+
+            self.assertEqual(next(results), 0)
+
+            start = time.time()
+            results.close()
+
+            # Only the running job and the few already queued to the worker
+            # run, not the rest of the window
+            self.assertLessEqual(len(os.listdir(directory)), 4)
+            self.assertLess(time.time() - start, 1.5)
+
+    def test_batch_seed(self):
+        """ Tests seeds depend only on the run seed and batch number. """
+
+        self.assertIsNone(tm.batch_seed(None, 3))
+        self.assertEqual(tm.batch_seed(7, 3), tm.batch_seed(7, 3))
+        self.assertNotEqual(tm.batch_seed(7, 3), tm.batch_seed(7, 4))
+
+    def test_batch_thread_count(self):
+        """ Tests cores are shared out with at least 1 thread each. """
+
+        self.assertEqual(tm.batch_thread_count(4, cpu_total=64), 16)
+        self.assertEqual(tm.batch_thread_count(100, cpu_total=64), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+""" Test files for Rare_Class_Pooling functions """
+
+### Load in test module
+import SDS.src.back_end.Machine_Learning_Synthesis.Rare_Class_Pooling as tm
+
+### Load in needed libraries
+import unittest
+import pandas as pd
+import numpy as np
+
+
+class Test_Rare_Class_Pooling(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR rare_classes(), pool_rare_classes() and
+    resample_rare_classes()
+    ---------------------------------------------------------------------------
+    Testing which classes are pooled and that pooled predictions only get
+    rare classes back.
+    """
+
+    def setUp(self):
+        self.real_data = pd.DataFrame(
+            {
+                "Column_1": ["1"] * 6 + ["2"] * 4,
+                "Target": ["A", "A", "A", "B", "C", "A"]
+                + ["D", "D", "D", "E"],
+            }
+        )
+
+    def test_rare_classes(self):
+        """ Tests the threshold and that a single rare class isn't pooled. """
+
+        target = self.real_data["Target"]
+
+        self.assertEqual(sorted(tm.rare_classes(target, 2)), ["B", "C", "E"])
+        self.assertEqual(len(tm.rare_classes(target, None)), 0)
+
+        # With B and C counted as A, E is the only rare class
+        self.assertEqual(
+            len(tm.rare_classes(target.replace({"B": "A", "C": "A"}), 2)), 0
+        )
+
+    def test_pool_rare_classes(self):
+        """ Tests rare classes become one class and others are kept. """
+
+        pooled = tm.pool_rare_classes(self.real_data["Target"], ["B", "C"])
+
+        self.assertEqual(
+            sorted(pooled.unique()), ["A", "D", "E", tm.RARE_CLASS_LABEL]
+        )
+        self.assertEqual((pooled == tm.RARE_CLASS_LABEL).sum(), 2)
+
+    def test_resample_rare_classes(self):
+        """ Tests pooled rows get a rare class of the same context. """
+
+        synth = pd.DataFrame({"Column_1": ["1"] * 50 + ["2"] * 50})
+
+        predictions = np.array(["A"] * 10 + [tm.RARE_CLASS_LABEL] * 90)
+
+        result = tm.resample_rare_classes(
+            predictions,
+            self.real_data[["Column_1"]],
+            self.real_data["Target"],
+            synth,
+            ["B", "C", "E"],
+            random_state=np.random.RandomState(0),
+        )
+
+        self.assertEqual(list(result[:10]), ["A"] * 10)
+        self.assertEqual(set(result[10:50]), {"B", "C"})
+        self.assertEqual(set(result[50:]), {"E"})
+
+
+if __name__ == "__main__":
+    unittest.main()
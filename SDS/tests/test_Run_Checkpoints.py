@@ -0,0 +1,99 @@
+""" Test files for Run_Checkpoints functions """
+
+### Load in test module
+import SDS.src.back_end.Looping_Control_Methods.Run_Checkpoints as tm
+
+### Load in needed libraries
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+
+class Test_Run_Checkpoints(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR open_run(), save_batch() and load_batch()
+    ---------------------------------------------------------------------------
+    Testing finished batches are kept on resume, only by the same run, and
+    that the seed of the run is needed but not saved.
+    """
+
+    def setUp(self):
+
+        self.real_data = pd.DataFrame({"SEX": ["0", "1"], "Combi": ["a", "b"]})
+        self.settings = {"size_of_synth_rows": 10, "thread_count": 4}
+        self.loop = [(0, 1), (1, 2)]
+
+    def test_resume(self):
+        """ Tests a saved batch is loaded on resume. """
+
+        key = tm.run_key(self.real_data, self.settings, self.loop, 7)
+
+        batch_output = (pd.DataFrame({"SEX": ["M", "F"]}), ["Synth_Label_0"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = tm.open_run(directory, key, 7)
+            tm.save_batch(directory, manifest, 0, (0, 1), batch_output)
+
+            resumed = tm.open_run(directory, key, 7, resume=True)
+
+            self.assertEqual(resumed["finished"], {"0": [0, 1]})
+
+            frame, removal_columns = tm.load_batch(directory, 0)
+
+            pd.testing.assert_frame_equal(frame, batch_output[0])
+            self.assertEqual(removal_columns, ["Synth_Label_0"])
+
+            # A batch without its file is not finished
+            os.remove(tm.batch_file(directory, 0))
+
+            self.assertEqual(
+                tm.open_run(directory, key, 7, resume=True)["finished"], {}
+            )
+
+            # Without resume the old run is removed
+            self.assertEqual(tm.open_run(directory, key, 7)["finished"], {})
+
+    def test_seed_not_saved(self):
+        """ Tests a run needs a seed and doesn't write it to the folder. """
+
+        key = tm.run_key(self.real_data, self.settings, self.loop, 123456)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                tm.open_run(directory, key)
+
+            tm.open_run(directory, key, 123456)
+
+            with open(os.path.join(directory, tm.MANIFEST_NAME), "r") as f:
+                self.assertNotIn("123456", f.read())
+
+    def test_run_key(self):
+        """ Tests only a different run changes the key. """
+
+        key = tm.run_key(self.real_data, self.settings, self.loop, 7)
+
+        settings = dict(self.settings, thread_count=1)
+
+        self.assertEqual(
+            key, tm.run_key(self.real_data, settings, self.loop, 7)
+        )
+        self.assertNotEqual(
+            key, tm.run_key(self.real_data, self.settings, self.loop, 8)
+        )
+        self.assertNotEqual(
+            key, tm.run_key(self.real_data, self.settings, [(0, 2)], 7)
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            tm.open_run(directory, key, 7)
+
+            other_key = tm.run_key(self.real_data.iloc[:1], {}, self.loop, 7)
+
+            with self.assertRaises(ValueError):
+                tm.open_run(directory, other_key, 7, resume=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
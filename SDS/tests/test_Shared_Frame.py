@@ -0,0 +1,52 @@
+""" Test files for Shared_Frame functions """
+
+### Load in test module
+import SDS.src.back_end.General_Utility.Shared_Frame as tm
+
+### Load in needed libraries
+import os
+import unittest
+import pandas as pd
+import numpy as np
+
+
+class Test_Shared_Frame(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR export_shared_frame() and shared_frame_view()
+    ---------------------------------------------------------------------------
+    Testing rows decoded from the shared file match the original data.
+    """
+
+    def setUp(self):
+        self.test_df = pd.DataFrame(
+            {
+                "Column_1": ["1", "2", "1", np.nan, "3"],
+                "Column_2": [10, 20, 10, 30, 20],
+            }
+        )
+
+        self.frame_spec = tm.export_shared_frame(self.test_df)
+
+    def tearDown(self):
+        tm.release_shared_frame(self.frame_spec)
+
+    def test_view_matches(self):
+        """ Tests a slice decodes to the same values and types. """
+
+        codes = tm.attach_shared_frame(self.frame_spec)
+
+        result = tm.shared_frame_view(codes, self.frame_spec, 1, 4)
+
+        pd.testing.assert_frame_equal(result, self.test_df.iloc[1:4])
+
+    def test_release(self):
+        """ Tests the shared file is deleted. """
+
+        tm.release_shared_frame(self.frame_spec)
+
+        self.assertFalse(os.path.exists(self.frame_spec["directory"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+""" Test files for the command line entry point """
+
+### Load in test module
+import SDS.src.Synth_CLI as tm
+
+### Load in needed libraries
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import pandas as pd
+import yaml
+
+
+class Test_Synth_CLI(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR main()
+    ---------------------------------------------------------------------------
+    Testing a control file is read and checked against the input file with
+    no prompts.
+    """
+
+    def setUp(self):
+
+        self.directory = tempfile.TemporaryDirectory()
+
+        self.input_path = os.path.join(self.directory.name, "real.csv")
+
+        pd.DataFrame(
+            {"SEX": ["F", "M"], "LOC": ["A", "B"], "ADMIT": ["E", "U"]}
+        ).to_csv(self.input_path, index=False)
+
+        self.control_variables = {
+            "Column Parameters": {
+                "Demographic Columns": ["SEX", "LOC"],
+                "Machine Learning Columns": ["ADMIT"],
+                "Combination Columns": ["LOC"],
+            },
+            "Synthetic File Parameters": {
+                "Output File Name": ["synthetic"],
+                "Number of Rows": [100],
+            },
+            "Security Parameters": {"Remove Small Values Below": [0]},
+        }
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+
+    def validate(self, control_variables):
+        """ Runs --validate-only on a control file. """
+
+        config_path = os.path.join(self.directory.name, "control.yml")
+
+        with open(config_path, "w") as f:
+            yaml.safe_dump(control_variables, f)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            with contextlib.redirect_stderr(io.StringIO()) as errors:
+                exit_code = tm.main(
+                    [
+                        "--input",
+                        self.input_path,
+                        "--config",
+                        config_path,
+                        "--validate-only",
+                    ]
+                )
+
+        return (exit_code, errors.getvalue())
+
+    def test_valid_config(self):
+        """ Tests a control file with only the needed keys. """
+
+        self.assertEqual(self.validate(self.control_variables), (0, ""))
+
+    def test_invalid_config(self):
+        """ Tests unknown columns and missing keys are reported. """
+
+        self.control_variables["Column Parameters"]["Combination Columns"] = [
+            "AGE"
+        ]
+
+        exit_code, errors = self.validate(self.control_variables)
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("AGE", errors)
+
+        del self.control_variables["Synthetic File Parameters"]
+
+        exit_code, errors = self.validate(self.control_variables)
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("Output File Name", errors)
+
+    def test_run_directory_needs_seed(self):
+        """ Tests a Run Directory without a Random Seed is reported. """
+
+        self.control_variables["Computer Parameters"] = {
+            "Run Directory": ["sds_run"]
+        }
+
+        exit_code, errors = self.validate(self.control_variables)
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("Random Seed", errors)
+
+        self.control_variables["Optional Parameters"] = {"Random Seed": [7]}
+
+        self.assertEqual(self.validate(self.control_variables), (0, ""))
+
+    def test_training_device(self):
+        """ Tests an unknown Training Device is reported. """
+
+        self.control_variables["Computer Parameters"] = {
+            "Training Device": ["TPU"]
+        }
+
+        exit_code, errors = self.validate(self.control_variables)
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("Training Device", errors)
+
+        self.control_variables["Computer Parameters"] = {
+            "Training Device": ["cpu"]
+        }
+
+        self.assertEqual(self.validate(self.control_variables), (0, ""))
+
+    def test_weighted_training(self):
+        """ Tests Weighted Training other than True, False or auto. """
+
+        self.control_variables["Computer Parameters"] = {
+            "Weighted Training": ["sometimes"]
+        }
+
+        exit_code, errors = self.validate(self.control_variables)
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("Weighted Training", errors)
+
+        for value in (False, "True", "auto"):
+            self.control_variables["Computer Parameters"] = {
+                "Weighted Training": [value]
+            }
+
+            self.assertEqual(self.validate(self.control_variables), (0, ""))
+
+    def test_output_format(self):
+        """ Tests an Output File Format other than csv or parquet. """
+
+        self.control_variables["Synthetic File Parameters"][
+            "Output File Format"
+        ] = ["xlsx"]
+
+        exit_code, errors = self.validate(self.control_variables)
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("Output File Format", errors)
+
+        self.control_variables["Synthetic File Parameters"][
+            "Output File Format"
+        ] = ["Parquet"]
+
+        self.assertEqual(self.validate(self.control_variables), (0, ""))
+
+    def test_tree_settings(self):
+        """ Tests tree iterations and depth that aren't whole numbers. """
+
+        for iterations, depth in (("many", 6), (0, 6), (400, 2.5), (400, 20)):
+            self.control_variables["Computer Parameters"] = {
+                "Number of Training Cycles for Random Forests": [iterations],
+                "Depth of Random Forests Allowed": [depth],
+            }
+
+            exit_code, errors = self.validate(self.control_variables)
+
+            self.assertEqual(exit_code, 1)
+            self.assertIn(
+                "Training Cycles" if depth == 6 else "Depth of Random", errors
+            )
+
+        self.control_variables["Computer Parameters"] = {
+            "Number of Training Cycles for Random Forests": ["auto"],
+            "Depth of Random Forests Allowed": [8],
+        }
+
+        self.assertEqual(self.validate(self.control_variables), (0, ""))
+
+    def test_input_needs_config(self):
+        """ Tests --input alone is a usage error. """
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                tm.main(["--input", self.input_path])
+
+
+class Test_Import_Cost(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR lazy imports
+    ---------------------------------------------------------------------------
+    Testing the command line starts without the heavy libraries, which are
+    only loaded by the stage that needs them.
+    """
+
+    def test_cli_import(self):
+        """ Tests importing the command line in a fresh interpreter. """
+
+        code = (
+            "import sys, SDS.src.Synth_CLI\n"
+            + "print([x for x in ('catboost', 'sklearn', 'scipy', 'pandas',"
+            + " 'tkinter', 'psutil') if x in sys.modules])"
+        )
+
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+        self.assertEqual(output.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+""" Test files for the streaming synthesis """
+
+### Load in test module
+import SDS.src.back_end.Control_Function as tm
+
+### Load in needed libraries
+import os
+import tempfile
+import unittest
+import pandas as pd
+import numpy as np
+
+
+class Test_Synth_Stream_Function(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR Synth_Stream_Function()
+    ---------------------------------------------------------------------------
+    Testing the chunks are decoded, sized and repeatable, and that the
+    stream can be stopped early.
+    """
+
+    def setUp(self):
+
+        rng = np.random.RandomState(0)
+
+        real_data = pd.DataFrame(
+            {
+                "SEX": rng.choice(["F", "M"], size=400),
+                "LOC": rng.choice(["A", "B", "C", "D"], size=400),
+                "ADMIT": rng.choice(["ELECTIVE", "URGENT", ""], size=400),
+            }
+        )
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "real.csv")
+        real_data.to_csv(self.file_path, index=False)
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+
+    def stream(self, **options):
+        """ Streams from the test file, sampling rather than modelling. """
+
+        return tm.Synth_Stream_Function(
+            ["SEX", "LOC"],
+            ["ADMIT"],
+            ["SEX", "LOC", "ADMIT"],
+            1000,
+            ["LOC"],
+            ["0"],
+            self.file_path,
+            remove_small_vals=0,
+            group_size=1,
+            task_type="CPU",
+            empirical_threshold=10 ** 6,
+            random_seed=1,
+            **options
+        )
+
+    def test_chunks(self):
+        """ Tests chunk sizes, decoding and repeat runs. """
+
+        chunks = list(self.stream(chunk_rows=100))
+
+        self.assertTrue(all(len(x) <= 100 for x in chunks))
+
+        synthetic_df = pd.concat(chunks, ignore_index=True)
+
+        self.assertEqual(list(synthetic_df), ["SEX", "LOC", "ADMIT"])
+        self.assertEqual(set(synthetic_df["SEX"]), {"F", "M"})
+        self.assertEqual(
+            set(synthetic_df["ADMIT"]) - {"ELECTIVE", "URGENT", " "}, set()
+        )
+
+        pd.testing.assert_frame_equal(
+            synthetic_df, pd.concat(list(self.stream()), ignore_index=True)
+        )
+
+    def test_stop_early(self):
+        """ Tests a stream can be closed after the first chunk. """
+
+        stream = self.stream()
+
+        self.assertTrue(len(next(stream)) > 0)
+
+        stream.close()
+
+    def test_single_group_batches(self):
+        """ Tests batches of one group, whose demographic variables have one
+            value, are synthesised rather than failing in the tree model. """
+
+        chunks = list(
+            tm.Synth_Stream_Function(
+                ["LOC"],
+                ["SEX", "ADMIT"],
+                ["SEX", "LOC", "ADMIT"],
+                1000,
+                ["LOC"],
+                ["0"],
+                self.file_path,
+                remove_small_vals=0,
+                task_type="CPU",
+                tree_iterations=20,
+                target_batch_rows=50,
+                max_batch_groups=3,
+                random_seed=1,
+            )
+        )
+
+        # Every LOC group is bigger than the target, so has its own batch
+        self.assertEqual(len(chunks), 4)
+
+        for chunk in chunks:
+            self.assertEqual(chunk["LOC"].nunique(), 1)
+
+        synthetic_df = pd.concat(chunks, ignore_index=True)
+
+        self.assertTrue(990 <= len(synthetic_df) <= 1000)
+        self.assertEqual(set(synthetic_df["SEX"]), {"F", "M"})
+
+
+if __name__ == "__main__":
+    unittest.main()
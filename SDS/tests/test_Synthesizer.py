@@ -0,0 +1,186 @@
+""" Test files for the Synthesizer """
+
+### Load in test module
+import SDS.src.back_end.Synthesizer as tm
+import SDS.src.back_end.Demographic_Synthesis.Demographic_Synthesis_Diff_Piv as dp
+import SDS.src.back_end.Machine_Learning_Synthesis.ML_Synthesis_Main_debug as ml
+import SDS.src.back_end.Machine_Learning_Synthesis.ML_Synthesis_Utilities as mu
+
+### Load in needed libraries
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+
+
+class Test_Probability_Tables(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR probability_tables() and sample_from_tables()
+    ---------------------------------------------------------------------------
+    Testing the values and probabilities are kept together and that sampled
+    columns follow the real ones.
+    """
+
+    def test_tables_follow_real_data(self):
+        """ Tests first seen is not most common, so order matters. """
+
+        real_data = pd.DataFrame(
+            {
+                "Column_1": ["1"] + ["2"] * 9,
+                "Column_2": ["a"] + ["b"] * 5 + ["c"] * 4,
+            }
+        )
+
+        tables = dp.probability_tables(real_data, [("Column_1", "Column_2")])
+
+        values, probs = tables["initial"]
+        self.assertEqual(dict(zip(values, probs)), {"2": 0.9, "1": 0.1})
+
+        values, probs = tables["conditional"][0][2]["2"]
+        self.assertAlmostEqual(dict(zip(values, probs))["b"], 5 / 9)
+
+        np.random.seed(0)
+        dp.set_sampling_seed(0)
+
+        synth_df = dp.sample_from_tables(tables, 20000, 100)
+
+        dp.set_sampling_seed()
+
+        self.assertAlmostEqual(
+            np.mean(synth_df["Column_1"] == "2"), 0.9, places=2
+        )
+        self.assertEqual(
+            set(synth_df.loc[synth_df["Column_1"] == "1", "Column_2"]), {"a"}
+        )
+
+
+class Test_Synthesizer(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR Synthesizer
+    ---------------------------------------------------------------------------
+    Testing a fitted, saved and loaded Synthesizer samples any size and
+    repeats itself with a seed.
+    """
+
+    def test_fit_save_load_sample(self):
+        """ Tests sampling after a save and load. """
+
+        rng = np.random.RandomState(0)
+
+        real_data = pd.DataFrame(
+            {
+                "SEX": rng.choice(["F", "M"], size=400),
+                "LOC": rng.choice(["A", "B"], size=400),
+                "ADMIT": rng.choice(["ELECTIVE", "URGENT"], size=400),
+            }
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "real.csv")
+            real_data.to_csv(file_path, index=False)
+
+            synthesizer = tm.Synthesizer(
+                ["SEX", "LOC"],
+                ["ADMIT"],
+                ["SEX", "LOC", "ADMIT"],
+                ["LOC"],
+                remove_small_vals=0,
+                numeric_group_vars=[],
+                task_type="CPU",
+                tree_iterations=20,
+                random_seed=1,
+            ).fit(file_path)
+
+            saved_path = os.path.join(directory, "synthesizer.sds")
+            synthesizer.save(saved_path)
+
+            loaded = tm.Synthesizer.load(saved_path)
+
+        small = loaded.sample(100, random_seed=3)
+        large = loaded.sample(1000)
+
+        # An unseeded sample after a seeded one is back on the CSPRNG
+        self.assertIsNone(dp._sampling_random)
+
+        self.assertEqual(list(small), ["SEX", "LOC", "ADMIT"])
+        self.assertTrue(95 <= len(small) <= 100)
+        self.assertTrue(995 <= len(large) <= 1000)
+        self.assertEqual(set(large["ADMIT"]) - {"ELECTIVE", "URGENT"}, set())
+
+        pd.testing.assert_frame_equal(
+            small, synthesizer.sample(100, random_seed=3)
+        )
+
+    def test_fit_workers(self):
+        """ Tests models trained two at a time give the same seeded data. """
+
+        rng = np.random.RandomState(0)
+
+        real_data = pd.DataFrame(
+            {
+                "SEX": rng.choice(["F", "M"], size=400),
+                "LOC": rng.choice(["A", "B"], size=400),
+                "ADMIT": rng.choice(["ELECTIVE", "URGENT"], size=400),
+                "WARD": rng.choice(["1", "2", "3"], size=400),
+                "OUTCOME": rng.choice(["HOME", "TRANSFER"], size=400),
+            }
+        )
+
+        samples = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "real.csv")
+            real_data.to_csv(file_path, index=False)
+
+            for fit_workers in (1, 2):
+                # Four cores to share, so two workers are used on any machine
+                with mock.patch.object(
+                    ml, "ThreadPoolExecutor", wraps=ml.ThreadPoolExecutor
+                ) as executor, mock.patch.object(
+                    ml, "tree_fit", wraps=ml.tree_fit
+                ) as tree_fit, mock.patch.object(
+                    mu.os, "cpu_count", return_value=4
+                ):
+                    synthesizer = tm.Synthesizer(
+                        ["SEX", "LOC"],
+                        ["ADMIT", "WARD", "OUTCOME"],
+                        list(real_data),
+                        ["LOC"],
+                        remove_small_vals=0,
+                        numeric_group_vars=[],
+                        task_type="CPU",
+                        tree_iterations=20,
+                        random_seed=1,
+                        fit_workers=fit_workers,
+                    ).fit(file_path)
+
+                self.assertEqual(executor.called, fit_workers > 1)
+
+                if fit_workers > 1:
+                    executor.assert_called_with(max_workers=2)
+
+                    thread_counts = [
+                        x.kwargs["thread_count"] for x in tree_fit.mock_calls
+                    ]
+
+                    self.assertEqual(set(thread_counts), {2})
+
+                samples.append(synthesizer.sample(200, random_seed=3))
+
+        pd.testing.assert_frame_equal(samples[0], samples[1])
+
+    def test_unknown_option(self):
+        """ Tests misspelt options are not silently ignored. """
+
+        with self.assertRaises(TypeError):
+            tm.Synthesizer(
+                ["SEX"], ["ADMIT"], ["SEX", "ADMIT"], ["SEX"], sead=1
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
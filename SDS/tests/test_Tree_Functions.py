@@ -0,0 +1,177 @@
+""" Test files for Tree_Functions_debug functions """
+
+### Load in test module
+import SDS.src.back_end.Tree_Methods.Tree_Functions_debug as tm
+
+### Load in needed libraries
+import unittest
+import pandas as pd
+import numpy as np
+
+
+class Test_Training_Device(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR training_device() and device_model_params()
+    ---------------------------------------------------------------------------
+    Testing the device choice and the CatBoost settings for each device.
+    """
+
+    def test_training_device(self):
+        """ Tests set devices, No_Gpus and bad values. """
+
+        self.assertEqual(tm.training_device("cpu", ["0"]), "CPU")
+        self.assertEqual(tm.training_device("GPU", ["0"]), "GPU")
+        self.assertEqual(tm.training_device("auto", ["No_Gpus"]), "CPU")
+        self.assertIn(tm.training_device(None, ["0"]), ("CPU", "GPU"))
+
+        with self.assertRaises(ValueError):
+            tm.training_device("TPU", ["0"])
+
+    def test_device_model_params(self):
+        """ Tests CPU settings and that only the GPU is given devices. """
+
+        cpu_params = tm.device_model_params("CPU", ["0"], thread_count=4)
+
+        self.assertEqual(cpu_params["task_type"], "CPU")
+        self.assertEqual(cpu_params["thread_count"], 4)
+        self.assertEqual(cpu_params["depth"], 6)
+        self.assertNotIn("devices", cpu_params)
+
+        gpu_params = tm.device_model_params("GPU", ["0"])
+
+        self.assertEqual(gpu_params["devices"], ["0"])
+        self.assertEqual(gpu_params["thread_count"], -1)
+
+
+class Test_Tree_Settings(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR tree_settings()
+    ---------------------------------------------------------------------------
+    Testing set, default and automatic model sizes.
+    """
+
+    def test_defaults_and_set_values(self):
+        """ Tests None gives the old defaults and numbers are kept. """
+
+        self.assertEqual(tm.tree_settings(None, None, 100, 3, "GPU"), (400, 11))
+        self.assertEqual(tm.tree_settings(None, None, 100, 3, "CPU"), (400, 6))
+        self.assertEqual(tm.tree_settings("150", 4, 100, 3, "GPU"), (150, 4))
+
+    def test_auto_grows_with_data(self):
+        """ Tests small groups get small models and depth is capped. """
+
+        small = tm.tree_settings("auto", "auto", 30, 3, "GPU")
+        large = tm.tree_settings("auto", "auto", 10 ** 6, 50, "CPU")
+
+        self.assertLess(small[0], large[0])
+        self.assertLess(small[1], large[1])
+        self.assertEqual(large, (400, 6))
+
+
+class Test_Weighted_Training(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR unique_row_counts(), split_counts() and
+    use_weighted_training()
+    ---------------------------------------------------------------------------
+    Testing the unique rows keep every row and the split keeps every count.
+    """
+
+    def test_unique_row_counts(self):
+        """ Tests counts add back to the rows, missing values included. """
+
+        data = pd.DataFrame(
+            {"Column_1": ["1", "1", "2", np.nan, np.nan, "1"]}
+        )
+        label = pd.Series(["a", "a", "b", "b", "b", "c"], name="Column_2")
+
+        unique_data, counts = tm.unique_row_counts(data, label)
+
+        self.assertEqual(list(unique_data), ["Column_1", "Column_2"])
+        self.assertEqual(len(unique_data), 4)
+        self.assertEqual(counts.sum(), 6)
+
+        expanded = unique_data.loc[unique_data.index.repeat(counts)]
+
+        pd.testing.assert_frame_equal(
+            expanded.sort_values(["Column_2", "Column_1"]).reset_index(
+                drop=True
+            ),
+            pd.concat([data, label], axis=1)
+            .sort_values(["Column_2", "Column_1"])
+            .reset_index(drop=True),
+        )
+
+    def test_split_counts(self):
+        """ Tests the split adds up and is about test_size. """
+
+        counts = np.array([1000, 1, 0, 50])
+
+        train_counts, eval_counts = tm.split_counts(counts, 0.2, 1)
+
+        self.assertEqual(list(train_counts + eval_counts), list(counts))
+        self.assertTrue(150 < eval_counts[0] < 250)
+
+    def test_use_weighted_training(self):
+        """ Tests the automatic choice and forced choices. """
+
+        self.assertTrue(tm.use_weighted_training(None, 10.0))
+        self.assertFalse(tm.use_weighted_training("auto", 1.2))
+        self.assertTrue(tm.use_weighted_training(True, 1.0))
+        self.assertFalse(tm.use_weighted_training(False, 10.0))
+
+        with self.assertRaises(ValueError):
+            tm.use_weighted_training("sometimes", 10.0)
+
+
+class Test_Tree_Synth(unittest.TestCase):
+    """
+    ---------------------------------------------------------------------------
+    TESTING FOR tree_synth()
+    ---------------------------------------------------------------------------
+    Testing a CPU model stops early on a target it can't learn.
+    """
+
+    def test_early_stopping_report(self):
+        """ Tests the best iteration is recorded and training stops early. """
+
+        rng = np.random.RandomState(0)
+
+        real_data = pd.DataFrame(
+            {
+                "Column_1": rng.choice(["1", "2", "3"], size=300),
+                "Column_2": rng.choice(["1", "2"], size=300),
+            }
+        )
+
+        model_report = []
+
+        preds = tm.tree_synth(
+            real_data[["Column_1"]].iloc[:20],
+            real_data,
+            ["Column_1"],
+            "Column_2",
+            1,
+            [0],
+            ["0"],
+            thread_count=1,
+            task_type="CPU",
+            model_report=model_report,
+            tree_iterations=300,
+            early_stopping_rounds=10,
+        )
+
+        self.assertEqual(len(preds), 20)
+        self.assertEqual(model_report[0]["device"], "CPU")
+        self.assertFalse(model_report[0]["pooled"])
+        self.assertLess(model_report[0]["best_iteration"], 300)
+
+        # 300 rows of only 6 unique rows are trained on with weights
+        self.assertTrue(model_report[0]["weighted"])
+        self.assertEqual(model_report[0]["training_rows"], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -23,9 +23,10 @@ setuptools.setup(
         "pyyaml",
         "psutil",
     ],
+    extras_require={"parquet": ["pyarrow"]},
     entry_points={
         "console_scripts": [
-            "synthesise = SDS.src.Synth_It_So:synthesis_activation"
+            "synthesise = SDS.src.Synth_CLI:main"
         ]
     },
     classifiers=[